@@ -1,6 +1,11 @@
+import uuid
+
 import streamlit as st
-from mathmind_agent.agent_executor import agent_executor
-import time
+from mathmind_agent.agent_executor import stream_events, get_model_name
+from mathmind_agent.prompts import PROMPT_VERSION
+from mathmind_agent.fast_path import try_fast_answer
+from mathmind_agent.answer_cache import get_answer_cache
+from mathmind_agent.workspace import get_workspace
 
 # Configure page settings
 st.set_page_config(
@@ -458,6 +463,8 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "processing" not in st.session_state:
     st.session_state.processing = False
+if "workspace_id" not in st.session_state:
+    st.session_state.workspace_id = uuid.uuid4().hex
 
 # Sidebar
 with st.sidebar:
@@ -532,32 +539,61 @@ if prompt := st.chat_input("Ask me any mathematics question..."):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Process with agent
-    with st.chat_message("assistant"):
-        with st.spinner("🔄 Processing your mathematical query..."):
+    # Pure arithmetic is answered locally; repeated questions come from the answer cache,
+    # unless they use values stored in this session's workspace
+    answer_cache = get_answer_cache(get_model_name(), PROMPT_VERSION)
+    if answer_cache is not None and get_workspace(st.session_state.workspace_id).involves(prompt):
+        answer_cache = None
+    local_answer = try_fast_answer(prompt)
+    if not local_answer and answer_cache is not None:
+        local_answer = answer_cache.get(prompt)
+
+    if local_answer:
+        with st.chat_message("assistant"):
+            st.markdown(local_answer)
+        st.session_state.messages.append({"role": "assistant", "content": local_answer})
+
+    else:
+        # Process with agent, rendering tool activity and answer tokens as they arrive
+        with st.chat_message("assistant"):
+            status = st.status("🔄 Processing your mathematical query...", expanded=False)
             try:
                 st.session_state.processing = True
-                
-                # Simulate processing time for demo
-                time.sleep(1)
-                
-                # Execute agent (replace with actual agent call)
-                response = agent_executor.invoke({"input": prompt})
-                
-                # Extract response
-                if isinstance(response, dict) and "output" in response:
-                    assistant_response = response["output"]
-                else:
-                    assistant_response = str(response)
-                
-                st.markdown(assistant_response)
+
+                # Set by the final event: only normally finished runs are cached
+                outcome = {"complete": False}
+
+                def answer_stream():
+                    streamed = False
+                    for event in stream_events(prompt, session_id=st.session_state.workspace_id):
+                        if event["type"] == "tool_start":
+                            status.write(f"🔧 **{event['tool']}**: `{event['input']}`")
+                        elif event["type"] == "tool_end":
+                            status.write(event["output"])
+                        elif event["type"] == "token":
+                            streamed = True
+                            yield event["text"]
+                        elif event["type"] == "final":
+                            outcome["complete"] = event.get("complete", True)
+                            if not streamed:
+                                yield event["text"]
+
+                assistant_response = st.write_stream(answer_stream())
+                if not isinstance(assistant_response, str):
+                    assistant_response = "".join(str(part) for part in assistant_response)
+                status.update(label="✅ Solved", state="complete")
+
                 st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-                
+
+                if answer_cache is not None and outcome["complete"]:
+                    answer_cache.put(prompt, assistant_response)
+
             except Exception as e:
+                status.update(label="❌ Failed", state="error")
                 error_message = f"❌ An error occurred: {str(e)}"
                 st.error(error_message)
                 st.session_state.messages.append({"role": "assistant", "content": error_message})
-            
+
             finally:
                 st.session_state.processing = False
 
@@ -1,34 +1,392 @@
 # mathmind_agent/agent_executor.py
 
 import os
+import asyncio
 import logging
-from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from mathmind_agent.tools import get_enhanced_math_tools  # ✅ You must define this
-from mathmind_agent.prompts import enhanced_prompt         # ✅ You must define this
+import queue
+import threading
+import weakref
+from functools import lru_cache
 
-# Load env vars
-load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
-
-if not groq_api_key:
-    raise ValueError("GROQ_API_KEY is not set in your .env file")
+from mathmind_agent.budget import MAX_ITERATIONS, RUN_DEADLINE_SECONDS
+from mathmind_agent.scheduler import request_context
+from mathmind_agent.workspace import get_workspace, workspace_context
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = ChatGroq(
-    api_key=groq_api_key,
-    model_name="llama3-70b-8192"
-)
+DEFAULT_MODEL_NAME = "llama3-70b-8192"
+
+# "agent" runs the tool-calling loop; "plan" asks for the whole tool plan in one call (see planner.py)
+EXECUTION_MODES = ("agent", "plan")
+DEFAULT_EXECUTION_MODE = os.getenv("MATHMIND_EXECUTION_MODE", "agent")
+
+# Module attributes built on first access (see __getattr__)
+_LAZY_COMPONENTS = ("llm", "tools", "prompt", "agent", "agent_executor")
+
+_components = {}
+_components_lock = threading.Lock()
+
+# AgentExecutors for tool subsets picked by tool_selection, keyed by tool names
+_subset_executors = {}
+
+
+@lru_cache(maxsize=None)
+def _load_env():
+    """Load .env once, on first use rather than at import."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def get_model_name() -> str:
+    """Name of the Groq model answering questions (MATHMIND_MODEL)."""
+    _load_env()
+    return os.getenv("MATHMIND_MODEL", DEFAULT_MODEL_NAME)
+
+
+def _build_components():
+    """
+    Create the LLM, tools, prompt and AgentExecutor once per process.
+
+    LangChain and the Groq client are imported here, so importing this
+    module stays cheap and does not require GROQ_API_KEY.
+    """
+    if _components:
+        return _components
+
+    with _components_lock:
+        if _components:
+            return _components
+
+        _load_env()
+        groq_api_key = os.getenv("GROQ_API_KEY")
+        if not groq_api_key:
+            raise ValueError("GROQ_API_KEY is not set in your .env file")
+
+        from langchain_groq import ChatGroq
+        from langchain.agents import create_tool_calling_agent
+        from mathmind_agent.concurrent_executor import ConcurrentAgentExecutor
+        from mathmind_agent.tools import get_enhanced_math_tools
+        from mathmind_agent.prompts import get_enhanced_prompt
+        from mathmind_agent import transport
+
+        # Initialize LLM on the shared, pooled transport; retries happen in the
+        # transport (jittered, deadline-aware), so the SDK's own are disabled
+        llm = ChatGroq(
+            api_key=groq_api_key,
+            model_name=get_model_name(),
+            groq_api_base=transport.LLM_BASE_URL,
+            http_client=transport.get_http_client(),
+            http_async_client=transport.AsyncClientProxy(),
+            max_retries=0,
+            request_timeout=transport.HTTP_DEADLINE
+        )
+        # The async pool that matters is the background loop's, which serves stream_events
+        transport.warm_up_in_background(loop=_get_background_loop())
+
+        # Load tools and prompt
+        tools = get_enhanced_math_tools()
+        prompt = get_enhanced_prompt()
+
+        # Create agent + executor
+        agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=prompt)
+        agent_executor = ConcurrentAgentExecutor(agent=agent, tools=tools, verbose=True,
+                                                    max_iterations=MAX_ITERATIONS,
+                                                    max_execution_time=RUN_DEADLINE_SECONDS)
+
+        _components.update(llm=llm, tools=tools, prompt=prompt, agent=agent, agent_executor=agent_executor)
+        logger.info("Agent executor initialized")
+
+    return _components
+
+
+def _build_executor(tool_names: tuple):
+    """AgentExecutor offering only the named tools (one per subset, built on first use)."""
+    executor = _subset_executors.get(tool_names)
+    if executor is not None:
+        return executor
+
+    components = _build_components()
+    with _components_lock:
+        executor = _subset_executors.get(tool_names)
+        if executor is None:
+            from langchain.agents import create_tool_calling_agent
+            from mathmind_agent.concurrent_executor import ConcurrentAgentExecutor
+            from mathmind_agent.tools import get_enhanced_math_tools
+            from mathmind_agent.prompts import get_enhanced_prompt
+
+            tools = get_enhanced_math_tools(tool_names)
+            agent = create_tool_calling_agent(llm=components["llm"], tools=tools,
+                                              prompt=get_enhanced_prompt(tool_names))
+            executor = _subset_executors[tool_names] = ConcurrentAgentExecutor(
+                agent=agent, tools=tools, verbose=True,
+                max_iterations=MAX_ITERATIONS, max_execution_time=RUN_DEADLINE_SECONDS)
+            logger.info(f"Agent executor initialized for tools: {', '.join(tool_names)}")
+    return executor
+
+
+def get_agent_executor(question: str = None):
+    """
+    Return an AgentExecutor, building it on first call.
+
+    Args:
+        question (str): When given, the executor offers only the tools
+            tool_selection picks for it; otherwise (or when selection declines)
+            the process-wide executor with every tool
+    """
+    if question is not None:
+        from mathmind_agent.tool_selection import select_tool_names
+
+        tool_names = select_tool_names(question)
+        if tool_names is not None:
+            return _build_executor(tool_names)
+    return _build_components()["agent_executor"]
+
+
+def __getattr__(name):
+    # Keeps `from mathmind_agent.agent_executor import agent_executor` working lazily
+    if name in _LAZY_COMPONENTS:
+        return _build_components()[name]
+    if name == "MODEL_NAME":
+        return get_model_name()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Upper bound on agent runs in flight per event loop
+MAX_CONCURRENT_RUNS = int(os.getenv("MATHMIND_MAX_CONCURRENT_RUNS", "32"))
+
+_run_slots = weakref.WeakKeyDictionary()
+
+
+def _get_run_slots():
+    """Semaphore limiting concurrent runs on the current event loop."""
+    loop = asyncio.get_running_loop()
+    slots = _run_slots.get(loop)
+    if slots is None:
+        slots = _run_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+    return slots
+
+
+def _get_single_flight():
+    from mathmind_agent.singleflight import get_single_flight
+    return get_single_flight()
+
+
+def _flight_key(kind, question, mode, session_id=None):
+    from mathmind_agent.prompts import PROMPT_VERSION
+    from mathmind_agent.singleflight import flight_key
+    scope = (get_model_name(), PROMPT_VERSION, mode)
+    # Only a question that stores or reads the session's values depends on its workspace;
+    # everything else is shared with every other session asking it
+    if session_id is not None and get_workspace(session_id).involves(question):
+        scope += (session_id,)
+    return flight_key(kind, question, *scope)
+
+
+def _resolve_mode(mode):
+    mode = mode or DEFAULT_EXECUTION_MODE
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode {mode!r}; expected one of {', '.join(EXECUTION_MODES)}")
+    return mode
+
+
+async def _asolve_planned(question: str):
+    """Plan-mode answer for one question, or None when no usable plan came back."""
+    from mathmind_agent import planner
+
+    components = _build_components()
+    try:
+        return await planner.asolve(question, components["llm"], components["tools"])
+    except planner.PlanError as e:
+        logger.info(f"Plan mode fell back to the agent loop: {e}")
+        return None
+
+
+async def ainvoke(question: str, priority: str = "interactive", mode: str = None, session_id: str = None) -> dict:
+    """
+    Run the agent on one question without blocking the event loop.
+
+    Args:
+        question (str): User question
+        priority (str): Scheduler priority class for its LLM calls ("interactive" or "batch")
+        mode (str): "agent" or "plan" (default MATHMIND_EXECUTION_MODE); plan
+            mode falls back to the agent loop when the plan is unusable
+        session_id (str): Session whose workspace of stored values the tools
+            use (default: a workspace for this run only)
+
+    Returns:
+        dict: AgentExecutor output, with the answer under "output", the mode
+        that produced it under "mode", whether the run finished normally (no
+        limit stopped it, no tool call failed) under "complete" and the total
+        time its LLM calls spent queued under "queue_wait_ms"
+    """
+    mode = _resolve_mode(mode)
+
+    async def run():
+        with request_context(priority) as queue_waits, workspace_context(session_id):
+            async with _get_run_slots():
+                result = await _asolve_planned(question) if mode == "plan" else None
+                if result is not None:
+                    result["mode"] = "plan"
+                else:
+                    result = await get_agent_executor(question).ainvoke({"input": question})
+                    result["mode"] = "agent"
+        result["queue_wait_ms"] = round(sum(queue_waits) * 1000, 1)
+        return result
+
+    single_flight = _get_single_flight()
+    if single_flight is None:
+        return await run()
+    # Identical questions already being answered share that run's result
+    return dict(await single_flight.call(_flight_key("invoke", question, mode, session_id), run))
+
+
+async def astream(question: str, session_id: str = None):
+    """
+    Stream AgentExecutor chunks (actions, tool steps, final output) for one question.
+
+    Yields:
+        dict: Chunks as produced by AgentExecutor.astream
+    """
+    async with _get_run_slots():
+        with workspace_context(session_id):
+            async for chunk in get_agent_executor(question).astream({"input": question}):
+                yield chunk
+
+
+async def abatch(questions, return_exceptions=True, priority: str = "batch", mode: str = None) -> list:
+    """
+    Answer many questions concurrently, bounded by MAX_CONCURRENT_RUNS.
+
+    Returns:
+        list: Agent outputs (or exceptions) in input order
+    """
+    return await asyncio.gather(*(ainvoke(question, priority, mode) for question in questions),
+                                return_exceptions=return_exceptions)
+
+
+async def astream_events(question: str, mode: str = None, session_id: str = None):
+    """
+    Stream a simplified event feed for one question.
+
+    Args:
+        question (str): User question
+        mode (str): "agent" or "plan" (default MATHMIND_EXECUTION_MODE)
+        session_id (str): Session whose workspace of stored values the tools
+            use (default: a workspace for this run only)
+
+    Yields:
+        dict: One of
+            {"type": "tool_start", "tool": name, "input": tool input}
+            {"type": "tool_end", "tool": name, "output": tool output text}
+            {"type": "token", "text": final-answer text, released as each LLM
+                turn ends without tool calls (so turns that call tools add none)}
+            {"type": "final", "text": the complete final answer, "complete": False
+                when a limit stopped the run or a tool call failed}
+
+        Concurrent calls with the same question (and session) share one agent
+        run and receive the same events.
+    """
+    mode = _resolve_mode(mode)
+    single_flight = _get_single_flight()
+    if single_flight is None:
+        events = _agent_events(question, mode, session_id)
+    else:
+        events = single_flight.stream(_flight_key("stream", question, mode, session_id),
+                                      lambda: _agent_events(question, mode, session_id))
+    async for event in events:
+        yield event
+
+
+async def _agent_events(question: str, mode: str, session_id: str = None):
+    from mathmind_agent.tool_results import display_text
+
+    async with _get_run_slots():
+        with workspace_context(session_id):
+            if mode == "plan":
+                from mathmind_agent import planner
+
+                components = _build_components()
+                try:
+                    async for event in planner.aplan_events(question, components["llm"], components["tools"]):
+                        yield event
+                    return
+                except planner.PlanError as e:
+                    # Tool events already sent stay in the feed; the agent loop supplies the answer
+                    logger.info(f"Plan mode fell back to the agent loop: {e}")
+
+            # Text of each LLM turn in progress, by run id: it is part of the answer
+            # only if the turn ends without calling tools
+            turn_text = {}
+            async for event in get_agent_executor(question).astream_events({"input": question}, version="v2"):
+                kind = event["event"]
+                data = event.get("data", {})
+
+                if kind == "on_tool_start":
+                    tool_input = data.get("input")
+                    if isinstance(tool_input, dict) and len(tool_input) == 1:
+                        tool_input = next(iter(tool_input.values()))
+                    yield {"type": "tool_start", "tool": event["name"], "input": tool_input}
+                elif kind == "on_tool_end":
+                    yield {"type": "tool_end", "tool": event["name"], "output": display_text(data.get("output"))}
+                elif kind == "on_chat_model_stream":
+                    text = data["chunk"].content
+                    if isinstance(text, str) and text:
+                        turn_text.setdefault(event["run_id"], []).append(text)
+                elif kind == "on_chat_model_end":
+                    texts = turn_text.pop(event["run_id"], [])
+                    if not getattr(data.get("output"), "tool_calls", None):
+                        for text in texts:
+                            yield {"type": "token", "text": text}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    output = data.get("output")
+                    if isinstance(output, dict) and "output" in output:
+                        yield {"type": "final", "text": output["output"], "complete": output.get("complete", False)}
+
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop():
+    """Event loop on a daemon thread, shared by every synchronous caller."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="mathmind-agent-loop", daemon=True).start()
+            _background_loop = loop
+    return _background_loop
+
+
+def stream_events(question: str, mode: str = None, session_id: str = None):
+    """
+    Synchronous wrapper around astream_events for callers without an event loop (e.g. Streamlit).
+
+    The agent runs on a long-lived background loop (so the async HTTP
+    connection pool stays warm between questions); events are handed over
+    through a queue as soon as they are produced. A consumer that stops
+    iterating early cancels the run.
+    """
+    events = queue.Queue()
+    finished = object()
 
-# Load tools and prompt
-tools = get_enhanced_math_tools()   # ⬅ must return a list of LangChain tools
-prompt = enhanced_prompt            # ⬅ must be a ChatPromptTemplate
+    async def pump():
+        try:
+            async for event in astream_events(question, mode, session_id):
+                events.put(event)
+        except Exception as e:
+            events.put(e)
+        finally:
+            events.put(finished)
 
-# Create agent + executor
-agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=prompt)
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    run = asyncio.run_coroutine_threadsafe(pump(), _get_background_loop())
+    try:
+        while (item := events.get()) is not finished:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # No-op once the run has finished; otherwise nobody is left to read its events
+        run.cancel()
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration (overridable through the environment)
+ANSWER_CACHE_ENABLED = os.getenv("MATHMIND_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_PATH = os.getenv("MATHMIND_ANSWER_CACHE_PATH", ".mathmind_answers.sqlite3")
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("MATHMIND_ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("MATHMIND_ANSWER_CACHE_MAX_ENTRIES", "10000"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("MATHMIND_ANSWER_CACHE_SIMILARITY", "0.7"))
+
+# Words that never change the answer to a question
+_FILLER_WORDS = {
+    'a', 'an', 'the', 'please', 'what', 'whats', 'is', 'are', 'of', 'me', 'can', 'could', 'you',
+    'calculate', 'compute', 'evaluate', 'find', 'solve', 'determine', 'work', 'out', 'tell',
+    'how', 'much', 'value', 'answer',
+}
+
+_TOKEN_PATTERN = re.compile(r'\d+(?:\.\d+)?|[a-z]+|[^\sa-z\d]')
+_THOUSANDS_SEPARATOR = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+_SYMBOLS = str.maketrans({'×': '*', '÷': '/', '−': '-', '’': "'"})
+
+_MINHASH_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x6D617468)
+_MINHASH_PARAMS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                   for _ in range(_MINHASH_PERMUTATIONS)]
+
+
+def _canonical_number(token):
+    value = float(token)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def canonicalize_question(question: str):
+    """
+    Reduce a question to comparable tokens.
+
+    Args:
+        question (str): Raw user question
+
+    Returns:
+        tuple: (tokens, anchor) where tokens drop filler words and normalize
+        numbers, and anchor is the ordered sequence of numbers and operators
+        followed by every other word, sorted, that a near-duplicate must match
+        exactly (any word may change the answer: "fencing" vs "tiling")
+    """
+    text = question.lower().translate(_SYMBOLS).replace("what's", "what is")
+    text = _THOUSANDS_SEPARATOR.sub('', text)
+
+    tokens = []
+    anchor = []
+    words = set()
+    for token in _TOKEN_PATTERN.findall(text):
+        if token[0].isdigit():
+            token = _canonical_number(token)
+            anchor.append(token)
+        elif token.isalpha():
+            if token in _FILLER_WORDS:
+                continue
+            words.add(token)
+        elif token in '?.!,;:\'"':
+            continue
+        else:
+            anchor.append(token)
+        tokens.append(token)
+
+    return tokens, ' '.join(anchor + sorted(words))
+
+
+def _shingles(tokens, size=2):
+    if len(tokens) < size:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash_signature(tokens) -> array:
+    """64-value MinHash signature over word 2-shingles."""
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+              for shingle in _shingles(tokens)]
+    return array('Q', (min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _MINHASH_PARAMS))
+
+
+def estimate_similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class AnswerCache:
+    """
+    SQLite-backed question -> final answer cache with LRU/TTL eviction.
+
+    Entries are scoped by model name and prompt version, so changing either
+    never serves stale answers. Lookups try the exact canonical key first,
+    then MinHash similarity among entries with the same anchor (numbers,
+    operators and the set of content words), which catches reordered
+    phrasings without ever matching a question with a different number or word.
+    """
+
+    def __init__(self, path=ANSWER_CACHE_PATH, model="", prompt_version="",
+                 ttl_seconds=ANSWER_CACHE_TTL_SECONDS, max_entries=ANSWER_CACHE_MAX_ENTRIES,
+                 similarity=ANSWER_CACHE_SIMILARITY):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                anchor TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS answers_anchor ON answers (model, prompt_version, anchor)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_lru ON answers (last_access)")
+        self._conn.commit()
+
+    def _key(self, tokens):
+        raw = '\x1f'.join([self.model, self.prompt_version, ' '.join(tokens)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, question: str):
+        """
+        Look up a cached answer.
+
+        Returns:
+            str or None: The cached answer, or None on a miss
+        """
+        tokens, anchor = canonicalize_question(question)
+        key = self._key(tokens)
+        now = time.time()
+        expired_before = now - self.ttl_seconds
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, answer, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            near = False
+
+            if row is None:
+                signature = minhash_signature(tokens)
+                best = None
+                for candidate in self._conn.execute(
+                        "SELECT key, answer, created_at, signature FROM answers "
+                        "WHERE model = ? AND prompt_version = ? AND anchor = ?",
+                        (self.model, self.prompt_version, anchor)):
+                    score = estimate_similarity(signature, array('Q', candidate[3]))
+                    if score >= self.similarity and (best is None or score > best[0]):
+                        best = (score, candidate[:3])
+                if best is not None:
+                    row, near = best[1], True
+
+            if row is None or row[2] < expired_before:
+                if row is not None:
+                    self._conn.execute("DELETE FROM answers WHERE key = ?", (row[0],))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE answers SET last_access = ? WHERE key = ?", (now, row[0]))
+            self._conn.commit()
+
+        if near:
+            self.near_hits += 1
+        else:
+            self.hits += 1
+        return row[1]
+
+    def put(self, question: str, answer: str):
+        """Store an answer, evicting least recently used entries beyond max_entries."""
+        tokens, anchor = canonicalize_question(question)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(key, model, prompt_version, anchor, signature, question, answer, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(tokens), self.model, self.prompt_version, anchor,
+                 minhash_signature(tokens).tobytes(), question, answer, now, now))
+
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM answers WHERE key IN "
+                    "(SELECT key FROM answers ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete every entry older than the TTL and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def warm(self, corpus, answer_fn=None) -> int:
+        """
+        Pre-populate the cache.
+
+        Args:
+            corpus: Path to a JSONL file, or an iterable of question strings
+                or {"question": ..., "answer": ...} dicts
+            answer_fn (callable): Produces answers for entries without one
+
+        Returns:
+            int: Number of entries added
+        """
+        if isinstance(corpus, str):
+            with open(corpus, encoding='utf-8') as handle:
+                corpus = [json.loads(line) for line in handle if line.strip()]
+
+        added = 0
+        for item in corpus:
+            question, answer = (item, None) if isinstance(item, str) else (item['question'], item.get('answer'))
+            if self.get(question) is not None:
+                continue
+            if answer is None:
+                if answer_fn is None:
+                    continue
+                answer = answer_fn(question)
+            self.put(question, answer)
+            added += 1
+
+        logger.info(f"Warmed answer cache with {added} entries")
+        return added
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+        return {'hits': self.hits, 'near_hits': self.near_hits, 'misses': self.misses, 'size': size}
+
+    def close(self):
+        self._conn.close()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_answer_cache(model: str, prompt_version: str):
+    """Return the process-wide answer cache for a model/prompt pair, or None if disabled."""
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    with _caches_lock:
+        cache = _caches.get((model, prompt_version))
+        if cache is None:
+            cache = _caches[(model, prompt_version)] = AnswerCache(
+                model=model, prompt_version=prompt_version)
+        return cache
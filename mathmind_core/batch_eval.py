@@ -0,0 +1,221 @@
+import logging
+import math
+import os
+import re
+
+import numpy as np
+
+from mathmind_agent.cost_model import estimate_constant_parts, within_budget, FLOAT_MAX_DIGITS
+from mathmind_agent.expression_engine import compile_expression, ExpressionError
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on rows generated or loaded for a single batch
+MAX_BATCH_ROWS = 10_000_000
+
+# Directory that batch input/output files must live under
+BATCH_DATA_DIR = os.getenv("MATHMIND_DATA_DIR", ".")
+
+
+def _factorial(value):
+    try:
+        return math.gamma(value + 1)
+    except (ValueError, OverflowError):
+        return math.nan if value < 0 else math.inf
+
+
+# Vectorized counterparts of expression_engine.ALLOWED_FUNCTIONS
+NUMPY_NAMESPACE = {
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'asin': np.arcsin,
+    'acos': np.arccos,
+    'atan': np.arctan,
+    'log': np.log10,
+    'ln': np.log,
+    'exp': np.exp,
+    'floor': np.floor,
+    'ceil': np.ceil,
+    'factorial': np.vectorize(_factorial, otypes=[float]),
+    'pi': np.pi,
+    'e': np.e,
+    'tau': 2 * np.pi,
+}
+
+_NUMBER = r'-?\d+(?:\.\d+)?(?:e[+-]?\d+)?'
+_RANGE_PATTERN = re.compile(rf'^({_NUMBER})\s*\.\.\s*({_NUMBER})(?:\s+step\s+({_NUMBER}))?$', re.IGNORECASE)
+_CALL_PATTERN = re.compile(r'^(range|linspace)\s*\((.*)\)$', re.IGNORECASE)
+
+
+def resolve_data_path(path: str) -> str:
+    """Resolve a user-supplied file path, refusing paths outside BATCH_DATA_DIR."""
+    root = os.path.realpath(BATCH_DATA_DIR)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root:
+        raise ValueError(f"Path '{path}' is outside the data directory")
+    return full_path
+
+
+def _check_rows(count):
+    if count > MAX_BATCH_ROWS:
+        raise ValueError(f"Batch of {count:,} rows exceeds the limit of {MAX_BATCH_ROWS:,}")
+
+
+def parse_values(spec: str) -> np.ndarray:
+    """
+    Parse a column specification into a float array.
+
+    Supported formats:
+        - "1, 2, 3" (explicit list)
+        - "1..1000000" or "0..1 step 0.25" (inclusive range)
+        - "range(0, 100, 5)" (Python-style, stop excluded)
+        - "linspace(0, 1, 101)" (evenly spaced)
+        - "5" (scalar, broadcast against the other columns)
+    """
+    spec = spec.strip()
+
+    range_match = _RANGE_PATTERN.match(spec)
+    if range_match:
+        start, stop = float(range_match.group(1)), float(range_match.group(2))
+        step = float(range_match.group(3)) if range_match.group(3) else 1.0
+        if step <= 0:
+            raise ValueError("Range step must be positive")
+        _check_rows(int((stop - start) / step) + 1)
+        # Nudge the stop so the inclusive upper bound survives float rounding
+        return np.arange(start, stop + step / 2, step, dtype=float)
+
+    call_match = _CALL_PATTERN.match(spec)
+    if call_match:
+        args = [float(arg) for arg in call_match.group(2).split(',') if arg.strip()]
+        if call_match.group(1).lower() == 'range':
+            if not 1 <= len(args) <= 3:
+                raise ValueError("range() takes 1 to 3 arguments")
+            start, stop, step = (0.0, args[0], 1.0) if len(args) == 1 else (args + [1.0])[:3]
+            if step == 0:
+                raise ValueError("Range step must not be zero")
+            _check_rows(int(abs((stop - start) / step)))
+            return np.arange(start, stop, step, dtype=float)
+        if len(args) != 3:
+            raise ValueError("linspace() takes start, stop and count")
+        _check_rows(int(args[2]))
+        return np.linspace(args[0], args[1], int(args[2]))
+
+    values = np.array([float(part) for part in re.split(r'[,\s]+', spec) if part], dtype=float)
+    if values.size == 0:
+        raise ValueError("No values given")
+    _check_rows(values.size)
+    return values[0] if values.size == 1 else values
+
+
+def load_columns(path: str) -> dict:
+    """
+    Load named columns from a CSV (header row required), .npy (structured array) or .npz file.
+
+    Returns:
+        dict: Column name -> float array
+    """
+    full_path = resolve_data_path(path)
+    extension = os.path.splitext(full_path)[1].lower()
+
+    if extension == '.csv':
+        table = np.genfromtxt(full_path, delimiter=',', names=True, dtype=float, max_rows=MAX_BATCH_ROWS + 1)
+        table = np.atleast_1d(table)
+        columns = {name.lower(): table[name] for name in table.dtype.names}
+    elif extension == '.npz':
+        with np.load(full_path, allow_pickle=False) as archive:
+            columns = {name.lower(): np.asarray(archive[name], dtype=float) for name in archive.files}
+    elif extension == '.npy':
+        table = np.load(full_path, allow_pickle=False, mmap_mode='r')
+        if table.dtype.names is None:
+            raise ValueError("A .npy input must be a structured array with named fields")
+        columns = {name.lower(): np.asarray(table[name], dtype=float) for name in table.dtype.names}
+    else:
+        raise ValueError(f"Unsupported file type '{extension}' (use .csv, .npy or .npz)")
+
+    for values in columns.values():
+        _check_rows(np.size(values))
+    return columns
+
+
+def evaluate_batch(expression: str, columns: dict) -> np.ndarray:
+    """
+    Evaluate an expression over columns of variable values in one vectorized pass.
+
+    Args:
+        expression (str): Expression with free variables, e.g. "sqrt(a^2 + b^2)"
+        columns (dict): Variable name -> array-like (or scalar) of values
+
+    Returns:
+        np.ndarray: One result per row (NaN where the operation is undefined)
+
+    Raises:
+        ExpressionError: If the expression is invalid, a variable has no values or a
+            literal part is too large for floating point ("9^9^9 + x")
+        ValueError: If the columns cannot be broadcast together
+    """
+    compiled = compile_expression(expression)
+
+    # Literal-only parts are evaluated as Python numbers before they meet the float columns
+    if not within_budget(estimate_constant_parts(compiled), FLOAT_MAX_DIGITS):
+        raise ExpressionError("A constant part of the expression is too large for floating point")
+
+    missing = compiled.names.difference(columns)
+    if missing:
+        raise ExpressionError(f"No values given for: {', '.join(sorted(missing))}")
+
+    bindings = {name: np.asarray(columns[name], dtype=float) for name in compiled.names}
+    shape = np.broadcast_shapes(*(values.shape for values in bindings.values())) if bindings else ()
+
+    with np.errstate(all='ignore'):
+        result = compiled(NUMPY_NAMESPACE, **bindings)
+
+    return np.broadcast_to(np.asarray(result, dtype=float), shape)
+
+
+def summarize(values: np.ndarray) -> dict:
+    """Summary statistics for a batch result, ignoring undefined (NaN/inf) rows."""
+    values = np.ravel(values)
+    finite = values[np.isfinite(values)]
+    summary = {'count': int(values.size), 'undefined': int(values.size - finite.size)}
+    if finite.size:
+        summary.update(
+            min=float(finite.min()),
+            max=float(finite.max()),
+            mean=float(finite.mean()),
+            std=float(finite.std()),
+            sum=float(np.sum(finite, dtype=np.float64)),
+        )
+    return summary
+
+
+def save_results(path: str, columns: dict, result: np.ndarray, result_name: str = 'result') -> str:
+    """
+    Write the input columns plus the result column to a .csv, .npy or .npz file.
+
+    Returns:
+        str: The resolved output path
+    """
+    full_path = resolve_data_path(path)
+    extension = os.path.splitext(full_path)[1].lower()
+    rows = np.shape(result)[0] if np.ndim(result) else 1
+    table = {name: np.broadcast_to(np.asarray(values, dtype=float), (rows,)) for name, values in columns.items()}
+    table[result_name] = np.broadcast_to(result, (rows,))
+
+    if extension == '.npz':
+        np.savez(full_path, **table)
+    elif extension == '.npy':
+        structured = np.empty(rows, dtype=[(name, float) for name in table])
+        for name, values in table.items():
+            structured[name] = values
+        np.save(full_path, structured)
+    elif extension == '.csv':
+        np.savetxt(full_path, np.column_stack(list(table.values())), delimiter=',',
+                   header=','.join(table), comments='', fmt='%.12g')
+    else:
+        raise ValueError(f"Unsupported file type '{extension}' (use .csv, .npy or .npz)")
+
+    logger.info(f"Saved {rows:,} batch results to {full_path}")
+    return full_path
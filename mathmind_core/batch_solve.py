@@ -0,0 +1,222 @@
+"""
+Headless batch solving of problem sets.
+
+Reads problems from a JSONL or CSV file, answers them with bounded
+concurrency (fast path, then answer cache, then the agent) and appends one
+JSON line per problem to the output file. The output doubles as the
+checkpoint: rerunning the same command skips every problem that already has
+an answer, so an interrupted run resumes where it stopped.
+
+Usage:
+    python -m mathmind_agent.batch_solve problems.jsonl answers.jsonl [--concurrency 8] [--order input]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("MATHMIND_BATCH_CONCURRENCY", "8"))
+
+
+def load_problems(path: str, question_field: str = "question", id_field: str = "id"):
+    """
+    Read problems from a .jsonl or .csv file.
+
+    Args:
+        path (str): Input file; CSV files need a header row
+        question_field (str): Field holding the question text
+        id_field (str): Field holding a stable problem id (defaults to the row number)
+
+    Yields:
+        dict: {"id": ..., "question": ..., plus any other input fields}
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8", newline="") as handle:
+        if extension == ".csv":
+            rows = csv.DictReader(handle)
+        elif extension in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in handle if line.strip())
+        else:
+            raise ValueError(f"Unsupported problem file '{extension}' (use .jsonl or .csv)")
+
+        for number, row in enumerate(rows, start=1):
+            if question_field not in row:
+                raise ValueError(f"Row {number} has no '{question_field}' field")
+            problem = dict(row)
+            problem["id"] = str(row.get(id_field) or number)
+            problem["question"] = row[question_field]
+            yield problem
+
+
+def load_finished(path: str) -> set:
+    """Ids that already have an answer in an existing output file (later lines win)."""
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            if "answer" in record:
+                finished.add(record["id"])
+            else:
+                finished.discard(record["id"])
+    return finished
+
+
+async def solve_one(question: str, answer_cache=None, mode: str = None) -> dict:
+    """
+    Answer one question the same way the chat UI does.
+
+    Returns:
+        dict: {"answer": ..., "source": "fast_path" | "cache" | "agent" | "plan"},
+        plus "queue_wait_ms" for agent and plan answers
+    """
+    from mathmind_agent.fast_path import try_fast_answer
+
+    answer = await asyncio.to_thread(try_fast_answer, question)
+    if answer is not None:
+        return {"answer": answer, "source": "fast_path"}
+
+    if answer_cache is not None:
+        answer = await asyncio.to_thread(answer_cache.get, question)
+        if answer is not None:
+            return {"answer": answer, "source": "cache"}
+
+    from mathmind_agent.agent_executor import ainvoke
+
+    result = await ainvoke(question, priority="batch", mode=mode)
+    # Answers cut short by a limit or built on a failed tool call are not reused
+    if answer_cache is not None and result["complete"]:
+        await asyncio.to_thread(answer_cache.put, question, result["output"])
+    return {"answer": result["output"], "source": result["mode"], "queue_wait_ms": result["queue_wait_ms"]}
+
+
+async def run_batch(problems, output_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+                    order: str = "input", answer_cache=None, mode: str = None) -> dict:
+    """
+    Solve problems concurrently and append results to output_path.
+
+    Args:
+        problems: Iterable of problem dicts from load_problems
+        output_path (str): JSONL file to append results to; problems already
+            answered in it are skipped
+        concurrency (int): Problems in flight at once
+        order (str): "input" writes results in input order, "completion" as they finish
+        answer_cache (AnswerCache): Optional cache consulted before the agent
+        mode (str): Agent execution mode, "agent" or "plan" (default MATHMIND_EXECUTION_MODE)
+
+    Returns:
+        dict: Counts of solved, failed and skipped problems plus elapsed seconds
+    """
+    if order not in ("input", "completion"):
+        raise ValueError("order must be 'input' or 'completion'")
+
+    finished = load_finished(output_path)
+    stats = {"solved": 0, "failed": 0, "skipped": 0}
+    started = time.monotonic()
+
+    pending = iter(problems)
+    pending_lock = asyncio.Lock()
+    sequence = 0
+    next_to_write = 0
+    held = {}
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        def write(record):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+        def emit(index, record):
+            nonlocal next_to_write
+            if order == "completion":
+                write(record)
+                return
+            # Hold early finishers until everything before them is written
+            held[index] = record
+            while next_to_write in held:
+                record = held.pop(next_to_write)
+                if record is not None:
+                    write(record)
+                next_to_write += 1
+
+        async def worker():
+            nonlocal sequence
+            while True:
+                async with pending_lock:
+                    problem = next(pending, None)
+                    if problem is None:
+                        return
+                    index, sequence = sequence, sequence + 1
+
+                if problem["id"] in finished:
+                    stats["skipped"] += 1
+                    emit(index, None)
+                    continue
+
+                record = dict(problem)
+                problem_started = time.monotonic()
+                try:
+                    record.update(await solve_one(problem["question"], answer_cache, mode))
+                    stats["solved"] += 1
+                except Exception as e:
+                    logger.error(f"Problem {problem['id']} failed: {e}")
+                    record["error"] = f"{type(e).__name__}: {e}"
+                    stats["failed"] += 1
+                record["elapsed_ms"] = round((time.monotonic() - problem_started) * 1000, 1)
+                emit(index, record)
+
+                done = stats["solved"] + stats["failed"]
+                if done % 100 == 0:
+                    logger.info(f"Batch progress: {done} answered, {stats['skipped']} skipped")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    stats["elapsed_seconds"] = round(time.monotonic() - started, 2)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Problems as .jsonl or .csv")
+    parser.add_argument("output", help="Answers as .jsonl (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--order", choices=("input", "completion"), default="input")
+    parser.add_argument("--question-field", default="question")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--no-cache", action="store_true", help="Skip the persistent answer cache")
+    parser.add_argument("--mode", choices=("agent", "plan"), default=None,
+                        help="Tool-calling loop, or one planning call per problem (default MATHMIND_EXECUTION_MODE)")
+    args = parser.parse_args(argv)
+
+    answer_cache = None
+    if not args.no_cache:
+        from mathmind_agent.agent_executor import get_model_name
+        from mathmind_agent.answer_cache import get_answer_cache
+        from mathmind_agent.prompts import PROMPT_VERSION
+        answer_cache = get_answer_cache(get_model_name(), PROMPT_VERSION)
+
+    problems = load_problems(args.input, args.question_field, args.id_field)
+    stats = asyncio.run(run_batch(problems, args.output, args.concurrency, args.order, answer_cache, args.mode))
+
+    from mathmind_agent.tool_memo import get_tool_memo
+    from mathmind_agent.kernels import TOOLS_VERSION
+    tool_memo = get_tool_memo(TOOLS_VERSION)
+    if tool_memo is not None:
+        stats["tool_memo"] = tool_memo.stats()
+    print(json.dumps(stats))
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
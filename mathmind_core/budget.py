@@ -0,0 +1,85 @@
+import contextvars
+import json
+import os
+import threading
+import time
+
+# Per-request limits on one agent run (0 disables the token and repeat limits)
+MAX_ITERATIONS = int(os.getenv("MATHMIND_MAX_ITERATIONS", "8"))
+RUN_DEADLINE_SECONDS = float(os.getenv("MATHMIND_RUN_DEADLINE", "60"))
+RUN_TOKEN_BUDGET = int(os.getenv("MATHMIND_RUN_TOKEN_BUDGET", "12000"))
+# A run that repeats one identical tool call this many times is treated as stuck
+MAX_REPEATED_CALLS = int(os.getenv("MATHMIND_MAX_REPEATED_CALLS", "2"))
+
+# Budget of the agent run in progress in this context (set at the run's first step)
+current_budget = contextvars.ContextVar("mathmind_run_budget", default=None)
+
+
+def call_key(tool_name: str, tool_input) -> str:
+    """Identity of a tool call: same tool, same input after whitespace normalization."""
+    if isinstance(tool_input, str):
+        normalized = ' '.join(tool_input.split())
+    else:
+        normalized = json.dumps(tool_input, sort_keys=True, default=str)
+    return f"{tool_name}\x1f{normalized}"
+
+
+class RunBudget:
+    """
+    Token, repetition and timing bookkeeping for one agent run.
+
+    Iteration and wall-clock limits are enforced by AgentExecutor itself
+    (max_iterations / max_execution_time); this tracks what it cannot see:
+    tokens reported by the LLM and tool calls the model keeps repeating,
+    whose earlier observations are kept so repeats can be answered from them.
+    """
+
+    def __init__(self, token_budget: int = RUN_TOKEN_BUDGET, max_repeats: int = MAX_REPEATED_CALLS):
+        self.token_budget = token_budget
+        self.max_repeats = max_repeats
+        self.started = time.monotonic()
+        self.tokens_used = 0
+        self.stop_reason = None
+        self._observations = {}
+        self._repeats = {}
+        self._lock = threading.Lock()
+
+    def add_tokens(self, tokens: int):
+        with self._lock:
+            self.tokens_used += tokens
+
+    def cached_observation(self, tool_name: str, tool_input):
+        """
+        Observation of an identical earlier call in this run, counting the repeat.
+
+        Returns:
+            tuple: (True, observation) for a repeat, (False, None) otherwise
+        """
+        key = call_key(tool_name, tool_input)
+        with self._lock:
+            if key not in self._observations:
+                return False, None
+            self._repeats[key] = self._repeats.get(key, 0) + 1
+            return True, self._observations[key]
+
+    def record(self, tool_name: str, tool_input, observation):
+        with self._lock:
+            self._observations.setdefault(call_key(tool_name, tool_input), observation)
+
+    def exhausted(self):
+        """
+        Reason the run must stop for a limit tracked here, or None.
+
+        Returns:
+            str or None: "token budget" or "repeated tool calls"
+        """
+        with self._lock:
+            if self.token_budget and self.tokens_used >= self.token_budget:
+                return "token budget"
+            if self.max_repeats and any(count >= self.max_repeats for count in self._repeats.values()):
+                return "repeated tool calls"
+        return None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
@@ -0,0 +1,282 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+
+from mathmind_agent.budget import RunBudget, current_budget
+from mathmind_agent.tool_results import direct_answer, display_text, is_error
+from mathmind_agent.tool_selection import direct_answer_tools
+from mathmind_agent.workspace import current_workspace
+
+logger = logging.getLogger(__name__)
+
+# Threads running the tool calls of one LLM turn side by side (sync runs)
+TOOL_WORKERS = int(os.getenv("MATHMIND_TOOL_WORKERS", "8"))
+
+# Seconds a single tool call may take before the agent gets a timeout observation
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("MATHMIND_TOOL_TIMEOUT", "10"))
+TOOL_TIMEOUTS = {
+    'evaluate_expression_batch': 60.0,
+}
+
+# Tools whose lone result may end the run at the step being processed: in the first
+# turn, those that answer the question outright (set per run context)
+_direct_tools = contextvars.ContextVar("mathmind_direct_tools", default=frozenset())
+
+_tool_pool = None
+_tool_pool_lock = threading.Lock()
+
+
+def _repeat_input(tool_input):
+    """
+    Input a tool call is compared on for repeats: workspace names replaced by their current values.
+
+    "x*3" after x is reassigned is a new call, not a repeat of the earlier one.
+    Taken before the call runs, so an assignment is keyed on the values it read.
+    """
+    workspace = current_workspace.get()
+    if workspace is None or not len(workspace):
+        return tool_input
+    if isinstance(tool_input, str):
+        return workspace.resolve(tool_input)[0]
+    if isinstance(tool_input, dict):
+        return {key: workspace.resolve(value)[0] if isinstance(value, str) else value
+                for key, value in tool_input.items()}
+    return tool_input
+
+
+def _get_tool_pool():
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="mathmind-tool")
+    return _tool_pool
+
+
+def tool_timeout(tool_name: str) -> float:
+    """Time limit for one call of the given tool."""
+    return TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+
+
+def _timeout_step(agent_action):
+    timeout = tool_timeout(agent_action.tool)
+    logger.warning(f"Tool {agent_action.tool} timed out after {timeout:g}s")
+    return AgentStep(action=agent_action,
+                     observation=f"Tool Error: {agent_action.tool} did not finish within {timeout:g} seconds.\n"
+                                 f"Tip: Simplify the input or split it into smaller calculations.")
+
+
+def _turn_tokens(agent_action) -> int:
+    """Tokens the LLM reported for the turn that produced this action."""
+    tokens = 0
+    for message in getattr(agent_action, "message_log", ()):
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            tokens += usage.get("total_tokens", 0)
+    return tokens
+
+
+def _first_turn_direct_tools(inputs, intermediate_steps) -> frozenset:
+    question = inputs.get("input")
+    if intermediate_steps or not isinstance(question, str):
+        return frozenset()
+    return direct_answer_tools(question)
+
+
+def _best_answer(intermediate_steps, reason: str) -> str:
+    """Final answer for a run stopped by a budget: the last successful tool result, if any."""
+    for agent_action, observation in reversed(intermediate_steps):
+        if not is_error(observation):
+            return f"{display_text(observation).strip()}\n\n" \
+                   f"_Stopped early ({reason}); this is the last result calculated._"
+    return f"Sorry, I couldn't finish this problem within the {reason}. " \
+           f"Try rephrasing it or splitting it into smaller questions."
+
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs all tool calls from one LLM turn concurrently.
+
+    Sync runs dispatch the calls to a thread pool, async runs gather them;
+    either way observations are returned in the order the LLM issued the
+    calls, and a call exceeding its per-tool timeout becomes an error
+    observation instead of stalling the whole turn.
+
+    When keyword matching shows the question is a single calculation
+    (tool_selection.direct_answer_tools), the first turn makes one call to
+    a tool that answers it, and the result is definitive
+    (tool_results.direct_answer), the result is returned as the answer
+    without a final LLM call.
+
+    Each run also gets a budget.RunBudget: on top of max_iterations and
+    max_execution_time it stops at a token ceiling or when the model keeps
+    repeating the same tool call (repeats are answered from the earlier
+    observation), and a stopped run ends with the best result so far
+    rather than LangChain's "Agent stopped" message.
+
+    The output carries "complete": False when a limit stopped the run or a
+    tool call failed, so callers know not to cache the answer.
+    """
+
+    def _should_continue(self, iterations, time_elapsed):
+        budget = current_budget.get()
+        if iterations == 0:
+            # Both _call and the streaming iterator check before their first step
+            budget = RunBudget()
+            current_budget.set(budget)
+        if budget is None:
+            return super()._should_continue(iterations, time_elapsed)
+        if budget.stop_reason is not None:
+            return False
+
+        if self.max_iterations is not None and iterations >= self.max_iterations:
+            budget.stop_reason = "iteration limit"
+        elif self.max_execution_time is not None and time_elapsed >= self.max_execution_time:
+            budget.stop_reason = "time limit"
+        else:
+            budget.stop_reason = budget.exhausted()
+
+        if budget.stop_reason is not None:
+            logger.warning(f"Agent run stopped: {budget.stop_reason} "
+                           f"({iterations} iterations, {time_elapsed:.1f}s, {budget.tokens_used} tokens)")
+        return budget.stop_reason is None
+
+    def _stopped_output(self, output, intermediate_steps):
+        budget = current_budget.get()
+        if budget is None or budget.stop_reason is None:
+            return output
+        return_value_key = self.agent.return_values[0] if self.agent.return_values else "output"
+        return AgentFinish({return_value_key: _best_answer(intermediate_steps, budget.stop_reason)},
+                           output.log)
+
+    def _finished(self, final_output, intermediate_steps):
+        # Only a run no limit stopped and no tool call failed has an answer worth reusing
+        budget = current_budget.get()
+        stopped = budget is not None and budget.stop_reason is not None
+        final_output["complete"] = not stopped and not any(is_error(observation)
+                                                           for _, observation in intermediate_steps)
+        return final_output
+
+    def _return(self, output, intermediate_steps, run_manager=None):
+        final_output = super()._return(self._stopped_output(output, intermediate_steps), intermediate_steps,
+                                       run_manager)
+        return self._finished(final_output, intermediate_steps)
+
+    async def _areturn(self, output, intermediate_steps, run_manager=None):
+        final_output = await super()._areturn(self._stopped_output(output, intermediate_steps), intermediate_steps,
+                                              run_manager)
+        return self._finished(final_output, intermediate_steps)
+
+    def _get_tool_return(self, next_step_output):
+        # Only called for turns with exactly one tool call
+        tool_return = super()._get_tool_return(next_step_output)
+        agent_action, observation = next_step_output
+        if tool_return is not None or agent_action.tool not in _direct_tools.get():
+            return tool_return
+
+        answer = direct_answer(agent_action.tool, observation)
+        if answer is None:
+            return None
+        logger.info(f"Returning {agent_action.tool} result directly")
+        return_value_key = self.agent.return_values[0] if self.agent.return_values else "output"
+        return AgentFinish({return_value_key: answer}, "")
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        _direct_tools.set(_first_turn_direct_tools(inputs, intermediate_steps))
+        budget = current_budget.get()
+        # The base class yields every action before performing any, and
+        # _perform_agent_action below returns futures, so all calls of the
+        # turn are in flight before the first result is awaited
+        pending = []
+        counted = False
+        for item in super()._iter_next_step(name_to_tool_map, color_mapping, inputs,
+                                            intermediate_steps, run_manager):
+            if isinstance(item, Future):
+                pending.append(item)
+                continue
+            if isinstance(item, AgentAction) and budget is not None and not counted:
+                budget.add_tokens(_turn_tokens(item))
+                counted = True
+            yield item
+
+        for future in pending:
+            try:
+                yield future.result(timeout=max(0.0, future.deadline - time.monotonic()))
+            except FutureTimeout:
+                step = _timeout_step(future.agent_action)
+                if budget is not None:
+                    budget.record(step.action.tool, future.repeat_input, step.observation)
+                yield step
+
+    async def _aiter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps,
+                               run_manager=None):
+        _direct_tools.set(_first_turn_direct_tools(inputs, intermediate_steps))
+        budget = current_budget.get()
+        counted = False
+        try:
+            async for item in super()._aiter_next_step(name_to_tool_map, color_mapping, inputs,
+                                                       intermediate_steps, run_manager):
+                if isinstance(item, AgentAction) and budget is not None and not counted:
+                    budget.add_tokens(_turn_tokens(item))
+                    counted = True
+                yield item
+        except asyncio.CancelledError:
+            # Async runs enforce max_execution_time by cancelling the step in progress;
+            # the base class then ends the run through _areturn, which needs the reason
+            if budget is not None and budget.stop_reason is None and self.max_execution_time is not None:
+                budget.stop_reason = "time limit"
+                logger.warning(f"Agent run stopped: time limit ({budget.elapsed:.1f}s, {budget.tokens_used} tokens)")
+            raise
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        budget = current_budget.get()
+        repeat_input = _repeat_input(agent_action.tool_input)
+        future = Future()
+        if budget is not None:
+            repeated, observation = budget.cached_observation(agent_action.tool, repeat_input)
+            if repeated:
+                logger.info(f"Repeated call to {agent_action.tool} answered from this run's earlier result")
+                future.set_result(AgentStep(action=agent_action, observation=observation))
+
+        if not future.done():
+            perform = super()._perform_agent_action
+            context = contextvars.copy_context()
+
+            def run():
+                step = context.run(perform, name_to_tool_map, color_mapping, agent_action, run_manager)
+                if budget is not None:
+                    budget.record(agent_action.tool, repeat_input, step.observation)
+                return step
+
+            future = _get_tool_pool().submit(run)
+
+        future.agent_action = agent_action
+        future.repeat_input = repeat_input
+        # Each call's limit counts from its own submission, not from when its turn to be collected comes
+        future.deadline = time.monotonic() + tool_timeout(agent_action.tool)
+        return future
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        budget = current_budget.get()
+        repeat_input = _repeat_input(agent_action.tool_input)
+        if budget is not None:
+            repeated, observation = budget.cached_observation(agent_action.tool, repeat_input)
+            if repeated:
+                logger.info(f"Repeated call to {agent_action.tool} answered from this run's earlier result")
+                return AgentStep(action=agent_action, observation=observation)
+
+        try:
+            step = await asyncio.wait_for(
+                super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager),
+                tool_timeout(agent_action.tool))
+        except asyncio.TimeoutError:
+            step = _timeout_step(agent_action)
+        if budget is not None:
+            budget.record(agent_action.tool, repeat_input, step.observation)
+        return step
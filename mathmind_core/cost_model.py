@@ -0,0 +1,425 @@
+import ast
+import logging
+import math
+import operator
+import os
+import sys
+from collections import namedtuple
+
+from mathmind_agent.expression_engine import ALLOWED_CONSTANTS, ALLOWED_FUNCTIONS
+
+logger = logging.getLogger(__name__)
+
+# Largest magnitude (in decimal digits) any intermediate value may reach before
+# the expression is approximated instead of evaluated exactly
+MAX_RESULT_DIGITS = int(os.getenv("MATHMIND_MAX_RESULT_DIGITS", "10000"))
+
+# Magnitude limit for float-only arithmetic (beyond it floats overflow)
+FLOAT_MAX_DIGITS = sys.float_info.max_10_exp
+
+# Values below this magnitude are tracked as plain floats for exactness checks
+_EXACT_LOG10 = 15
+
+# Operations on known values up to this many digits are worked out exactly while
+# estimating ("factorial(99999)", "10^20 - 10^20"); at this size that is cheap
+_FOLD_DIGITS = 1000
+_FOLD_LIMIT = 10 ** _FOLD_DIGITS
+
+_LOG10_E = math.log10(math.e)
+
+CostEstimate = namedtuple('CostEstimate', ['sign', 'log10', 'max_digits', 'sized'], defaults=[True])
+CostEstimate.__doc__ = """
+Static estimate of an expression's result.
+
+Attributes:
+    sign (int): -1, 0 or 1 (NaN when it cannot be determined)
+    log10 (float): log10 of the absolute result (-inf for zero, NaN when unknown)
+    max_digits (float): Largest magnitude, in digits, of any intermediate value
+    sized (bool): False when some value could not be bounded (an unknown
+        computed from another unknown), so max_digits may understate the cost
+"""
+
+_UNKNOWN = (math.nan, math.nan)
+_ZERO = (0, -math.inf)
+
+# Folded value of a subexpression whose evaluation raises ("sqrt(-4)", "1/0")
+_FAILS = object()
+
+_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _from_float(value):
+    if value != value:
+        return _UNKNOWN
+    if value == 0:
+        return _ZERO
+    return (1 if value > 0 else -1, math.log10(abs(value)) if not math.isinf(value) else math.inf)
+
+
+def _from_value(value):
+    if isinstance(value, int):
+        return _ZERO if value == 0 else (1 if value > 0 else -1, math.log10(abs(value)))
+    if isinstance(value, float):
+        return _from_float(value)
+    return _UNKNOWN
+
+
+def _known(approx):
+    return approx[0] == approx[0] and approx[1] == approx[1]
+
+
+def _real(value):
+    """A folded value usable as an exact operand, or None (complex, failing or not folded)."""
+    return value if isinstance(value, (int, float)) else None
+
+
+def _small(approx, exact):
+    """Exact value when known and small, else the float from the estimate (None if large)."""
+    if exact is not None and abs(exact) <= 10 ** _EXACT_LOG10:
+        return exact
+    return _to_float(approx)
+
+
+def _to_float(approx):
+    """Exact-enough float for small magnitudes, else None."""
+    sign, log10 = approx
+    if sign == 0:
+        return 0.0
+    if not _known(approx) or log10 > _EXACT_LOG10:
+        return None
+    return sign * 10 ** log10
+
+
+def _add(a, b):
+    small_a, small_b = _to_float(a), _to_float(b)
+    if small_a is not None and small_b is not None:
+        return _from_float(small_a + small_b)
+    if a[0] == 0:
+        return b
+    if b[0] == 0:
+        return a
+    if not (_known(a) and _known(b)):
+        return _UNKNOWN
+
+    (high_sign, high), (low_sign, low) = (a, b) if a[1] >= b[1] else (b, a)
+    gap = low - high
+    if high_sign == low_sign:
+        return (high_sign, high + math.log10(1 + 10 ** gap))
+    if gap > -_EXACT_LOG10:
+        # Huge values of opposite sign and similar size may cancel exactly
+        return _UNKNOWN
+    return (high_sign, high)
+
+
+def _power(base, exponent, exact_exponent=None):
+    exponent_value = _small(exponent, exact_exponent)
+    base_sign, base_log = base
+
+    if base_sign == 0:
+        # 0**0 is 1; only a negative exponent fails (ZeroDivisionError)
+        if exponent[0] == 0:
+            return (1, 0.0)
+        return _ZERO if exponent[0] == 1 else _UNKNOWN
+    if not _known(base):
+        return _UNKNOWN
+
+    if exponent_value is None:
+        # Astronomically large exponent: only the magnitude direction matters
+        if not _known(exponent):
+            return _UNKNOWN
+        if base_sign < 0:
+            # A negative base keeps a known sign only under an exact whole exponent
+            if exact_exponent is None or not float(exact_exponent).is_integer():
+                return _UNKNOWN
+            base_sign = -1 if int(exact_exponent) % 2 else 1
+        if base_log == 0:
+            return (base_sign, 0.0)
+        growing = (base_log > 0) == (exponent[0] > 0)
+        return (base_sign, math.inf) if growing else _ZERO
+
+    if base_sign < 0:
+        if not float(exponent_value).is_integer():
+            return _UNKNOWN
+        sign = -1 if int(exponent_value) % 2 else 1
+    else:
+        sign = 1
+
+    return (sign, exponent_value * base_log if base_log else 0.0)
+
+
+def _function(name, arg, exact=None):
+    sign, log10 = arg
+    small = _small(arg, exact)
+
+    if name == 'abs':
+        return (abs(sign), log10)
+    if name == 'sqrt':
+        return (1, log10 / 2) if sign == 1 else (_ZERO if sign == 0 else _UNKNOWN)
+    if name in ('log', 'ln'):
+        if sign != 1:
+            return _UNKNOWN
+        value = log10 if name == 'log' else log10 / _LOG10_E
+        return _from_float(value)
+    if name == 'exp':
+        if small is None:
+            return (1, math.inf) if sign == 1 else _ZERO
+        return (1, small * _LOG10_E)
+    if name == 'factorial':
+        if small is None:
+            return (1, math.inf) if sign == 1 else _UNKNOWN
+        if small < 0 or not float(small).is_integer():
+            return _UNKNOWN
+        return (1, math.lgamma(small + 1) * _LOG10_E)
+    if name in ('floor', 'ceil') and small is None:
+        return arg
+    if small is None:
+        return _UNKNOWN
+
+    try:
+        return _from_float(float(ALLOWED_FUNCTIONS[name](small)))
+    except (ValueError, OverflowError, ZeroDivisionError):
+        return _UNKNOWN
+
+
+def _operands(node):
+    if isinstance(node, ast.UnaryOp):
+        return [node.operand]
+    if isinstance(node, ast.BinOp):
+        return [node.left, node.right]
+    if isinstance(node, ast.Call):
+        return node.args
+    return None
+
+
+def _fold(node, operands):
+    """
+    Value of node over folded operand values.
+
+    Returns:
+        The number (complex included), _FAILS when evaluating it raises, or
+        None when the result is not worth keeping (non-finite or too long)
+    """
+    if any(operand is _FAILS for operand in operands):
+        return _FAILS
+    try:
+        if isinstance(node, ast.Call):
+            value = ALLOWED_FUNCTIONS[node.func.id](*operands)
+        else:
+            value = _OPERATORS[type(node.op)](*operands)
+    except (ArithmeticError, ValueError, TypeError):
+        return _FAILS
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, int) and abs(value) >= _FOLD_LIMIT:
+        return None
+    return value
+
+
+class _Estimator:
+    def __init__(self):
+        self.max_digits = -math.inf
+        self.sized = True
+        # Exact values of the subexpressions small enough to fold, by id(node)
+        self.values = {}
+        # Subexpressions neither sized nor folded
+        self.unknown = set()
+
+    def visit(self, node):
+        result = self._visit(node)
+
+        # Known small operands: work the value out instead of trusting the estimate
+        operands = _operands(node)
+        if (operands is not None and all(id(operand) in self.values for operand in operands)
+                and (not _known(result) or result[1] <= _FOLD_DIGITS)):
+            value = _fold(node, [self.values[id(operand)] for operand in operands])
+            if value is not None:
+                self.values[id(node)] = value
+                if _real(value) is not None:
+                    result = _from_value(value)
+
+        if _known(result):
+            self.max_digits = max(self.max_digits, result[1])
+        elif id(node) not in self.values:
+            # Unknown from sized operands is bounded by them (cancellation) or cheap
+            # (domain errors); unknown from an unknown operand may be any size
+            if operands and any(id(operand) in self.unknown for operand in operands):
+                self.sized = False
+            self.unknown.add(id(node))
+        return result
+
+    def _exact(self, node):
+        return _real(self.values.get(id(node)))
+
+    def _visit(self, node):
+        if isinstance(node, ast.Expression):
+            result = self.visit(node.body)
+            if id(node.body) in self.values:
+                self.values[id(node)] = self.values[id(node.body)]
+            return result
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, float) or math.isfinite(node.value):
+                if abs(node.value) < _FOLD_LIMIT:
+                    self.values[id(node)] = node.value
+            return _from_value(node.value)
+        if isinstance(node, ast.Name):
+            if node.id not in ALLOWED_CONSTANTS:
+                raise LookupError(node.id)
+            self.values[id(node)] = ALLOWED_CONSTANTS[node.id]
+            return _from_float(ALLOWED_CONSTANTS[node.id])
+        if isinstance(node, ast.UnaryOp):
+            sign, log10 = self.visit(node.operand)
+            return (-sign, log10) if isinstance(node.op, ast.USub) else (sign, log10)
+        if isinstance(node, ast.Call):
+            args = [self.visit(arg) for arg in node.args]
+            if len(args) != 1:
+                return _UNKNOWN
+            return _function(node.func.id, args[0], self._exact(node.args[0]))
+        if isinstance(node, ast.BinOp):
+            left, right = self.visit(node.left), self.visit(node.right)
+            op = node.op
+            if isinstance(op, ast.Add):
+                return _add(left, right)
+            if isinstance(op, ast.Sub):
+                return _add(left, (-right[0], right[1]))
+            if isinstance(op, ast.Mult):
+                if 0 in (left[0], right[0]):
+                    return _ZERO
+                return (left[0] * right[0], left[1] + right[1])
+            if isinstance(op, (ast.Div, ast.FloorDiv)):
+                if right[0] == 0:
+                    return _UNKNOWN
+                if isinstance(op, ast.FloorDiv) and left[1] - right[1] < _EXACT_LOG10:
+                    small_left, small_right = _to_float(left), _to_float(right)
+                    if small_left is None or small_right is None:
+                        return _UNKNOWN
+                    return _from_float(small_left // small_right)
+                return (left[0] * right[0], left[1] - right[1])
+            if isinstance(op, ast.Mod):
+                small_left, small_right = _to_float(left), _to_float(right)
+                if small_left is None or small_right is None or small_right == 0:
+                    return _UNKNOWN
+                return _from_float(small_left % small_right)
+            if isinstance(op, ast.Pow):
+                return _power(left, right, self._exact(node.right))
+        return _UNKNOWN
+
+
+def estimate_cost(compiled):
+    """
+    Estimate the magnitude of a compiled expression without evaluating it.
+
+    Every node is tracked in log space (sign, log10|value|), so exponent
+    towers like 9**9**9 or factorial(10**6) are sized without materializing
+    the big integers they describe.
+
+    Args:
+        compiled (CompiledExpression): Expression from compile_expression
+
+    Returns:
+        CostEstimate or None: None if the expression has free variables
+    """
+    if compiled.names:
+        return None
+    estimator = _Estimator()
+    try:
+        sign, log10 = estimator.visit(compiled.tree)
+    except LookupError:
+        return None
+    return CostEstimate(sign, log10, estimator.max_digits, estimator.sized)
+
+
+def _constant_parts(node, free_names):
+    """Largest subexpressions of node that use none of free_names."""
+    if not any(isinstance(child, ast.Name) and child.id in free_names for child in ast.walk(node)):
+        return [node]
+    return [part for operand in _operands(node) or [] for part in _constant_parts(operand, free_names)]
+
+
+def estimate_constant_parts(compiled):
+    """
+    Estimate the parts of an expression that are built from literals alone.
+
+    Variables bound to float columns keep every operation they take part in
+    float-sized, so only those parts can grow into big integers
+    ("10**10**8 + x"). The result holds the largest magnitude and whether
+    every part could be sized; sign and log10 are NaN.
+
+    Args:
+        compiled (CompiledExpression): Expression from compile_expression
+
+    Returns:
+        CostEstimate or None: None if the expression has no literal-only part
+    """
+    parts = _constant_parts(compiled.tree.body, compiled.names)
+    if not parts:
+        return None
+    max_digits, sized = -math.inf, True
+    for part in parts:
+        estimator = _Estimator()
+        estimator.visit(part)
+        max_digits = max(max_digits, estimator.max_digits)
+        sized = sized and estimator.sized
+    return CostEstimate(math.nan, math.nan, max_digits, sized)
+
+
+def estimate_power(base: float, exponent: float):
+    """Estimate base ** exponent for the power tool."""
+    base_approx = _from_float(base)
+    exact_exponent = exponent if float(exponent).is_integer() else None
+    sign, log10 = _power(base_approx, _from_float(exponent), exact_exponent)
+    max_digits = max(log10, base_approx[1]) if log10 == log10 else base_approx[1]
+    return CostEstimate(sign, log10, max_digits, _known((sign, log10)))
+
+
+def within_budget(estimate, max_digits=MAX_RESULT_DIGITS) -> bool:
+    """
+    True when the expression is cheap enough to evaluate exactly.
+
+    An estimate with a value it could not bound is over budget: that value may be any size.
+    """
+    return estimate is None or (estimate.sized and estimate.max_digits <= max_digits)
+
+
+def can_approximate(estimate) -> bool:
+    """True when the estimate itself is reliable enough to report."""
+    return (estimate is not None and _known((estimate.sign, estimate.log10))
+            and not math.isinf(estimate.log10))
+
+
+def format_approximation(estimate) -> str:
+    """
+    Render a log-space estimate, e.g. "≈ 4.2812 × 10^369693099" or "≈ 10^(3.7e+15)".
+    """
+    sign = "-" if estimate.sign < 0 else ""
+    log10 = estimate.log10
+    if abs(log10) < _EXACT_LOG10:
+        return f"≈ {sign}{10 ** log10:.10g}"
+    if abs(log10) < 1e10:
+        exponent = math.floor(log10)
+        mantissa = round(10 ** (log10 - exponent), 4)
+        if mantissa >= 10:
+            mantissa, exponent = mantissa / 10, exponent + 1
+        return f"≈ {sign}{mantissa:.4f} × 10^{exponent}"
+    return f"≈ {sign}10^({log10:.4g})"
+
+
+def format_scientific(value, precision=4) -> str:
+    """Scientific notation that also works for integers beyond float range."""
+    if isinstance(value, int) and abs(value) > sys.float_info.max:
+        magnitude = abs(value)
+        exponent = len(str(magnitude // 10 ** max(0, int(math.log10(magnitude)) - 20))) - 1
+        exponent += max(0, int(math.log10(magnitude)) - 20)
+        mantissa = (magnitude // 10 ** (exponent - precision)) / 10 ** precision
+        sign = "-" if value < 0 else ""
+        return f"{sign}{mantissa:.{precision}f}e+{exponent}"
+    return f"{value:.{precision}e}"
@@ -0,0 +1,213 @@
+import ast
+import logging
+import math
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of compiled expressions kept in memory
+EXPRESSION_CACHE_SIZE = 512
+
+def _factorial(value):
+    """math.factorial that also accepts integral floats such as 5.0."""
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("factorial() only accepts integral values")
+        value = int(value)
+    return math.factorial(value)
+
+
+# Whitelisted functions callable from an expression
+ALLOWED_FUNCTIONS = {
+    'sqrt': math.sqrt,
+    'abs': abs,
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'asin': math.asin,
+    'acos': math.acos,
+    'atan': math.atan,
+    'log': math.log10,   # Logarithm base 10
+    'ln': math.log,      # Natural logarithm
+    'exp': math.exp,
+    'floor': math.floor,
+    'ceil': math.ceil,
+    'factorial': _factorial,
+}
+
+# Whitelisted named constants
+ALLOWED_CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+}
+
+_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+# Single-pass rewrite of common mathematical notation
+_NOTATION = {
+    '^': '**',
+    'π': 'pi',
+    '×': '*',
+    '÷': '/',
+    '√': 'sqrt',
+    '−': '-',
+}
+_NOTATION_PATTERN = re.compile('|'.join(re.escape(symbol) for symbol in _NOTATION))
+
+# Postfix factorial on a number, name or flat parenthesized group: "5!", "(n+1)!"
+_FACTORIAL_PATTERN = re.compile(r'(\d+(?:\.\d+)?|[a-z_]\w*|\([^()]*\))\s*!(?!=)')
+
+# Any character outside the expression grammar (Python would read "#" as a comment)
+_FOREIGN_CHARACTER_PATTERN = re.compile(r'[^\w\s.+\-*/%(),]')
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression uses syntax or names outside the whitelist."""
+
+
+class CompiledExpression:
+    """
+    A validated expression compiled once and evaluated many times.
+
+    Attributes:
+        source (str): Normalized expression text
+        names (frozenset): Free variables that must be bound at call time
+        functions (frozenset): Whitelisted functions used by the expression
+        constants (frozenset): Named constants used by the expression
+        has_power (bool): Whether the expression contains exponentiation
+    """
+
+    __slots__ = ('source', 'tree', 'code', 'names', 'functions', 'constants', 'has_power')
+
+    def __init__(self, source, tree, code, names, functions, constants, has_power):
+        self.source = source
+        self.tree = tree
+        self.code = code
+        self.names = names
+        self.functions = functions
+        self.constants = constants
+        self.has_power = has_power
+
+    def __call__(self, namespace=None, /, **bindings):
+        """
+        Evaluate the expression.
+
+        Args:
+            namespace (dict): Optional mapping overriding the default functions/constants
+            **bindings: Values for the free variables in ``names``
+
+        Returns:
+            The numeric result of the expression
+        """
+        missing = self.names.difference(bindings)
+        if missing:
+            raise ExpressionError(f"Unknown variable(s): {', '.join(sorted(missing))}")
+
+        scope = dict(namespace) if namespace is not None else dict(_DEFAULT_NAMESPACE)
+        scope.update(bindings)
+        scope['__builtins__'] = {}
+        return eval(self.code, scope)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+_DEFAULT_NAMESPACE = {**ALLOWED_FUNCTIONS, **ALLOWED_CONSTANTS}
+
+
+def normalize_expression(expression: str) -> str:
+    """Lower-case an expression and rewrite ^, π, ×, ÷, √ and n! into Python syntax."""
+    cleaned = expression.strip().lower()
+    if '!' in cleaned:
+        cleaned = _FACTORIAL_PATTERN.sub(r'factorial(\1)', cleaned)
+    return _NOTATION_PATTERN.sub(lambda match: _NOTATION[match.group(0)], cleaned)
+
+
+def _validate(tree):
+    """Walk the AST once, rejecting anything outside the whitelist."""
+    names, functions, constants = set(), set(), set()
+    has_power = False
+    called = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Expression, ast.Load)):
+            continue
+        if isinstance(node, _BINARY_OPERATORS + _UNARY_OPERATORS):
+            has_power = has_power or isinstance(node, ast.Pow)
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BINARY_OPERATORS):
+                raise ExpressionError(f"Operator '{type(node.op).__name__}' is not allowed")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPERATORS):
+                raise ExpressionError(f"Operator '{type(node.op).__name__}' is not allowed")
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ExpressionError(f"Literal {node.value!r} is not a number")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in ALLOWED_FUNCTIONS:
+                raise ExpressionError("Unknown function in expression")
+            if node.keywords:
+                raise ExpressionError("Keyword arguments are not allowed")
+            # Every whitelisted function takes exactly one argument
+            if len(node.args) != 1:
+                raise ExpressionError(f"Function '{node.func.id}' takes exactly one argument")
+            functions.add(node.func.id)
+            called.add(id(node.func))
+        elif isinstance(node, ast.Name):
+            if node.id.startswith('_'):
+                raise ExpressionError(f"Name '{node.id}' is not allowed")
+            if node.id in ALLOWED_FUNCTIONS:
+                # ast.walk is breadth-first, so the parent Call was already seen
+                if id(node) not in called:
+                    raise ExpressionError(f"Function '{node.id}' must be called with arguments")
+            elif node.id in ALLOWED_CONSTANTS:
+                constants.add(node.id)
+            else:
+                names.add(node.id)
+        else:
+            raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+    return frozenset(names), frozenset(functions), frozenset(constants), has_power
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _compile_normalized(source: str) -> CompiledExpression:
+    foreign = _FOREIGN_CHARACTER_PATTERN.search(source)
+    if foreign:
+        raise ExpressionError(f"Character '{foreign.group(0)}' is not allowed")
+    tree = ast.parse(source, mode='eval')
+    names, functions, constants, has_power = _validate(tree)
+    code = compile(tree, '<expression>', 'eval')
+    logger.debug(f"Compiled expression: {source}")
+    return CompiledExpression(source, tree, code, names, functions, constants, has_power)
+
+
+def compile_expression(expression: str) -> CompiledExpression:
+    """
+    Parse, validate and compile an expression, reusing cached results.
+
+    Args:
+        expression (str): Raw expression such as "2*pi*r" or "sqrt(3^2 + 4^2)"
+
+    Returns:
+        CompiledExpression: Reusable callable for the expression
+
+    Raises:
+        SyntaxError: If the expression cannot be parsed
+        ExpressionError: If the expression uses characters, syntax or names outside
+            the whitelist, or calls a function with the wrong number of arguments
+    """
+    return _compile_normalized(normalize_expression(expression))
+
+
+def expression_cache_info():
+    """Return hit/miss statistics for the compiled-expression cache."""
+    return _compile_normalized.cache_info()
+
+
+def clear_expression_cache():
+    """Drop every cached compiled expression."""
+    _compile_normalized.cache_clear()
@@ -0,0 +1,110 @@
+import ast
+import logging
+import re
+
+from mathmind_agent.expression_engine import compile_expression, ExpressionError
+
+logger = logging.getLogger(__name__)
+
+# Leading phrases that carry no mathematical meaning
+_PREFIX_PATTERN = re.compile(
+    r'^(?:please\s+)?(?:(?:can|could)\s+you\s+)?'
+    r'(?:what\s+is|what\'s|whats|how\s+much\s+is|calculate|compute|evaluate|solve|find|work\s+out)?'
+    r'\s*(?:the\s+value\s+of\s+|the\s+)?'
+)
+
+# Ordered phrase -> operator rewrites (longest phrases first)
+_PHRASES = [
+    (r'(\d+(?:\.\d+)?)\s*(?:%|percent)\s+of\s+', r'\1/100*'),
+    (r'\bsquare\s+root\s+of\s+(\d+(?:\.\d+)?)', r'sqrt(\1)'),
+    (r'\bcube\s+root\s+of\s+(\d+(?:\.\d+)?)', r'(\1)^(1/3)'),
+    (r'\bto\s+the\s+power\s+of\b', '^'),
+    (r'\braised\s+to(?:\s+the)?\b', '^'),
+    (r'\bmultiplied\s+by\b', '*'),
+    (r'\bdivided\s+by\b', '/'),
+    (r'\bsquared\b', '^2'),
+    (r'\bcubed\b', '^3'),
+    (r'\bplus\b', '+'),
+    (r'\bminus\b', '-'),
+    (r'\btimes\b', '*'),
+    (r'\bover\b', '/'),
+    (r'\band\b', ''),
+]
+_PHRASE_PATTERNS = [(re.compile(pattern), replacement) for pattern, replacement in _PHRASES]
+
+_THOUSANDS_SEPARATOR = re.compile(r'(?<=\d),(?=\d{3}(?!\d))')
+
+# After rewriting, only arithmetic characters and whitelisted names may remain
+_ARITHMETIC_PATTERN = re.compile(r'^[\d\s.+\-*/^()!%×÷√πa-z]+$')
+_WORD_PATTERN = re.compile(r'[a-z]+')
+_FAST_PATH_NAMES = {'sqrt', 'abs', 'sin', 'cos', 'tan', 'log', 'ln', 'exp', 'factorial', 'pi', 'e'}
+
+# Tool error codes that mean the agent should handle the message instead
+# (mathematical errors such as division by zero are a valid answer)
+_FALLBACK_ERRORS = {'syntax', 'unsupported', 'unknown_name', 'system', 'invalid_input', 'no_numbers'}
+
+
+def translate_query(query: str):
+    """
+    Rewrite a chat message into a pure arithmetic expression, if it is one.
+
+    Args:
+        query (str): Raw user message, e.g. "what is 15% of 80?" or "5 plus 3"
+
+    Returns:
+        str or None: Expression for calculate_expression, or None when the
+        message needs the agent (word problems, unknown words, variables)
+    """
+    text = query.strip().lower().rstrip('?. ')
+    text = _PREFIX_PATTERN.sub('', text, count=1)
+    text = _THOUSANDS_SEPARATOR.sub('', text)
+
+    for pattern, replacement in _PHRASE_PATTERNS:
+        text = pattern.sub(replacement, text)
+
+    text = re.sub(r'\s+', ' ', text).strip()
+    if not _ARITHMETIC_PATTERN.match(text) or not any(char.isdigit() for char in text):
+        return None
+    if any(word not in _FAST_PATH_NAMES for word in _WORD_PATTERN.findall(text)):
+        return None
+
+    try:
+        compiled = compile_expression(text)
+    except (SyntaxError, ExpressionError):
+        return None
+    # Unknown variables need the agent; a bare number is not a calculation
+    if compiled.names or isinstance(compiled.tree.body, ast.Constant):
+        return None
+    return text
+
+
+def try_fast_answer(query: str):
+    """
+    Answer pure-arithmetic messages straight from calculate_expression.
+
+    Args:
+        query (str): Raw user message
+
+    Returns:
+        str or None: A templated answer, or None to fall back to the agent
+    """
+    expression = translate_query(query)
+    if expression is None:
+        return None
+
+    from mathmind_agent.kernels import calculate_expression_kernel, TOOLS_VERSION
+    from mathmind_agent.tool_memo import get_tool_memo, memoize
+
+    evaluate = calculate_expression_kernel
+    memo = get_tool_memo(TOOLS_VERSION)
+    if memo is not None:
+        # Shares results with the agent's calculate_expression calls
+        evaluate = memoize(memo, 'calculate_expression', evaluate)
+    tool_output = evaluate(expression)
+    if tool_output.error in _FALLBACK_ERRORS:
+        return None
+
+    logger.info(f"Answered on the fast path: {expression}")
+    return f"- Problem understanding: Evaluate `{expression}`\n" \
+           f"- Solution approach: Direct calculation\n" \
+           f"- Calculation:\n\n{tool_output.markdown}"
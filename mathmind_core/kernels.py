@@ -0,0 +1,1293 @@
+import logging
+import math
+from mathmind_agent.expression_engine import compile_expression, ExpressionError
+from mathmind_agent.sandbox import evaluate_expression, power, EvaluationTimeout, EvaluationFailed
+from mathmind_agent.cost_model import (
+    estimate_cost, estimate_power, within_budget, can_approximate, format_approximation,
+    format_scientific, FLOAT_MAX_DIGITS
+)
+from mathmind_agent.keywords import keyword_scores, best_category
+from mathmind_agent.lexer import tokenize, iter_numbers, split_tokens, function_argument, expression_source
+from mathmind_agent.reduction import reduce_operands, STREAMING_THRESHOLD
+from mathmind_agent.tool_results import ToolResult, numeric_value
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Bump when what a kernel returns for the same input changes (scopes memoized results on disk)
+TOOLS_VERSION = "6"
+
+# operation -> (operator shown between operands, heading, tool name for logs)
+_STREAMED_OPERATIONS = {
+    'add': (" + ", " **Addition Result**", "add_numbers"),
+    'subtract': (" - ", "➖ **Subtraction Result**", "subtract_numbers"),
+    'multiply': (" × ", "✖️ **Multiplication Result**", "multiply_numbers"),
+    'divide': (" ÷ ", " **Division Result**", "divide_numbers"),
+}
+
+
+def _reduce_streamed(operation: str, expression: str) -> ToolResult:
+    """
+    Arithmetic over a very long operand list, parsed and reduced as a stream.
+
+    The result lists the operand count and only the first and last few
+    operands, so neither memory nor the tool output grows with the input.
+    """
+    symbol, heading, tool_name = _STREAMED_OPERATIONS[operation]
+    try:
+        logger.info(f"Streaming {tool_name} over {len(expression):,} characters of input")
+        reduction = reduce_operands(operation, iter_numbers(expression))
+
+        if reduction.count == 0:
+            return ToolResult.failure('no_numbers', " Error: No valid numbers found in the input.")
+        if reduction.count < 2 and operation in ('subtract', 'divide'):
+            return ToolResult.failure('too_few_numbers', f" Error: {tool_name} requires at least 2 numbers.")
+
+        operands = [f"{value:g}" for value in reduction.head]
+        if reduction.tail:
+            if reduction.count > len(reduction.head) + len(reduction.tail):
+                operands.append("…")
+            operands += [f"{value:g}" for value in reduction.tail]
+        calculation_display = symbol.join(operands)
+
+        if reduction.estimate is not None:
+            approximation = format_approximation(reduction.estimate)
+            return ToolResult(steps=[f"{calculation_display} {approximation}", f"operands = {reduction.count}"],
+                              approximate=True,
+                              render=lambda: f"{heading}\n"
+                                             f"Calculation: {calculation_display} {approximation} "
+                                             f"(Log-space result - beyond floating-point range)\n"
+                                             f"Numbers processed: {reduction.count:,}")
+
+        result = reduction.result
+        if result.is_integer() and abs(result) < 1e15:
+            formatted_result = int(result)
+        elif abs(result) > 1e10 or (abs(result) < 1e-6 and result != 0):
+            formatted_result = f"{result:.6e}"
+        else:
+            formatted_result = f"{result:.10g}"
+
+        logger.info(f"Streamed {tool_name} completed: {reduction.count} operands")
+        return ToolResult(numeric_value(result), steps=[f"{calculation_display} = {formatted_result}",
+                                                        f"operands = {reduction.count}"],
+                          render=lambda: f"{heading}\n"
+                                         f"Calculation: {calculation_display} = **{formatted_result}**\n"
+                                         f"Numbers processed: {reduction.count:,}")
+
+    except ZeroDivisionError:
+        return ToolResult.failure('division_by_zero', " **Mathematical Error**: Division by zero is undefined.\n"
+                                                      " Tip: Make sure all divisors are non-zero.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in streamed {tool_name}: {e}")
+        return ToolResult.failure('system', " **System Error**: An unexpected error occurred.")
+
+
+def add_numbers_kernel(expression: str) -> ToolResult:
+    """
+    Add multiple numbers together with support for various input formats.
+
+    Args:
+        expression (str): Numbers to add, supporting formats like:
+            - "2 + 3 + 5" (with operators)
+            - "2, 3, 5" (comma-separated)
+            - "2 3 5" (space-separated)
+            - Mixed: "2.5 + 3, 4.7"
+
+    Returns:
+        ToolResult: Sum and calculation, rendered with details for display, or error
+
+    Examples:
+        >>> add_numbers("2 + 3 + 5")
+        "Calculation: 2 + 3 + 5 = 10"
+        >>> add_numbers("1.5, 2.3, 4.2")
+        "Calculation: 1.5 + 2.3 + 4.2 = 8.0"
+    """
+    # Pasted columns: reduce in constant memory and show only both ends
+    if len(expression) > STREAMING_THRESHOLD:
+        return _reduce_streamed('add', expression)
+
+    try:
+        logger.info(f"Processing addition request: {expression}")
+
+        # Clean and normalize the input
+        cleaned_expression = expression.strip()
+
+        # Numbers from the shared token stream ("1,000" is one number; "10-3" has no -3)
+        numbers = tokenize(cleaned_expression).numbers
+
+        if not numbers:
+            return ToolResult.failure('no_numbers', " Error: No valid numbers found in the input.")
+
+        # Convert to floats and calculate
+        numeric_values = list(numbers)
+        result = sum(numeric_values)
+
+        # Format the response professionally
+        if len(numeric_values) == 1:
+            return ToolResult(numeric_value(numeric_values[0]),
+                              render=lambda: f" Single number provided: {numeric_values[0]}")
+
+        # Create a clean calculation display
+        calculation_display = " + ".join([str(num) for num in numeric_values])
+
+        # Format result (remove .0 for whole numbers)
+        formatted_result = int(result) if result.is_integer() else round(result, 6)
+
+        logger.info(f"Addition completed successfully: {result}")
+
+        return ToolResult(numeric_value(result), steps=[f"{calculation_display} = {formatted_result}"],
+                          render=lambda: f" **Addition Result**\n"
+                                         f"Calculation: {calculation_display} = **{formatted_result}**\n"
+                                         f"Total numbers processed: {len(numeric_values)}")
+
+    except ValueError as e:
+        logger.error(f"ValueError in add_numbers: {e}")
+        return ToolResult.failure('invalid_input', " **Input Error**: Invalid number format detected.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in add_numbers: {e}")
+        return ToolResult.failure('system', " **System Error**: An unexpected error occurred.")
+def subtract_numbers_kernel(expression: str) -> ToolResult:
+    """
+    Subtract numbers with support for multiple formats and operations.
+
+    Args:
+        expression (str): Subtraction expression supporting formats like:
+            - "10 - 3 - 2" (chain subtraction)
+            - "15 - 7" (simple subtraction)
+            - "10, 3, 2" (subtract all from first)
+            - Mixed formats with decimals and negatives
+
+    Returns:
+        ToolResult: Difference and calculation, rendered with details for display, or error
+
+    Examples:
+        >>> subtract_numbers("10 - 3 - 2")
+        "Calculation: 10 - 3 - 2 = 5"
+        >>> subtract_numbers("15.5 - 7.2")
+        "Calculation: 15.5 - 7.2 = 8.3"
+    """
+    # Pasted columns: reduce in constant memory and show only both ends
+    if len(expression) > STREAMING_THRESHOLD:
+        return _reduce_streamed('subtract', expression)
+
+    try:
+        logger.info(f"Processing subtraction request: {expression}")
+
+        cleaned_expression = expression.strip()
+
+        # Numbers from the shared token stream ("1,000" is one number; "10-3" has no -3)
+        numbers = tokenize(cleaned_expression).numbers
+
+        if not numbers:
+            return ToolResult.failure('no_numbers', " Error: No valid numbers found in the input.")
+
+        if len(numbers) < 2:
+            return ToolResult.failure('too_few_numbers', " Error: Subtraction requires at least 2 numbers.")
+
+        numeric_values = list(numbers)
+
+        # Perform sequential subtraction (first number minus all others)
+        result = numeric_values[0]
+        for num in numeric_values[1:]:
+            result -= num
+
+        # Format display
+        if len(numeric_values) == 2:
+            calculation_display = f"{numeric_values[0]} - {numeric_values[1]}"
+        else:
+            calculation_display = f"{numeric_values[0]} - " + " - ".join([str(abs(num)) for num in numeric_values[1:]])
+
+        formatted_result = int(result) if result.is_integer() else round(result, 6)
+
+        logger.info(f"Subtraction completed successfully: {result}")
+
+        return ToolResult(numeric_value(result), steps=[f"{calculation_display} = {formatted_result}"],
+                          render=lambda: f"➖ **Subtraction Result**\n"
+                                         f"Calculation: {calculation_display} = **{formatted_result}**\n"
+                                         f"Numbers processed: {len(numeric_values)}")
+
+    except ValueError as e:
+        logger.error(f"ValueError in subtract_numbers: {e}")
+        return ToolResult.failure('invalid_input', " **Input Error**: Invalid number format detected.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in subtract_numbers: {e}")
+        return ToolResult.failure('system', " **System Error**: An unexpected error occurred.")
+
+def multiply_numbers_kernel(expression: str) -> ToolResult:
+    """
+    Multiply multiple numbers together with support for various input formats.
+
+    Args:
+        expression (str): Numbers to multiply, supporting formats like:
+            - "2 * 3 * 5" (with operators)
+            - "2 × 3 × 5" (with × symbol)
+            - "2, 3, 5" (comma-separated)
+            - "2 3 5" (space-separated)
+            - Mixed formats with decimals
+
+    Returns:
+        ToolResult: Product and calculation, rendered with details for display, or error
+
+    Examples:
+        >>> multiply_numbers("2 * 3 * 5")
+        "Calculation: 2 × 3 × 5 = 30"
+        >>> multiply_numbers("1.5, 2, 4")
+        "Calculation: 1.5 × 2 × 4 = 12.0"
+    """
+    # Pasted columns: reduce in constant memory and show only both ends
+    if len(expression) > STREAMING_THRESHOLD:
+        return _reduce_streamed('multiply', expression)
+
+    try:
+        logger.info(f"Processing multiplication request: {expression}")
+
+        cleaned_expression = expression.strip()
+
+        # Numbers from the shared token stream ("1,000" is one number; "10-3" has no -3)
+        numbers = tokenize(cleaned_expression).numbers
+
+        if not numbers:
+            return ToolResult.failure('no_numbers', " Error: No valid numbers found in the input.")
+
+        numeric_values = list(numbers)
+
+        # Calculate product
+        result = 1
+        for num in numeric_values:
+            result *= num
+
+        # Handle single number case
+        if len(numeric_values) == 1:
+            return ToolResult(numeric_value(numeric_values[0]),
+                              render=lambda: f"📊 Single number provided: {numeric_values[0]}")
+
+        # Create calculation display with × symbol
+        calculation_display = " × ".join([str(num) for num in numeric_values])
+
+        # Format result
+        formatted_result = int(result) if result.is_integer() else round(result, 6)
+
+        # Special handling for very large or very small numbers
+        if abs(result) > 1e10:
+            formatted_result = f"{result:.2e}"  # Scientific notation
+        elif abs(result) < 1e-6 and result != 0:
+            formatted_result = f"{result:.2e}"
+
+        logger.info(f"Multiplication completed successfully: {result}")
+
+        return ToolResult(numeric_value(result), steps=[f"{calculation_display} = {formatted_result}"],
+                          render=lambda: f"✖️ **Multiplication Result**\n"
+                                         f"Calculation: {calculation_display} = **{formatted_result}**\n"
+                                         f"Numbers processed: {len(numeric_values)}")
+
+    except ValueError as e:
+        logger.error(f"ValueError in multiply_numbers: {e}")
+        return ToolResult.failure('invalid_input', " **Input Error**: Invalid number format detected.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in multiply_numbers: {e}")
+        return ToolResult.failure('system', " **System Error**: An unexpected error occurred.")
+
+def divide_numbers_kernel(expression: str) -> ToolResult:
+    """
+    Divide numbers with support for multiple formats and robust error handling.
+
+    Args:
+        expression (str): Division expression supporting formats like:
+            - "10 / 2" (simple division)
+            - "20 ÷ 4 ÷ 2" (chain division)
+            - "15, 3" (comma-separated: first ÷ second)
+            - "100 / 5 / 2" (sequential division)
+
+    Returns:
+        ToolResult: Quotient and calculation, rendered with details for display, or error
+
+    Examples:
+        >>> divide_numbers("10 / 2")
+        "Calculation: 10 ÷ 2 = 5"
+        >>> divide_numbers("15.6 / 3.2")
+        "Calculation: 15.6 ÷ 3.2 = 4.875"
+    """
+    # Pasted columns: reduce in constant memory and show only both ends
+    if len(expression) > STREAMING_THRESHOLD:
+        return _reduce_streamed('divide', expression)
+
+    try:
+        logger.info(f"Processing division request: {expression}")
+
+        cleaned_expression = expression.strip()
+
+        # Numbers from the shared token stream ("1,000" is one number; "10-3" has no -3)
+        numbers = tokenize(cleaned_expression).numbers
+
+        if not numbers:
+            return ToolResult.failure('no_numbers', " Error: No valid numbers found in the input.")
+
+        if len(numbers) < 2:
+            return ToolResult.failure('too_few_numbers',
+                                      " Error: Division requires at least 2 numbers (dividend and divisor).")
+
+        numeric_values = list(numbers)
+
+        # Check for zero division
+        if any(num == 0 for num in numeric_values[1:]):
+            return ToolResult.failure('division_by_zero', " **Mathematical Error**: Division by zero is undefined.\n"
+                                                          " Tip: Make sure all divisors are non-zero.")
+
+        # Perform sequential division
+        result = numeric_values[0]
+        divisors = []
+
+        for num in numeric_values[1:]:
+            result /= num
+            divisors.append(num)
+
+        # Create calculation display with ÷ symbol
+        if len(numeric_values) == 2:
+            calculation_display = f"{numeric_values[0]} ÷ {numeric_values[1]}"
+        else:
+            calculation_display = f"{numeric_values[0]} ÷ " + " ÷ ".join([str(num) for num in divisors])
+
+        # Format result with appropriate precision
+        if result.is_integer():
+            formatted_result = int(result)
+        elif abs(result) > 1e10 or (abs(result) < 1e-4 and result != 0):
+            formatted_result = f"{result:.2e}"  # Scientific notation
+        else:
+            formatted_result = round(result, 8)  # Higher precision for division
+            # Remove trailing zeros
+            if isinstance(formatted_result, float):
+                formatted_result = f"{formatted_result:g}"
+
+        # Add fraction representation for simple cases
+        fraction_info = ""
+        if len(numeric_values) == 2 and all(num.is_integer() for num in numeric_values):
+            from math import gcd
+            numerator = int(numeric_values[0])
+            denominator = int(numeric_values[1])
+            common_divisor = gcd(abs(numerator), abs(denominator))
+
+            if common_divisor > 1:
+                simplified_num = numerator // common_divisor
+                simplified_den = denominator // common_divisor
+                fraction_info = f"\n📐 Simplified fraction: {simplified_num}/{simplified_den}"
+
+        logger.info(f"Division completed successfully: {result}")
+
+        return ToolResult(numeric_value(result), steps=[f"{calculation_display} = {formatted_result}"],
+                          render=lambda: f" **Division Result**\n"
+                                         f"Calculation: {calculation_display} = **{formatted_result}**{fraction_info}\n"
+                                         f"Numbers processed: {len(numeric_values)}")
+
+    except ValueError as e:
+        logger.error(f"ValueError in divide_numbers: {e}")
+        return ToolResult.failure('invalid_input', " **Input Error**: Invalid number format detected.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in divide_numbers: {e}")
+        return ToolResult.failure('system', " **System Error**: An unexpected error occurred.")
+
+def power_numbers_kernel(expression: str) -> ToolResult:
+  """
+    Calculate powers and exponents with support for various input formats.
+
+    Args:
+        expression (str): Power expression supporting formats like:
+            - "2 ^ 3" (2 to the power of 3)
+            - "2 ** 3" (Python power notation)
+            - "2, 3" (comma-separated: base, exponent)
+            - "5 ^ 2 ^ 2" (chain powers, right-associative)
+            - "sqrt(16)" or "16 ^ 0.5" (fractional exponents)
+
+    Returns:
+        ToolResult: Power and calculation, rendered with details for display, or error
+
+    Examples:
+        >>> power_numbers("2 ^ 3")
+        "Calculation: 2³ = 8"
+        >>> power_numbers("9 ^ 0.5")
+        "Calculation: 9^0.5 = 3 (√9)"
+    """
+  try:
+        logger.info(f"Processing power calculation request: {expression}")
+
+        lexed = tokenize(expression.strip().lower())
+        result = None
+        calculation_display = ""
+        special_info = ""
+
+        # Handle special cases: sqrt, cube root, etc.
+        if 'sqrt' in lexed.functions:
+            number = function_argument(lexed.tokens, 'sqrt')
+            if number is not None:
+                if number < 0:
+                    return ToolResult.failure('domain', "Mathematical Error: Square root of negative numbers not supported in real numbers.\nTip: Use positive numbers for square roots.")
+
+                result = number ** 0.5
+                calculation_display = f"√{number}"
+                special_info = f" (Square root of {number})"
+
+        # Handle regular power expressions
+        if result is None:
+            numbers = lexed.numbers
+
+            if not numbers:
+                return ToolResult.failure('no_numbers', "Error: No valid numbers found in the input.")
+
+            if len(numbers) < 2:
+                return ToolResult.failure('too_few_numbers', "Error: Power calculation requires base and exponent.")
+
+            numeric_values = list(numbers)
+            base = numeric_values[0]
+            exponent = numeric_values[1]
+
+            # Handle special mathematical cases
+            if base == 0 and exponent < 0:
+                return ToolResult.failure('domain', "Mathematical Error: 0 raised to negative power is undefined.\nTip: Zero cannot be raised to negative powers.")
+
+            if base < 0 and not exponent.is_integer():
+                return ToolResult.failure('domain', "Mathematical Error: Negative base with fractional exponent not supported in real numbers.\nTip: Use positive bases with fractional exponents.")
+
+            # Size the result before computing it
+            estimate = estimate_power(base, exponent)
+            if not within_budget(estimate, FLOAT_MAX_DIGITS):
+                if can_approximate(estimate):
+                    approximation = format_approximation(estimate)
+                    return ToolResult(steps=[f"{base}^{exponent} {approximation}"], approximate=True,
+                                      render=lambda: f"**Power Calculation Result**\nCalculation: {base}^{exponent} "
+                                                     f"{approximation} (Log-space approximation - too large to compute exactly)")
+                return ToolResult.failure('too_large', "Mathematical Error: Result too large to calculate.\nTip: Try smaller numbers or lower exponents.")
+
+            # Whole base and exponent: exact integer arithmetic ("3 ^ 40" keeps every digit)
+            if base.is_integer() and exponent.is_integer() and exponent >= 0:
+                base, exponent = int(base), int(exponent)
+
+            # Calculate result in an isolated worker process
+            result = power(base, exponent)
+
+            # Create calculation display
+            if exponent == 2:
+                calculation_display = f"{base}²"
+                special_info = f" ({base} squared)"
+            elif exponent == 3:
+                calculation_display = f"{base}³"
+                special_info = f" ({base} cubed)"
+            else:
+                calculation_display = f"{base}^{exponent}"
+
+        # Format result
+        if abs(result) > 1e15:
+            formatted_result = f"{result:.2e}"
+            special_info += " (Very large number)"
+        elif float(result).is_integer():
+            formatted_result = int(result)
+        else:
+            formatted_result = f"{result:.10g}"
+
+        logger.info(f"Power calculation completed successfully: {result}")
+
+        return ToolResult(numeric_value(result), steps=[f"{calculation_display} = {formatted_result}"],
+                          render=lambda: f"**Power Calculation Result**\nCalculation: {calculation_display} = **{formatted_result}**{special_info}")
+
+  except (OverflowError, MemoryError, EvaluationTimeout):
+        return ToolResult.failure('too_large', "Mathematical Error: Result too large to calculate.\nTip: Try smaller numbers or lower exponents.")
+
+  except Exception as e:
+        logger.error(f"Unexpected error in power_numbers: {e}")
+        return ToolResult.failure('system', "System Error: An unexpected error occurred.")
+
+def square_root_kernel(expression: str) -> ToolResult:
+    """
+    Calculate square roots with support for multiple input formats and mathematical insights.
+
+    Args:
+        expression (str): Square root expression supporting formats like:
+            - "sqrt(25)" (function notation)
+            - "√25" (root symbol)
+            - "25" (just the number)
+            - "sqrt 16" (space notation)
+            - Multiple roots: "sqrt(9), sqrt(16)"
+
+    Returns:
+        ToolResult: Root(s) and calculation, rendered with insights for display, or error
+
+    Examples:
+        >>> square_root("sqrt(25)")
+        "Calculation: √25 = 5 (Perfect square)"
+        >>> square_root("10")
+        "Calculation: √10 ≈ 3.162278 (Irrational)"
+    """
+    try:
+        logger.info(f"Processing square root request: {expression}")
+
+        tokens = tokenize(expression.strip()).tokens
+        results = []
+
+        # Handle multiple square roots (split at separators, so "sqrt(1,000)" stays one)
+        parts = split_tokens(tokens)
+        if len(parts) > 1:
+            for part in parts:
+                single_result = _calculate_single_sqrt(part)
+                if single_result:
+                    results.append(single_result)
+
+            if not results:
+                return ToolResult.failure('no_numbers', " Error: No valid numbers found for square root calculation.")
+
+            # Format multiple results
+            return ToolResult([result.value for result in results],
+                              steps=[step for result in results for step in result.steps],
+                              render=lambda: "√ **Multiple Square Root Results**\n" +
+                                             "\n".join([f"• {result.markdown}" for result in results]))
+
+        else:
+            # Single square root calculation
+            single_result = _calculate_single_sqrt(tokens)
+            if single_result:
+                return single_result.with_heading("√ **Square Root Result**")
+            else:
+                return ToolResult.failure('no_numbers', " Error: No valid number found for square root calculation.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in square_root: {e}")
+        return ToolResult.failure('system', " **System Error**: An unexpected error occurred.")
+
+def _calculate_single_sqrt(tokens) -> ToolResult:
+    """Helper function to calculate a single square root from its tokens (None when no number is found)."""
+    try:
+        # Extract number from various formats
+        if any(token.kind == 'function' and token.value == 'sqrt' for token in tokens):
+            # Handle sqrt(number), sqrt number or √number
+            number = function_argument(tokens, 'sqrt')
+        else:
+            # Just a plain number
+            number = next((token.value for token in tokens if token.kind == 'number'), None)
+        if number is None:
+            return None
+
+        # Validate input
+        if number < 0:
+            imaginary = f"{abs(number)**0.5:.6g}i"
+            return ToolResult(steps=[f"√{number} = {imaginary}"], error='domain',
+                              message="Negative numbers don't have real square roots",
+                              render=lambda: f"√{number} = **Undefined** (Negative numbers don't have real square roots)\n"
+                                             f" Note: √{number} = {imaginary} (imaginary number)")
+
+        if number == 0:
+            return ToolResult(0, steps=["√0 = 0"], render=lambda: f"√0 = **0** (Square root of zero is zero)")
+
+        # Calculate square root
+        result = math.sqrt(number)
+
+        # Determine if it's a perfect square
+        is_perfect_square = result.is_integer()
+        formatted_result = int(result) if is_perfect_square else f"{result:.10g}"  # Remove trailing zeros
+
+        return ToolResult(numeric_value(result), steps=[f"√{number} = {formatted_result}"],
+                          render=lambda: _render_single_sqrt(number, result, formatted_result))
+
+    except Exception as e:
+        logger.error(f"Error in _calculate_single_sqrt: {e}")
+        return None
+
+
+def _render_single_sqrt(number, result, formatted_result) -> str:
+    """Markdown for one square root, with perfect-square and special-number insights."""
+    is_perfect_square = result.is_integer()
+
+    # Format result
+    if is_perfect_square:
+        math_type = "Perfect square"
+        extra_info = f" {int(number)} is a perfect square!"
+    else:
+        math_type = "Irrational number"
+
+        # Check if it's close to a simple fraction
+        simple_fractions = [(1/2, "1/2"), (1/3, "1/3"), (2/3, "2/3"), (1/4, "1/4"), (3/4, "3/4")]
+        fraction_approx = ""
+        for frac_val, frac_str in simple_fractions:
+            if abs(result - frac_val) < 0.001:
+                fraction_approx = f" ≈ {frac_str}"
+                break
+
+        extra_info = f"📐 Decimal approximation{fraction_approx}"
+
+    # Add mathematical insights
+    insights = []
+
+    # Perfect square insights
+    if is_perfect_square:
+        root = int(result)
+        insights.append(f"Verification: {root} × {root} = {int(number)}")
+
+    # Special number insights
+    if number == 2:
+        insights.append("√2 ≈ 1.414 (Diagonal of unit square)")
+    elif number == 3:
+        insights.append("√3 ≈ 1.732 (Height of equilateral triangle)")
+    elif number == 5:
+        insights.append("√5 ≈ 2.236 (Related to golden ratio)")
+    elif number == 10:
+        insights.append("√10 ≈ 3.162 (Common in engineering)")
+
+    insight_text = f"\n {' | '.join(insights)}" if insights else ""
+
+    return f"√{number} = **{formatted_result}** ({math_type})\n" \
+           f"{extra_info}{insight_text}"
+
+def calculate_expression_kernel(expression: str) -> ToolResult:
+    """
+    Intelligent calculator that evaluates mathematical expressions and routes to specialized tools when appropriate.
+
+    Args:
+        expression (str): Mathematical expression supporting:
+            - Simple operations: "5+3", "10-2" (routes to specialized tools)
+            - Basic operations: +, -, *, /, ^, **
+            - Parentheses for grouping: (2+3)*4
+            - Mathematical functions: sqrt, abs, sin, cos, tan, log
+            - Constants: pi, e
+            - Mixed expressions: "2*pi*r" or "sqrt(a^2 + b^2)"
+            - Assignments: "subtotal = 120*0.85" stores the result in the
+              session workspace; later calls use it by name: "subtotal*1.08"
+
+    Returns:
+        ToolResult: Value and step, rendered with a breakdown for display, or error
+
+    Examples:
+        >>> calculate_expression("5 + 3")
+        Routes to specialized addition tool
+        >>> calculate_expression("2*pi*r")
+        "Expression: 2*pi*r = [result] (Advanced calculation)"
+    """
+    try:
+        logger.info(f"Processing expression: {expression}")
+
+        # First, try to route to specialized tools for simple operations
+        routing_result = _route_to_specialized_tool(expression)
+        if routing_result:
+            tool_name, result = routing_result
+            logger.info(f"Routed to {tool_name}")
+            return result.with_heading(f"[{tool_name}]")
+
+        # If no routing, proceed with advanced calculation
+        logger.info("Processing with advanced calculator")
+
+        original_expr = expression.strip()
+
+        # Parse, validate and compile (cached by normalized expression); numbers as lexed, so "1,000" is 1000
+        try:
+            compiled = compile_expression(expression_source(original_expr))
+        except ExpressionError as e:
+            return ToolResult.failure('unsupported', f"Expression Error: Unsupported operation in expression.\nDetails: {str(e)}")
+
+        if compiled.names:
+            return ToolResult.failure('unknown_name', "Expression Error: Unknown function or variable in expression.\n"
+                                                      f"Details: {', '.join(sorted(compiled.names))} is not defined\n"
+                                                      "Tip: Store a value first, e.g. 'r = 7.5'.")
+
+        # Size the result before computing anything
+        estimate = estimate_cost(compiled)
+        if not within_budget(estimate):
+            if can_approximate(estimate):
+                logger.info(f"Expression too large to evaluate exactly; approximating: {estimate}")
+                approximation = format_approximation(estimate)
+                return ToolResult(steps=[f"{original_expr} {approximation}"], approximate=True,
+                                  render=lambda: "ADVANCED CALCULATION RESULT\n"
+                                                 f"Expression: {original_expr} {approximation}"
+                                                 " (Log-space approximation - too large to compute exactly)")
+            return ToolResult.failure('too_large', "Mathematical Error: Result too large to calculate.\nTip: Try smaller numbers or lower exponents.")
+
+        # Evaluate the expression in an isolated worker process
+        try:
+            result = evaluate_expression(compiled.source)
+        except ZeroDivisionError:
+            return ToolResult.failure('division_by_zero', "Mathematical Error: Division by zero detected in expression.")
+        except ValueError as e:
+            return ToolResult.failure('domain', f"Mathematical Error: Invalid operation in expression.\nDetails: {str(e)}")
+        except (MemoryError, OverflowError):
+            return ToolResult.failure('too_large', "Mathematical Error: Result too large to calculate.\nTip: Try smaller numbers or lower exponents.")
+        except EvaluationTimeout:
+            return ToolResult.failure('timeout', "Mathematical Error: Calculation took too long and was stopped.\nTip: Try smaller numbers or lower exponents.")
+        except EvaluationFailed:
+            return ToolResult.failure('system', "System Error: Evaluation worker failed. Please try again.")
+
+        # Format the result
+        if isinstance(result, complex):
+            if result.imag == 0:
+                result = result.real
+            else:
+                complex_result = f"{result.real:.6g} + {result.imag:.6g}i"
+                return ToolResult(complex_result, steps=[f"{original_expr} = {complex_result}"],
+                                  render=lambda: f"Complex Result: {complex_result}")
+
+        # Determine result formatting
+        if abs(result) > 1e15:
+            formatted_result = format_scientific(result)
+            precision_note = " (Scientific notation - very large number)"
+        elif abs(result) < 1e-10 and result != 0:
+            formatted_result = f"{result:.4e}"
+            precision_note = " (Scientific notation - very small number)"
+        elif abs(result - round(result)) < 1e-10:
+            formatted_result = int(round(result))
+            precision_note = ""
+        else:
+            formatted_result = f"{result:.10g}"
+            precision_note = ""
+
+        logger.info(f"Complex expression evaluated successfully: {formatted_result}")
+
+        return ToolResult(numeric_value(result), steps=[f"{original_expr} = {formatted_result}"],
+                          render=lambda: _render_expression_result(original_expr, compiled, formatted_result,
+                                                                   precision_note))
+
+    except SyntaxError:
+        return ToolResult.failure('syntax', "Syntax Error: Invalid mathematical expression format.\nTip: Check parentheses and operator placement.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in calculate_expression: {e}")
+        return ToolResult.failure('system', "System Error: Unable to evaluate expression.")
+
+
+def _render_expression_result(original_expr, compiled, formatted_result, precision_note) -> str:
+    """Markdown for an evaluated expression, listing the kinds of operations it used."""
+    # Analyze expression complexity
+    complexity_indicators = []
+    if 'sqrt' in compiled.functions:
+        complexity_indicators.append("Square root operation")
+    if compiled.functions & {'sin', 'cos', 'tan', 'asin', 'acos', 'atan'}:
+        complexity_indicators.append("Trigonometric function")
+    if compiled.functions & {'log', 'ln'}:
+        complexity_indicators.append("Logarithmic function")
+    if 'pi' in compiled.constants:
+        complexity_indicators.append("Pi constant used")
+    if 'e' in compiled.constants:
+        complexity_indicators.append("Euler's number used")
+    if compiled.has_power:
+        complexity_indicators.append("Exponentiation")
+
+    # Build response
+    response_parts = []
+    response_parts.append("ADVANCED CALCULATION RESULT")
+    response_parts.append(f"Expression: {original_expr} = {formatted_result}{precision_note}")
+
+    if complexity_indicators:
+        response_parts.append(f"Operations detected: {', '.join(complexity_indicators)}")
+
+    # Add verification for simple cases
+    if len(compiled.source.replace(' ', '')) < 20 and not compiled.functions & {'sin', 'cos', 'tan', 'log', 'ln'}:
+        if any(op in original_expr for op in '+-*/'):
+            response_parts.append("Expression successfully evaluated using order of operations")
+
+    return "\n".join(response_parts)
+
+def evaluate_expression_batch_kernel(request: str) -> ToolResult:
+    """
+    Evaluate one formula over many rows of variable values in a single vectorized pass.
+
+    Args:
+        request (str): Semicolon-separated request:
+            - First part: the expression, e.g. "2*pi*r" or "sqrt(a^2 + b^2)"
+            - "name = values" bindings: "1, 2, 3", "1..1000000", "0..1 step 0.1",
+              "range(0, 100, 5)", "linspace(0, 1, 101)" or a single scalar
+            - "file = data.csv" to load columns from a CSV/.npy/.npz file
+            - "output = results.csv" to also write every row to a file
+
+    Returns:
+        ToolResult: Summary statistics of the results or error
+
+    Examples:
+        >>> evaluate_expression_batch("2*pi*r; r = 1..1000000")
+        "Rows evaluated: 1,000,000 ..."
+        >>> evaluate_expression_batch("sqrt(a^2+b^2); file = sides.csv; output = hyp.csv")
+    """
+    try:
+        from mathmind_agent import batch_eval
+
+        logger.info(f"Processing batch request: {request}")
+
+        parts = [part.strip() for part in request.split(';') if part.strip()]
+        if not parts:
+            return ToolResult.failure('no_expression', "Error: No expression provided.")
+
+        expression = parts[0]
+        columns = {}
+        output_path = None
+
+        for part in parts[1:]:
+            name, sep, spec = part.partition('=')
+            name = name.strip().lower()
+            if not sep or not name:
+                return ToolResult.failure('invalid_input', f"Input Error: Expected 'name = values', got '{part}'.")
+            if name == 'file':
+                columns.update(batch_eval.load_columns(spec.strip()))
+            elif name == 'output':
+                output_path = spec.strip()
+            else:
+                columns[name] = batch_eval.parse_values(spec)
+
+        result = batch_eval.evaluate_batch(expression, columns)
+        summary = batch_eval.summarize(result)
+
+        steps = [f"rows = {summary['count']}"]
+        response_parts = ["**Batch Evaluation Result**", f"Expression: {expression}",
+                          f"Rows evaluated: {summary['count']:,}"]
+        if 'mean' in summary:
+            steps.append(f"min = {summary['min']:.10g}, max = {summary['max']:.10g}, mean = {summary['mean']:.10g}, "
+                         f"std = {summary['std']:.10g}, sum = {summary['sum']:.10g}")
+            response_parts.append(
+                f"Min: {summary['min']:.10g} | Max: {summary['max']:.10g} | "
+                f"Mean: {summary['mean']:.10g} | Std: {summary['std']:.10g} | Sum: {summary['sum']:.10g}"
+            )
+        if summary['undefined']:
+            steps.append(f"undefined rows = {summary['undefined']}")
+            response_parts.append(f"Undefined rows (NaN/inf): {summary['undefined']:,}")
+
+        if output_path:
+            used = {name: columns[name] for name in columns if name in compile_expression(expression).names}
+            batch_eval.save_results(output_path, used, result)
+            steps.append(f"written to {output_path}")
+            response_parts.append(f"Results written to: {output_path}")
+
+        logger.info(f"Batch evaluation completed: {summary['count']} rows")
+        return ToolResult(steps=steps, render=lambda: "\n".join(response_parts))
+
+    except ExpressionError as e:
+        return ToolResult.failure('unsupported', f"Expression Error: {str(e)}")
+
+    except SyntaxError:
+        return ToolResult.failure('syntax', "Syntax Error: Invalid mathematical expression format.\nTip: Check parentheses and operator placement.")
+
+    except (ValueError, OSError) as e:
+        return ToolResult.failure('invalid_input', f"Input Error: {str(e)}")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in evaluate_expression_batch: {e}")
+        return ToolResult.failure('system', "System Error: Unable to evaluate batch expression.")
+
+def _is_operator_chain(tokens) -> bool:
+    """True for "number op number [op number ...]" with unsigned plain numbers."""
+    return (len(tokens) >= 3 and len(tokens) % 2 == 1
+            and all(token.kind == 'number' and not token.unit and token.text[0] not in '+-' for token in tokens[::2])
+            and all(token.kind == 'operator' for token in tokens[1::2]))
+
+
+# Operator of a simple chain -> the specialized tool kernel that handles it
+_CHAIN_TOOLS = {
+    '+': ("Addition Tool", add_numbers_kernel),
+    '-': ("Subtraction Tool", subtract_numbers_kernel),
+    '*': ("Multiplication Tool", multiply_numbers_kernel),
+    '/': ("Division Tool", divide_numbers_kernel),
+}
+
+
+def _route_to_specialized_tool(expression: str):
+    """Route simple expressions to specialized tool kernels; returns (tool label, ToolResult) or None."""
+    original = expression.strip()
+    lexed = tokenize(original)
+    operators = set(lexed.operators)
+
+    # Constants, other functions, grouping, words, units or percentages: use the advanced calculator
+    if lexed.functions - {'sqrt'} or any(token.kind not in ('number', 'operator', 'function', 'separator')
+                                         for token in lexed.tokens):
+        return None
+
+    # Square root operations: "sqrt 16", "√16", "√9, √16"
+    if lexed.functions:
+        return ("Square Root Tool", square_root_kernel(original)) if not operators else None
+
+    if len(operators) != 1 or not _is_operator_chain(lexed.tokens):
+        return None
+    (operator,) = operators
+
+    # Simple chains of one operator: "2 + 3 + 5", "10 - 3", "2 × 3", "100 / 5 / 2"
+    if operator in _CHAIN_TOOLS:
+        label, kernel = _CHAIN_TOOLS[operator]
+        return (label, kernel(original))
+
+    # Power operations: simple base^exponent
+    if operator == '^' and len(lexed.tokens) == 3:
+        return ("Power Tool", power_numbers_kernel(original))
+
+    return None
+
+def solve_geometry_word_problem_kernel(problem: str) -> ToolResult:
+    """
+    Solve geometry word problems involving area, perimeter, volume, etc.
+
+    Args:
+        problem (str): Geometry word problem containing:
+            - Shape type (circle, rectangle, triangle, etc.)
+            - Dimensions
+            - What to calculate (area, perimeter, volume)
+
+    Examples:
+        "A circle has radius 7cm. What's the area?"
+        "Rectangle is 10m long and 6m wide. Find the perimeter."
+        "Square with side 5 inches. Calculate area and perimeter."
+    """
+    try:
+        logger.info(f"Processing geometry problem: {problem}")
+
+        scores = keyword_scores(problem)
+
+        # Extract numbers
+        numbers = tokenize(problem).numbers
+        if not numbers:
+            return ToolResult.failure('no_numbers', "❌ Error: No dimensions found in the problem.")
+
+        # Identify shape: the one mentioned most ("radius" counts for circle), in this order on ties
+        shape = best_category(scores, ('circle', 'rectangle', 'square', 'triangle'))
+
+        if not shape:
+            return ToolResult.failure('not_identified', "❌ Error: Could not identify the shape. Please specify circle, rectangle, square, or triangle.")
+
+        # Identify what to calculate
+        calculate_area = 'area' in scores
+        calculate_perimeter = 'perimeter' in scores
+
+        # If nothing specified, calculate both
+        if not calculate_area and not calculate_perimeter:
+            calculate_area = calculate_perimeter = True
+
+        results = []
+        formulas_used = []
+        values = []
+
+        # Circle calculations
+        if shape == 'circle':
+            radius = float(numbers[0])
+
+            if calculate_area:
+                area = math.pi * radius ** 2
+                values.append((area, "square units"))
+                results.append(f"Area = π × r² = π × {radius}² = {area:.2f} square units")
+                formulas_used.append("Area of circle: π × r²")
+
+            if calculate_perimeter:
+                circumference = 2 * math.pi * radius
+                values.append((circumference, "units"))
+                results.append(f"Circumference = 2 × π × r = 2 × π × {radius} = {circumference:.2f} units")
+                formulas_used.append("Circumference: 2 × π × r")
+
+        # Rectangle calculations
+        elif shape == 'rectangle':
+            if len(numbers) < 2:
+                return ToolResult.failure('too_few_numbers', "❌ Error: Rectangle requires length and width.")
+
+            length = float(numbers[0])
+            width = float(numbers[1])
+
+            if calculate_area:
+                area = length * width
+                values.append((area, "square units"))
+                results.append(f"Area = length × width = {length} × {width} = {area:.2f} square units")
+                formulas_used.append("Area of rectangle: length × width")
+
+            if calculate_perimeter:
+                perimeter = 2 * (length + width)
+                values.append((perimeter, "units"))
+                results.append(f"Perimeter = 2 × (length + width) = 2 × ({length} + {width}) = {perimeter:.2f} units")
+                formulas_used.append("Perimeter of rectangle: 2 × (length + width)")
+
+        # Square calculations
+        elif shape == 'square':
+            side = float(numbers[0])
+
+            if calculate_area:
+                area = side ** 2
+                values.append((area, "square units"))
+                results.append(f"Area = side² = {side}² = {area:.2f} square units")
+                formulas_used.append("Area of square: side²")
+
+            if calculate_perimeter:
+                perimeter = 4 * side
+                values.append((perimeter, "units"))
+                results.append(f"Perimeter = 4 × side = 4 × {side} = {perimeter:.2f} units")
+                formulas_used.append("Perimeter of square: 4 × side")
+
+        # Triangle calculations (assuming equilateral or given base and height)
+        elif shape == 'triangle':
+            if len(numbers) >= 2:
+                base = float(numbers[0])
+                height = float(numbers[1])
+
+                if calculate_area:
+                    area = 0.5 * base * height
+                    values.append((area, "square units"))
+                    results.append(f"Area = ½ × base × height = ½ × {base} × {height} = {area:.2f} square units")
+                    formulas_used.append("Area of triangle: ½ × base × height")
+            else:
+                return ToolResult.failure('too_few_numbers', "❌ Error: Triangle area calculation requires base and height.")
+
+        if not results:
+            return ToolResult.failure('not_identified', "❌ Error: Nothing to calculate for this shape.")
+
+        # Format response
+        def render():
+            calculation_details = "\n".join([f"• {result}" for result in results])
+            formulas_text = "\n".join([f"📐 {formula}" for formula in formulas_used])
+
+            return f"📏 **Geometry Problem Solution**\n\n" \
+                   f"**Shape:** {shape.title()}\n" \
+                   f"**Calculations:**\n{calculation_details}\n\n" \
+                   f"**Formulas used:**\n{formulas_text}"
+
+        value, unit = values[0]
+        return ToolResult(numeric_value(value), unit, steps=results, render=render)
+
+    except Exception as e:
+        logger.error(f"Error in solve_geometry_word_problem: {e}")
+        return ToolResult.failure('system', "❌ System Error: Unable to solve geometry problem.")
+
+def solve_discount_problem_kernel(problem: str) -> ToolResult:
+    """
+    Solve discount and tax problems with multiple steps.
+
+    Args:
+        problem (str): Word problem containing:
+            - Original price
+            - Discount percentage
+            - Tax percentage (optional)
+            - Tip percentage (optional)
+
+    Examples:
+        "I bought a $120 jacket with 15% discount, then paid 8% tax"
+        "A pizza costs $20. If I tip 18%, what's the total?"
+        "Item costs $50 with 25% off and 10% tax"
+    """
+    try:
+        logger.info(f"Processing discount problem: {problem}")
+
+        # Extract numerical values and percentages; a currency amount is the price when there is one
+        lexed = tokenize(problem)
+        prices = lexed.amounts or lexed.numbers
+        percentages = lexed.percents
+
+        if not prices:
+            return ToolResult.failure('no_numbers', "❌ Error: No price found in the problem. Please include the original price.")
+
+        original_price = float(prices[0])
+
+        # Initialize calculation steps
+        steps = []
+        current_amount = original_price
+        steps.append(f"Original price: ${original_price:.2f}")
+
+        # Identify discount, tax, and tip
+        discount_rate = 0
+        tax_rate = 0
+        tip_rate = 0
+
+        scores = keyword_scores(problem)
+
+        # Find discount
+        if 'discount' in scores and percentages:
+            discount_rate = float(percentages[0]) / 100
+
+        # Find tax
+        if 'tax' in scores:
+            for percentage in percentages:
+                # Usually tax comes after discount in the sentence
+                if discount_rate == 0 or float(percentage) != discount_rate * 100:
+                    tax_rate = float(percentage) / 100
+                    break
+
+        # Find tip
+        if 'tip' in scores:
+            for percentage in percentages:
+                if float(percentage) / 100 not in [discount_rate, tax_rate]:
+                    tip_rate = float(percentage) / 100
+                    break
+
+        # Apply discount first
+        if discount_rate > 0:
+            discount_amount = current_amount * discount_rate
+            current_amount -= discount_amount
+            steps.append(f"Discount ({discount_rate*100:.1f}%): -${discount_amount:.2f}")
+            steps.append(f"After discount: ${current_amount:.2f}")
+
+        # Apply tax to discounted price
+        if tax_rate > 0:
+            tax_amount = current_amount * tax_rate
+            current_amount += tax_amount
+            steps.append(f"Tax ({tax_rate*100:.1f}%): +${tax_amount:.2f}")
+            steps.append(f"After tax: ${current_amount:.2f}")
+
+        # Apply tip (usually on pre-tax amount for restaurants)
+        if tip_rate > 0:
+            if tax_rate > 0:
+                # Tip on pre-tax amount (common practice)
+                tip_base = current_amount - tax_amount if tax_rate > 0 else current_amount
+            else:
+                tip_base = current_amount
+
+            tip_amount = tip_base * tip_rate
+            current_amount += tip_amount
+            steps.append(f"Tip ({tip_rate*100:.1f}%): +${tip_amount:.2f}")
+            steps.append(f"Final total: ${current_amount:.2f}")
+
+        # Format response
+        def render():
+            calculation_summary = "\n".join([f"• {step}" for step in steps])
+
+            # Add insights
+            insights = []
+            if discount_rate > 0:
+                savings = original_price * discount_rate
+                savings_percent = (savings / original_price) * 100
+                insights.append(f"You saved ${savings:.2f} ({savings_percent:.1f}%)")
+
+            if tax_rate > 0 and tip_rate > 0:
+                insights.append("Tax and tip were calculated separately as per common practice")
+
+            insight_text = "\n💡 " + " | ".join(insights) if insights else ""
+
+            return f"💰 **Purchase Calculation Result**\n\n" \
+                   f"**Step-by-step breakdown:**\n{calculation_summary}\n" \
+                   f"\n**Final amount to pay: ${current_amount:.2f}**{insight_text}"
+
+        return ToolResult(numeric_value(current_amount), "$", steps=steps, render=render)
+
+    except Exception as e:
+        logger.error(f"Error in solve_discount_problem: {e}")
+        return ToolResult.failure('system', "❌ System Error: Unable to solve discount problem.")
+
+def solve_multi_step_problem_kernel(problem: str) -> ToolResult:
+    """
+    Solve complex multi-step word problems that combine different mathematical operations.
+
+    Args:
+        problem (str): Multi-step problem that might involve:
+            - Sequential calculations
+            - Percentages, discounts, and increases
+            - Rate and time problems
+            - Ratio and proportion problems
+
+    Examples:
+        "John earns $50k/year. He gets 10% raise, then 5% bonus. What's his new salary?"
+        "A car travels 60 mph for 2 hours, then 40 mph for 1.5 hours. Total distance?"
+        "Recipe serves 4 people. Need for 10 people. Original uses 2 cups flour, 3 eggs."
+    """
+    try:
+        logger.info(f"Processing multi-step problem: {problem}")
+
+        scores = keyword_scores(problem)
+
+        # Extract all numbers ("50k" is already 50000)
+        lexed = tokenize(problem)
+        numbers = lexed.numbers
+        percentages = lexed.percents
+
+        steps = []
+        current_value = None
+
+        # Salary/Income problems
+        if 'salary' in scores:
+            if numbers:
+                initial_salary = float(numbers[0])
+                current_value = initial_salary
+                steps.append(f"Initial salary: ${current_value:,.2f}")
+
+                # Apply raises and bonuses
+                for i, percentage in enumerate(percentages):
+                    rate = float(percentage) / 100
+
+                    if 'raise' in scores:
+                        increase = current_value * rate
+                        current_value += increase
+                        steps.append(f"After {percentage:g}% raise: +${increase:,.2f} = ${current_value:,.2f}")
+                    elif 'bonus' in scores:
+                        bonus = current_value * rate
+                        current_value += bonus
+                        steps.append(f"After {percentage:g}% bonus: +${bonus:,.2f} = ${current_value:,.2f}")
+
+        # Distance/Speed/Time problems
+        elif 'travel' in scores:
+            total_distance = 0
+            total_time = 0
+
+            # Extract speed and time pairs
+            i = 0
+            while i < len(numbers) - 1:
+                speed = float(numbers[i])
+                time = float(numbers[i + 1])
+
+                distance = speed * time
+                total_distance += distance
+                total_time += time
+
+                steps.append(f"Segment {i//2 + 1}: {speed} mph × {time} hours = {distance} miles")
+                i += 2
+
+            current_value = total_distance
+            steps.append(f"Total distance: {total_distance} miles")
+            steps.append(f"Total time: {total_time} hours")
+
+            if total_time > 0:
+                avg_speed = total_distance / total_time
+                steps.append(f"Average speed: {avg_speed:.2f} mph")
+
+        # Recipe scaling problems
+        elif 'recipe' in scores:
+            # Find original serving size and target size
+            serving_numbers = [float(n) for n in numbers] if 'servings' in scores else []
+            if len(serving_numbers) >= 2:
+                original_serves = serving_numbers[0]
+                target_serves = serving_numbers[1]
+                scale_factor = target_serves / original_serves
+
+                steps.append(f"Original recipe serves: {original_serves} people")
+                steps.append(f"Need to serve: {target_serves} people")
+                steps.append(f"Scale factor: {target_serves} ÷ {original_serves} = {scale_factor:.2f}")
+
+                # Scale ingredients
+                ingredient_amounts = [float(n) for n in numbers[2:]]
+                for i, amount in enumerate(ingredient_amounts):
+                    new_amount = amount * scale_factor
+                    steps.append(f"Ingredient {i+1}: {amount} × {scale_factor:.2f} = {new_amount:.2f}")
+
+        # If no specific pattern matched, try general sequential calculation
+        else:
+            if numbers and percentages:
+                current_value = float(numbers[0])
+                steps.append(f"Starting value: {current_value}")
+
+                for percentage in percentages:
+                    rate = float(percentage) / 100
+                    if 'increase' in scores:
+                        increase = current_value * rate
+                        current_value += increase
+                        steps.append(f"After {percentage:g}% increase: {current_value:.2f}")
+                    elif 'decrease' in scores:
+                        decrease = current_value * rate
+                        current_value -= decrease
+                        steps.append(f"After {percentage:g}% decrease: {current_value:.2f}")
+
+        if not steps:
+            return ToolResult.failure('not_identified', "❌ Error: Could not identify the problem type or find sufficient information.")
+
+        is_money = 'salary' in scores or bool(lexed.amounts)
+
+        # Format response
+        def render():
+            step_details = "\n".join([f"{i+1}. {step}" for i, step in enumerate(steps)])
+
+            final_answer = ""
+            if current_value is not None:
+                if is_money:
+                    final_answer = f"\n\n**Final Answer: ${current_value:,.2f}**"
+                else:
+                    final_answer = f"\n\n**Final Answer: {current_value:.2f}**"
+
+            return f"🔢 **Multi-Step Problem Solution**\n\n" \
+                   f"**Step-by-step calculation:**\n{step_details}{final_answer}"
+
+        value = None if current_value is None else numeric_value(current_value)
+        return ToolResult(value, "$" if is_money else None, steps=steps, render=render)
+
+    except Exception as e:
+        logger.error(f"Error in solve_multi_step_problem: {e}")
+        return ToolResult.failure('system', "❌ System Error: Unable to solve multi-step problem.")
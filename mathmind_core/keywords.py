@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+
+# Distinct texts whose category scores are kept (tool inputs and questions)
+KEYWORD_CACHE_SIZE = 512
+
+# Problem-type category -> words and phrases (regex fragments) that count towards it.
+# A keyword may feed several categories; matches are whole words only, so "pay"
+# is not found in "repay", nor "off" in "offer"
+KEYWORD_CATEGORIES = {
+    # Geometry
+    'circle': (r'circles?', r'circular', r'round', r'radius', r'diameter'),
+    'rectangle': (r'rectangles?', r'rectangular'),
+    'square': (r'squares?',),
+    'triangle': (r'triangles?', r'triangular'),
+    'area': (r'areas?', r'surface'),
+    'perimeter': (r'perimeters?', r'circumference', r'around'),
+    # "square root" is an operation, not a shape
+    'root': (r'square roots?', r'cube roots?'),
+
+    # Purchases
+    'discount': (r'discounts?', r'discounted', r'off', r'sales?', r'reductions?', r'markdowns?', r'coupons?'),
+    'tax': (r'tax(?:es)?', r'sales tax', r'vat'),
+    'tip': (r'tips?', r'tipped', r'tipping', r'gratuity', r'service charge'),
+    'purchase': (r'prices?', r'costs?', r'bought', r'buys?', r'pay(?:s|ing)?', r'paid'),
+
+    # Multi-step problems
+    'salary': (r'salary', r'salaries', r'earns?', r'earned', r'earning', r'income', r'pay', r'wages?'),
+    'raise': (r'raises?', r'raised', r'increases?', r'increased'),
+    'bonus': (r'bonus(?:es)?',),
+    'travel': (r'mph', r'km/h', r'speeds?', r'distance', r'travel(?:s|ed|led|ing|ling)?', r'hours?', r'drives?',
+               r'drove'),
+    'recipe': (r'recipes?', r'serves', r'servings?', r'people', r'cups?', r'ingredients?'),
+    'servings': (r'serves', r'servings?', r'people'),
+    'increase': (r'increases?', r'increased', r'more'),
+    'decrease': (r'decreases?', r'decreased', r'less'),
+    'sequence': (r'then', r'after that', r'afterwards'),
+}
+
+# Every distinct keyword in one alternation, longest first so "sales tax" wins over "sales"
+_KEYWORDS = sorted({keyword for keywords in KEYWORD_CATEGORIES.values() for keyword in keywords},
+                   key=lambda keyword: (-len(keyword), keyword))
+_KEYWORD_PATTERN = re.compile(r'(?<![a-z])(?:' + '|'.join(_KEYWORDS) + r')(?![a-z])')
+
+# Category -> pattern matching any one of its keywords
+_CATEGORY_PATTERNS = {
+    category: re.compile('|'.join(f'(?:{keyword})' for keyword in keywords))
+    for category, keywords in KEYWORD_CATEGORIES.items()
+}
+
+
+@lru_cache(maxsize=None)
+def _matched_categories(word: str) -> tuple:
+    """Every category with a keyword spelling word, whichever alternative matched it ("pay": purchase and salary)."""
+    return tuple(category for category, pattern in _CATEGORY_PATTERNS.items() if pattern.fullmatch(word))
+
+
+@lru_cache(maxsize=KEYWORD_CACHE_SIZE)
+def keyword_scores(text: str):
+    """
+    Count keyword hits per problem-type category in one pass over the text.
+
+    Args:
+        text (str): Question or tool input (matched case-insensitively)
+
+    Returns:
+        Mapping: Read-only category -> number of hits, for the categories
+        with at least one (a missing category scores 0 via .get)
+    """
+    scores = Counter()
+    for match in _KEYWORD_PATTERN.finditer(text.lower()):
+        scores.update(_matched_categories(match.group(0)))
+    return MappingProxyType(dict(scores))
+
+
+def best_category(scores, categories):
+    """
+    The highest-scoring of the given categories, earlier ones winning ties.
+
+    Returns:
+        str or None: The category, or None when none of them scored
+    """
+    best = max(categories, key=lambda category: scores.get(category, 0))
+    return best if scores.get(best, 0) else None
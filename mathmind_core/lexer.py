@@ -0,0 +1,188 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from mathmind_agent.expression_engine import ALLOWED_FUNCTIONS, ALLOWED_CONSTANTS
+
+# Distinct tool inputs whose token streams are kept (the router and the tool
+# it routes to lex the same string)
+LEXER_CACHE_SIZE = 512
+
+Token = namedtuple('Token', ['kind', 'text', 'value', 'unit', 'start'])
+
+# Result of lexing one input. numbers holds the value of every number, amount
+# and percent in order (what the tools' old "-?\d+\.?\d*" scans found);
+# percents / amounts only those kinds; operators the operator symbols in order
+TokenStream = namedtuple('TokenStream', ['tokens', 'numbers', 'percents', 'amounts', 'operators',
+                                         'functions', 'words'])
+
+NUMERIC_KINDS = frozenset({'number', 'amount', 'percent'})
+
+# Groups of three digits after ",", "'", "_" or a thin space are one number: "1,000,000", "1'000"
+_DIGITS = r"\d{1,3}(?:[,'_\u2009\u202f]\d{3})+(?!\d)(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+"
+_GROUP_SEPARATORS = str.maketrans('', '', ",'_\u2009\u202f")
+
+_TOKEN_PATTERN = re.compile(
+    r"(?:(?P<currency>[$€£¥])\s?)?(?P<digits>" + _DIGITS + r")(?P<exponent>[eE][+-]?\d+)?"
+    r"(?P<suffix>[a-zA-Z]+)?(?P<percent>\s*(?:%|percent\b|per\s+cent\b))?"
+    r"|(?P<operator>\*\*|[-+*/^×÷−=])"
+    r"|(?P<paren>[()\[\]])"
+    r"|(?P<separator>[,;])"
+    r"|(?P<word>[a-zA-Z]+|[π√])"
+    r"|(?P<unknown>\S)"
+)
+
+_OPERATORS = {'**': '^', '×': '*', '÷': '/', '−': '-'}
+_SYMBOL_WORDS = {'π': 'pi', '√': 'sqrt'}
+
+# Magnitude suffixes: "50k"; "$2m" and "$3bn" only on amounts, where "m" is not metres
+_SCALE = {'k': 1e3}
+_AMOUNT_SCALE = {'k': 1e3, 'm': 1e6, 'mn': 1e6, 'b': 1e9, 'bn': 1e9}
+
+# Kinds after which "-" / "+" is a binary operator rather than a sign
+_OPERAND_KINDS = NUMERIC_KINDS | {'constant'}
+
+
+def iter_tokens(text: str):
+    """
+    Lex a tool input into typed tokens, lazily and in one pass.
+
+    Kinds: number, amount (currency-prefixed number, unit is the symbol),
+    percent, operator (+ - * / ^ =, normalized from ×, ÷, −, **), paren,
+    separator (, ;), function / constant (names the expression engine knows,
+    including √ and π), word (lowercased) and unknown (any other character,
+    e.g. "!" or "#", kept so no consumer mistakes the input for something
+    simpler than it is). A number's unit is the letters
+    written straight after it ("7cm"); "k" (and "m"/"bn" on amounts) scale it
+    instead. A "-" or "+" directly before a digit is a sign only where no
+    operand precedes it, so "10-3" is 10 minus 3, not 10 and -3.
+
+    Args:
+        text (str): Raw tool input
+
+    Yields:
+        Token: In input order; only the previous token is held in memory
+    """
+    previous = None
+    pending_sign = None  # Sign token held back until we know whether a number follows it
+
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        start = match.start()
+
+        if match.group('digits') is not None:
+            currency = match.group('currency')
+            value = float(match.group('digits').translate(_GROUP_SEPARATORS) + (match.group('exponent') or ''))
+            unit = match.group('suffix')
+            scale = (_AMOUNT_SCALE if currency else _SCALE).get(unit.lower()) if unit else None
+            if scale:
+                value, unit = value * scale, None
+
+            if pending_sign is not None:
+                if pending_sign.start + 1 == start:
+                    value, start = (-value if pending_sign.value == '-' else value), pending_sign.start
+                else:
+                    yield pending_sign
+                pending_sign = None
+            kind = 'percent' if match.group('percent') else 'amount' if currency else 'number'
+            previous = Token(kind, text[start:match.end()].strip(), value, currency or unit, start)
+            yield previous
+            continue
+
+        raw = value = match.group(kind)
+        if kind == 'operator':
+            value = _OPERATORS.get(value, value)
+        elif kind == 'word':
+            value = _SYMBOL_WORDS.get(value, value.lower())
+            if value in ALLOWED_FUNCTIONS:
+                kind = 'function'
+            elif value in ALLOWED_CONSTANTS:
+                kind = 'constant'
+
+        if pending_sign is not None:
+            yield pending_sign
+            pending_sign = None
+        token = Token(kind, raw, value, None, start)
+        operand_before = previous is not None and (previous.kind in _OPERAND_KINDS or previous.value in (')', ']'))
+        if value in ('-', '+') and not operand_before:
+            pending_sign = token
+        else:
+            yield token
+        previous = token
+
+    if pending_sign is not None:
+        yield pending_sign
+
+
+def iter_numbers(text: str):
+    """Values of the numbers, amounts and percents in a text, lazily (see iter_tokens)."""
+    return (token.value for token in iter_tokens(text) if token.kind in NUMERIC_KINDS)
+
+
+@lru_cache(maxsize=LEXER_CACHE_SIZE)
+def tokenize(text: str) -> TokenStream:
+    """
+    Lex a tool input into typed tokens (iter_tokens) with per-kind views.
+
+    Args:
+        text (str): Raw tool input
+
+    Returns:
+        TokenStream: Tokens plus the per-kind views the tools use
+    """
+    tokens = tuple(iter_tokens(text))
+    return TokenStream(
+        tokens=tokens,
+        numbers=tuple(token.value for token in tokens if token.kind in NUMERIC_KINDS),
+        percents=tuple(token.value for token in tokens if token.kind == 'percent'),
+        amounts=tuple(token.value for token in tokens if token.kind == 'amount'),
+        operators=tuple(token.value for token in tokens if token.kind == 'operator'),
+        functions=frozenset(token.value for token in tokens if token.kind == 'function'),
+        words=frozenset(token.value for token in tokens if token.kind == 'word'),
+    )
+
+
+def expression_source(text: str) -> str:
+    """
+    The text with its numbers spelled the way the expression engine reads them: "1,000" -> "1000".
+
+    Only numbers written with digit-group separators change; everything else is kept as typed.
+    """
+    pieces, end = [], 0
+    for token in tokenize(text).tokens:
+        if token.kind in NUMERIC_KINDS and token.text != token.text.translate(_GROUP_SEPARATORS):
+            pieces += [text[end:token.start], token.text.translate(_GROUP_SEPARATORS)]
+            end = token.start + len(token.text)
+    return ''.join(pieces) + text[end:]
+
+
+def split_tokens(tokens, kind: str = 'separator'):
+    """Split a token sequence at tokens of the given kind (empty groups dropped)."""
+    groups, group = [], []
+    for token in tokens:
+        if token.kind == kind:
+            if group:
+                groups.append(tuple(group))
+            group = []
+        else:
+            group.append(token)
+    if group:
+        groups.append(tuple(group))
+    return groups
+
+
+def function_argument(tokens, name: str):
+    """
+    Value of the number right after a function name: "sqrt(16)", "sqrt 16", "√16".
+
+    Returns:
+        float or None: The argument, or None when the function is absent or not
+        applied to a plain number
+    """
+    for index, token in enumerate(tokens):
+        if token.kind == 'function' and token.value == name:
+            rest = tokens[index + 1:index + 3]
+            if rest and rest[0].value == '(':
+                rest = rest[1:]
+            return rest[0].value if rest and rest[0].kind == 'number' else None
+    return None
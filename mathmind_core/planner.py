@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+
+from mathmind_agent.tool_results import result_value, is_error, direct_answer, display_text, format_value
+
+logger = logging.getLogger(__name__)
+
+# Plans with more steps than this are rejected in favour of the agent loop
+PLAN_MAX_STEPS = int(os.getenv("MATHMIND_PLAN_MAX_STEPS", "12"))
+
+_STEP_ID_PATTERN = re.compile(r'^[A-Za-z_]\w{0,15}$')
+_REFERENCE_PATTERN = re.compile(r'\{([A-Za-z_]\w*)\}')
+
+PlanStep = namedtuple('PlanStep', ['id', 'tool', 'input', 'depends_on'])
+
+
+class PlanError(ValueError):
+    """Raised when a plan cannot be parsed, validated or carried out; callers fall back to the agent loop."""
+
+
+def describe_tools(tools) -> str:
+    """One "- name: summary" line per tool, from the first line of its description."""
+    lines = []
+    for math_tool in tools:
+        summary = next((line.strip() for line in math_tool.description.splitlines() if line.strip()), "")
+        lines.append(f"- {math_tool.name}: {summary}")
+    return "\n".join(lines)
+
+
+def parse_plan(text: str, tool_names) -> tuple:
+    """
+    Parse and validate the planner's JSON reply.
+
+    Args:
+        text (str): Raw model output, a JSON object optionally wrapped in a code fence
+        tool_names: Names of the tools steps may call
+
+    Returns:
+        tuple: (list of PlanStep in execution order, answer template or "")
+
+    Raises:
+        PlanError: Malformed JSON, unknown tools, bad references or an empty/oversized plan
+    """
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise PlanError("Planner reply contains no JSON object")
+    try:
+        raw = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise PlanError(f"Planner reply is not valid JSON: {e}")
+
+    raw_steps = raw.get('steps') if isinstance(raw, dict) else None
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise PlanError("Planner returned no steps")
+    if len(raw_steps) > PLAN_MAX_STEPS:
+        raise PlanError(f"Plan has {len(raw_steps)} steps (limit {PLAN_MAX_STEPS})")
+
+    steps = []
+    seen = set()
+    for raw_step in raw_steps:
+        if not isinstance(raw_step, dict):
+            raise PlanError(f"Plan step is not an object: {raw_step!r}")
+        step_id = str(raw_step.get('id', ''))
+        tool_name = raw_step.get('tool')
+        tool_input = raw_step.get('input')
+
+        if not _STEP_ID_PATTERN.match(step_id) or step_id in seen:
+            raise PlanError(f"Invalid or duplicate step id: {step_id!r}")
+        if tool_name not in tool_names:
+            raise PlanError(f"Step {step_id} uses unknown tool {tool_name!r}")
+        if isinstance(tool_input, (int, float)):
+            tool_input = str(tool_input)
+        if not isinstance(tool_input, str) or not tool_input.strip():
+            raise PlanError(f"Step {step_id} has no input")
+
+        # Steps may only use results of steps listed before them, which keeps the plan acyclic
+        depends_on = tuple(dict.fromkeys(_REFERENCE_PATTERN.findall(tool_input)))
+        unknown = [name for name in depends_on if name not in seen]
+        if unknown:
+            raise PlanError(f"Step {step_id} refers to unknown or later steps: {', '.join(unknown)}")
+
+        seen.add(step_id)
+        steps.append(PlanStep(step_id, tool_name, tool_input.strip(), depends_on))
+
+    answer = raw.get('answer') or ""
+    if not isinstance(answer, str):
+        raise PlanError("Plan answer must be a string")
+    unknown = [name for name in _REFERENCE_PATTERN.findall(answer) if name not in seen]
+    if unknown:
+        raise PlanError(f"Plan answer refers to unknown steps: {', '.join(unknown)}")
+
+    return steps, answer.strip()
+
+
+def _operand(value: str) -> str:
+    """A step's number inside a later input: parenthesized when negative so "{s1}^2" stays right."""
+    return f"({value})" if value.startswith('-') else value
+
+
+def _display(value: str) -> str:
+    """A step's number in the answer text, rounded for reading."""
+    try:
+        return format_value(float(value))
+    except ValueError:
+        return value
+
+
+def _substitute(template: str, values: dict, render=_operand) -> str:
+    return _REFERENCE_PATTERN.sub(lambda match: render(values[match.group(1)]), template)
+
+
+async def _run_step(step, tool_input, tools_by_name):
+    from mathmind_agent.concurrent_executor import tool_timeout
+
+    timeout = tool_timeout(step.tool)
+    try:
+        output = await asyncio.wait_for(tools_by_name[step.tool].ainvoke(tool_input), timeout)
+    except asyncio.TimeoutError:
+        raise PlanError(f"Step {step.id} ({step.tool}) did not finish within {timeout:g} seconds")
+    return output
+
+
+async def aexecute_plan(steps, tools_by_name, outputs: dict, values: dict):
+    """
+    Run a validated plan, dispatching every step whose inputs are ready at once.
+
+    Step outputs and their headline numbers are stored in outputs / values
+    (keyed by step id) as they complete.
+
+    Yields:
+        dict: {"type": "tool_start", ...} and {"type": "tool_end", ...} events, in plan order per wave
+
+    Raises:
+        PlanError: A step failed, timed out, or a referenced step produced no number
+    """
+    remaining = list(steps)
+    while remaining:
+        wave = [step for step in remaining if all(name in outputs for name in step.depends_on)]
+        remaining = [step for step in remaining if step not in wave]
+
+        inputs = []
+        for step in wave:
+            missing = [name for name in step.depends_on if values.get(name) is None]
+            if missing:
+                raise PlanError(f"Step {step.id} needs a number from {', '.join(missing)}, which produced none")
+            inputs.append(_substitute(step.input, values))
+            yield {"type": "tool_start", "tool": step.tool, "input": inputs[-1]}
+
+        results = await asyncio.gather(*(_run_step(step, tool_input, tools_by_name)
+                                         for step, tool_input in zip(wave, inputs)))
+
+        for step, output in zip(wave, results):
+            yield {"type": "tool_end", "tool": step.tool, "output": display_text(output)}
+            if is_error(output):
+                raise PlanError(f"Step {step.id} ({step.tool}) failed: {str(output).strip().splitlines()[0]}")
+            outputs[step.id] = output
+            values[step.id] = result_value(output)
+
+
+async def aplan_events(question: str, llm, tools):
+    """
+    Answer a question with one planning call, local tool execution and at most one answer call.
+
+    Args:
+        question (str): User question
+        llm: Chat model used for the planning and answer calls
+        tools: Tools the plan may call (get_enhanced_math_tools)
+
+    Yields:
+        dict: The same events as agent_executor.astream_events
+            (tool_start, tool_end, token, final)
+
+    Raises:
+        PlanError: No usable plan; nothing but tool events has been yielded
+    """
+    from mathmind_agent.prompts import get_planner_prompt, get_plan_answer_prompt
+
+    tools_by_name = {math_tool.name: math_tool for math_tool in tools}
+
+    planner = get_planner_prompt() | llm.bind(response_format={"type": "json_object"})
+    reply = await planner.ainvoke({"input": question, "tool_list": describe_tools(tools),
+                                   "max_steps": PLAN_MAX_STEPS})
+    steps, answer = parse_plan(str(reply.content), tools_by_name)
+    logger.info(f"Planned {len(steps)} tool call(s) for: {question}")
+
+    outputs, values = {}, {}
+    async for event in aexecute_plan(steps, tools_by_name, outputs, values):
+        yield event
+
+    # A template answer whose references all resolved needs no further LLM call
+    if answer and all(values.get(name) is not None for name in _REFERENCE_PATTERN.findall(answer)):
+        yield {"type": "final", "text": _substitute(answer, values, _display)}
+        return
+
+    # So does a one-step plan whose tool already gave a complete answer
+    if len(steps) == 1:
+        text = direct_answer(steps[0].tool, outputs[steps[0].id])
+        if text is not None:
+            yield {"type": "final", "text": text}
+            return
+
+    results = "\n\n".join(f"[{step.id}] {step.tool}({step.input}):\n{outputs[step.id]}" for step in steps)
+    chunks = []
+    async for chunk in (get_plan_answer_prompt() | llm).astream({"input": question, "results": results}):
+        if isinstance(chunk.content, str) and chunk.content:
+            chunks.append(chunk.content)
+            yield {"type": "token", "text": chunk.content}
+    yield {"type": "final", "text": "".join(chunks)}
+
+
+async def asolve(question: str, llm, tools) -> dict:
+    """
+    Plan-mode counterpart of AgentExecutor.ainvoke.
+
+    Returns:
+        dict: {"input": question, "output": final answer, "tool_calls": number of tools run,
+        "complete": True} (a failed step raises PlanError instead)
+
+    Raises:
+        PlanError: No usable plan (see aplan_events)
+    """
+    output = None
+    tool_calls = 0
+    async for event in aplan_events(question, llm, tools):
+        if event["type"] == "tool_end":
+            tool_calls += 1
+        elif event["type"] == "final":
+            output = event["text"]
+    return {"input": question, "output": output, "tool_calls": tool_calls, "complete": True}
@@ -1,18 +1,17 @@
-from langchain_core.prompts import ChatPromptTemplate
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Bump whenever enhanced_prompt changes so cached answers are not reused
+PROMPT_VERSION = "2"
+
 # Enhanced system prompt for word problems
-enhanced_prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are an advanced math assistant that solves complex word problems accurately and clearly.
+SYSTEM_PROMPT = """You are an advanced math assistant that solves complex word problems accurately and clearly.
 
 Available tools:
-- calculate_expression: For direct mathematical expressions
-- solve_discount_problem: For shopping, tax, tip, and discount problems
-- solve_geometry_word_problem: For area, perimeter, and geometry problems
-- solve_multi_step_problem: For complex problems with multiple steps
+{tool_list}
 
 Process:
 1. Read the problem carefully and identify all given information
@@ -32,7 +31,91 @@ Present your solution in this format:
 - Problem understanding: [brief summary]
 - Solution approach: [method/tool used]
 - Calculation: [clean work shown]
-- Final answer: [clear result with proper units]"""),
-    ("human", "{input}"),
-    ("placeholder", "{agent_scratchpad}")
-])
\ No newline at end of file
+- Final answer: [clear result with proper units]"""
+
+
+# Tool hints listed in SYSTEM_PROMPT for the tools offered with the question
+TOOL_HINTS = {
+    'calculate_expression': "For direct mathematical expressions",
+    'evaluate_expression_batch': "For evaluating one formula over many values or a data file",
+    'solve_discount_problem': "For shopping, tax, tip, and discount problems",
+    'solve_geometry_word_problem': "For area, perimeter, and geometry problems",
+    'solve_multi_step_problem': "For complex problems with multiple steps",
+}
+
+# Plan mode: one call that lays out every tool call up front (see planner.py)
+PLANNER_SYSTEM_PROMPT = """You plan the solution of a math problem as a small set of tool calls. You do not solve it yourself.
+
+Available tools (the input is always a single string):
+{tool_list}
+
+Reply with one JSON object and nothing else:
+{{"steps": [{{"id": "s1", "tool": "<tool name>", "input": "<tool input>"}}, ...],
+  "answer": "<final answer sentence>"}}
+
+Rules:
+- Step ids are short names such as s1, s2, total
+- Write {{id}} inside a later step's input to use the numeric result of an earlier step,
+  e.g. {{"id": "s3", "tool": "calculate_expression", "input": "{{s1}} + {{s2}}"}}
+- Steps that do not refer to each other run at the same time, so keep them independent where possible
+- Prefer calculate_expression for intermediate values; each referenced step must produce one number
+- "answer" states the final result with units and may refer to steps the same way,
+  e.g. "Total distance: {{s3}} miles". Leave it empty if the result needs explanation
+- Use as few steps as possible (at most {max_steps})
+- If the problem cannot be solved with these tools, reply {{"steps": []}}"""
+
+# Plan mode: optional last call turning step results into the reply
+PLAN_ANSWER_SYSTEM_PROMPT = """You are a math assistant. The calculations for the user's problem have already been done; their results are below.
+Do not recalculate anything. Write a short, clear answer using these results, with proper units.
+
+Results:
+{results}"""
+
+
+@lru_cache(maxsize=None)
+def get_planner_prompt():
+    """Build the plan-mode planning ChatPromptTemplate (imports LangChain on first call)."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        ("system", PLANNER_SYSTEM_PROMPT),
+        ("human", "{input}")
+    ])
+
+
+@lru_cache(maxsize=None)
+def get_plan_answer_prompt():
+    """Build the plan-mode answer ChatPromptTemplate (imports LangChain on first call)."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        ("system", PLAN_ANSWER_SYSTEM_PROMPT),
+        ("human", "{input}")
+    ])
+
+
+@lru_cache(maxsize=None)
+def get_enhanced_prompt(tool_names: tuple = None):
+    """
+    Build the agent ChatPromptTemplate (imports LangChain on first call).
+
+    Args:
+        tool_names (tuple): Tools offered with this prompt (default: all); only
+            their hints are listed in the system prompt
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    tool_list = "\n".join(f"- {name}: {hint}" for name, hint in TOOL_HINTS.items()
+                          if tool_names is None or name in tool_names)
+    return ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        ("human", "{input}"),
+        ("placeholder", "{agent_scratchpad}")
+    ]).partial(tool_list=tool_list)
+
+
+def __getattr__(name):
+    # Keeps `from mathmind_agent.prompts import enhanced_prompt` working lazily
+    if name == "enhanced_prompt":
+        return get_enhanced_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
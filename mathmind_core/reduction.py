@@ -0,0 +1,124 @@
+import math
+import os
+from collections import deque, namedtuple
+
+from mathmind_agent.cost_model import CostEstimate
+
+# Arithmetic inputs longer than this (in characters) are reduced as a stream
+STREAMING_THRESHOLD = int(os.getenv("MATHMIND_STREAMING_THRESHOLD", "2000"))
+# Operands kept for display at each end of a streamed input
+SUMMARY_OPERANDS = int(os.getenv("MATHMIND_SUMMARY_OPERANDS", "3"))
+
+_LOG10_2 = math.log10(2)
+
+Reduction = namedtuple('Reduction', ['count', 'head', 'tail', 'result', 'estimate'])
+Reduction.__doc__ = """
+Outcome of reducing a stream of operands in constant memory.
+
+Attributes:
+    count (int): Number of operands
+    head (list): The first SUMMARY_OPERANDS operands
+    tail (list): The last SUMMARY_OPERANDS operands not already in head
+    result (float or None): The result, or None when it is beyond float range
+    estimate (CostEstimate or None): Log-space result when result is None
+"""
+
+
+class _Recorder:
+    """Passes operands through while counting them and keeping both ends."""
+
+    def __init__(self, values, keep):
+        self._values = values
+        self.count = 0
+        self.head = []
+        self.tail = deque(maxlen=keep)
+        self._keep = keep
+
+    def __iter__(self):
+        for value in self._values:
+            self.count += 1
+            if len(self.head) < self._keep:
+                self.head.append(value)
+            else:
+                self.tail.append(value)
+            yield value
+
+
+class _Product:
+    """Running product as mantissa * 2**exponent, so it cannot overflow or underflow."""
+
+    def __init__(self):
+        self.mantissa = 1.0
+        self.exponent = 0
+
+    def multiply(self, value):
+        mantissa, exponent = math.frexp(value)
+        self.mantissa, shift = math.frexp(self.mantissa * mantissa)
+        self.exponent += exponent + shift
+
+    def divide(self, value):
+        mantissa, exponent = math.frexp(value)
+        self.mantissa, shift = math.frexp(self.mantissa / mantissa)
+        self.exponent += shift - exponent
+
+    def value(self):
+        """(float or None, CostEstimate or None): the product, or its log-space estimate beyond float range."""
+        if self.mantissa == 0:
+            return 0.0, None
+        try:
+            result = math.ldexp(self.mantissa, self.exponent)
+            if result != 0 and not math.isinf(result):
+                return result, None
+        except OverflowError:
+            pass
+        log10 = math.log10(abs(self.mantissa)) + self.exponent * _LOG10_2
+        return None, CostEstimate(1 if self.mantissa > 0 else -1, log10, log10)
+
+
+def reduce_operands(operation: str, values, keep: int = SUMMARY_OPERANDS) -> Reduction:
+    """
+    Fold a stream of operands left to right without materializing it.
+
+    Sums use math.fsum (correctly rounded, so integers stay exact up to 2**53);
+    products and quotients are tracked as mantissa and binary exponent, so
+    a million factors can neither overflow nor underflow on the way.
+
+    Args:
+        operation (str): 'add', 'subtract', 'multiply' or 'divide'
+        values: Iterable of floats (e.g. lexer.iter_numbers)
+        keep (int): Operands kept at each end for display
+
+    Returns:
+        Reduction: Count, head/tail operands and the result
+
+    Raises:
+        ZeroDivisionError: A divisor is zero
+        ValueError: Unknown operation
+    """
+    recorder = _Recorder(values, keep)
+
+    if operation == 'add':
+        result = math.fsum(recorder)
+        return Reduction(recorder.count, recorder.head, list(recorder.tail), result, None)
+
+    if operation == 'subtract':
+        def signed(operands):
+            for index, value in enumerate(operands):
+                yield value if index == 0 else -value
+        result = math.fsum(signed(recorder))
+        return Reduction(recorder.count, recorder.head, list(recorder.tail), result, None)
+
+    if operation not in ('multiply', 'divide'):
+        raise ValueError(f"Unknown operation: {operation}")
+
+    product = _Product()
+    for index, value in enumerate(recorder):
+        if operation == 'multiply' or index == 0:
+            product.multiply(value)
+        elif value == 0:
+            raise ZeroDivisionError("division by zero")
+        else:
+            product.divide(value)
+
+    result, estimate = product.value()
+    return Reduction(recorder.count, recorder.head, list(recorder.tail), result, estimate)
@@ -0,0 +1,219 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits; only the timeout applies there
+    resource = None
+
+# Pool configuration (overridable through the environment)
+SANDBOX_ENABLED = os.getenv("MATHMIND_SANDBOX", "1") != "0"
+SANDBOX_WORKERS = int(os.getenv("MATHMIND_SANDBOX_WORKERS", "2"))
+EVAL_TIMEOUT_SECONDS = float(os.getenv("MATHMIND_EVAL_TIMEOUT", "2.0"))
+EVAL_MEMORY_LIMIT_MB = int(os.getenv("MATHMIND_EVAL_MEMORY_MB", "256"))
+
+
+class EvaluationTimeout(Exception):
+    """Raised when an evaluation exceeds its wall-clock budget."""
+
+
+class EvaluationFailed(Exception):
+    """Raised when a worker dies without returning a result."""
+
+
+def _task_expression(source, bindings):
+    from mathmind_agent.expression_engine import compile_expression
+    return compile_expression(source)(**bindings)
+
+
+def _task_power(base, exponent):
+    return base ** exponent
+
+
+# Only these callables may run inside a worker
+_TASKS = {
+    'expression': _task_expression,
+    'power': _task_power,
+}
+
+# Exceptions re-raised in the parent with their original type
+_FORWARDED_ERRORS = {
+    'ZeroDivisionError': ZeroDivisionError,
+    'OverflowError': OverflowError,
+    'MemoryError': MemoryError,
+    'ValueError': ValueError,
+    'TypeError': TypeError,
+    'SyntaxError': SyntaxError,
+}
+
+
+def _worker_main(conn, memory_limit_mb):
+    """Worker loop: apply the memory cap once, then serve tasks until the pipe closes."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if resource is not None and memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not apply sandbox memory limit: {e}")
+
+    while True:
+        try:
+            task, args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        try:
+            reply = ('ok', _TASKS[task](*args))
+        except MemoryError:
+            reply = ('error', 'MemoryError', 'Evaluation exceeded the memory limit')
+        except Exception as e:
+            error_type = type(e).__name__
+            if error_type == 'ExpressionError':
+                error_type = 'ValueError'
+            reply = ('error', error_type, str(e))
+
+        try:
+            conn.send(reply)
+        except MemoryError:
+            conn.send(('error', 'MemoryError', 'Result too large to return'))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class EvaluationPool:
+    """
+    A warm pool of worker processes that run evaluations with a timeout and memory cap.
+
+    A worker that times out or dies is killed and replaced, so one explosive
+    expression never blocks the server process or other sessions.
+    """
+
+    def __init__(self, workers=SANDBOX_WORKERS, timeout=EVAL_TIMEOUT_SECONDS,
+                 memory_limit_mb=EVAL_MEMORY_LIMIT_MB):
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._idle = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._workers = set()
+
+        for _ in range(max(1, workers)):
+            self._release(self._spawn())
+
+        logger.info(f"Started evaluation pool with {max(1, workers)} workers")
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.memory_limit_mb)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    def _replace(self, worker):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.kill()
+        if not self._closed:
+            self._release(self._spawn())
+
+    def run(self, task, *args, timeout=None):
+        """
+        Run a whitelisted task in a worker process.
+
+        Args:
+            task (str): Task name ('expression' or 'power')
+            *args: Picklable task arguments
+            timeout (float): Wall-clock limit in seconds (defaults to the pool timeout)
+
+        Returns:
+            The task result
+
+        Raises:
+            EvaluationTimeout: If the task does not finish in time
+            EvaluationFailed: If the worker crashes
+        """
+        if self._closed:
+            raise RuntimeError("Evaluation pool is closed")
+
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+
+        try:
+            worker.conn.send((task, args))
+            if not worker.conn.poll(timeout):
+                logger.warning(f"Evaluation timed out after {timeout}s; replacing worker")
+                self._replace(worker)
+                raise EvaluationTimeout(f"Evaluation exceeded {timeout:g} seconds")
+            reply = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            logger.warning(f"Evaluation worker died: {e}; replacing worker")
+            self._replace(worker)
+            raise EvaluationFailed("Evaluation worker crashed") from e
+
+        self._release(worker)
+
+        if reply[0] == 'ok':
+            return reply[1]
+        _, error_type, message = reply
+        raise _FORWARDED_ERRORS.get(error_type, EvaluationFailed)(message)
+
+    def close(self):
+        """Stop every worker process."""
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, set()
+        for worker in workers:
+            worker.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_evaluation_pool():
+    """Return the process-wide evaluation pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = EvaluationPool()
+                atexit.register(_pool.close)
+    return _pool
+
+
+def evaluate_expression(source: str, **bindings):
+    """Evaluate an expression in the sandbox (or in-process when MATHMIND_SANDBOX=0)."""
+    if not SANDBOX_ENABLED:
+        return _task_expression(source, bindings)
+    return get_evaluation_pool().run('expression', source, bindings)
+
+
+def power(base, exponent):
+    """Compute base ** exponent in the sandbox (or in-process when MATHMIND_SANDBOX=0)."""
+    if not SANDBOX_ENABLED:
+        return _task_power(base, exponent)
+    return get_evaluation_pool().run('power', base, exponent)
@@ -0,0 +1,323 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Provider budgets (0 disables a bucket); defaults match Groq's free tier
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("MATHMIND_LLM_RPM", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("MATHMIND_LLM_TPM", "6000"))
+# Tokens charged up front per request (real usage is synced from response headers)
+LLM_ESTIMATED_TOKENS = int(os.getenv("MATHMIND_LLM_ESTIMATED_TOKENS", "1000"))
+
+# Priority classes, most urgent first, with the queue depth beyond which new requests are shed
+PRIORITIES = {"interactive": 0, "batch": 1}
+MAX_QUEUE_DEPTH = {
+    "interactive": int(os.getenv("MATHMIND_QUEUE_DEPTH_INTERACTIVE", "64")),
+    "batch": int(os.getenv("MATHMIND_QUEUE_DEPTH_BATCH", "10000")),
+}
+
+# Number of recent queue waits kept per priority for percentile reporting
+_WAIT_HISTORY = 1000
+
+request_priority = contextvars.ContextVar("mathmind_request_priority", default="interactive")
+_queue_waits = contextvars.ContextVar("mathmind_queue_waits", default=None)
+
+Ticket = namedtuple("Ticket", ["priority", "sequence", "queue_wait"])
+Ticket.__doc__ = """
+Admission granted by the scheduler.
+
+Attributes:
+    priority (str): Priority class the request ran under
+    sequence (int): Queue position; pass it back when retrying to keep the place in line
+    queue_wait (float): Seconds spent waiting for admission
+"""
+
+
+class SchedulerOverloaded(RuntimeError):
+    """Raised when a priority class queue is full and the request is shed."""
+
+
+class SchedulerTimeout(TimeoutError):
+    """Raised when a request is not admitted before its timeout."""
+
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units, allowing a burst of one minute's worth."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount, now):
+        """Seconds until `amount` units are available (requests larger than the bucket wait for a full one)."""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount, now):
+        if self.enabled:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+    def limit(self, remaining, now):
+        """Never believe we have more budget than the provider says is left."""
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.level, float(remaining))
+
+
+class _Waiter:
+    __slots__ = ("key", "priority", "tokens", "enqueued", "wake")
+
+    def __init__(self, key, priority, tokens, wake):
+        self.key = key
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.wake = wake
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+class RateLimitScheduler:
+    """
+    Process-wide admission control for LLM requests.
+
+    Requests wait in one priority queue (interactive ahead of batch, FIFO
+    within a class) and the head is admitted only when both the
+    requests/minute and tokens/minute buckets can cover it, so bursts are
+    smoothed locally instead of turning into provider 429s. A full queue
+    rejects new requests immediately, and a 429 pauses admission for
+    everyone until Retry-After has passed. Sync and async callers on any
+    thread or event loop share the same queue.
+    """
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_queue_depth=None, estimated_tokens=LLM_ESTIMATED_TOKENS):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue_depth = dict(MAX_QUEUE_DEPTH, **(max_queue_depth or {}))
+        self.estimated_tokens = estimated_tokens
+        self.admitted = {name: 0 for name in PRIORITIES}
+        self.shed = {name: 0 for name in PRIORITIES}
+        self._waits = {name: deque(maxlen=_WAIT_HISTORY) for name in PRIORITIES}
+        self._queue = []
+        self._depth = {name: 0 for name in PRIORITIES}
+        self._paused_until = 0.0
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _enqueue(self, priority, tokens, sequence, wake):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}' (use one of {', '.join(PRIORITIES)})")
+        with self._lock:
+            # Retries keep their original place in line and are never shed
+            if sequence is None:
+                if self._depth[priority] >= self.max_queue_depth[priority]:
+                    self.shed[priority] += 1
+                    raise SchedulerOverloaded(f"Too many queued {priority} requests, try again shortly")
+                sequence = next(self._sequence)
+            waiter = _Waiter((PRIORITIES[priority], sequence), priority,
+                             self.estimated_tokens if tokens is None else tokens, wake)
+            heapq.heappush(self._queue, waiter)
+            self._depth[priority] += 1
+            if self._queue[0] is waiter:
+                waiter.wake()
+        return waiter
+
+    def _try_admit(self, waiter):
+        """Admit the waiter if it is at the head and budgets allow (returns a Ticket), else seconds to wait (None = not head)."""
+        with self._lock:
+            if self._queue[0] is not waiter:
+                return None
+            now = time.monotonic()
+            wait = max(self._paused_until - now,
+                       self.requests.time_until(1, now),
+                       self.tokens.time_until(waiter.tokens, now))
+            if wait > 0:
+                return wait
+
+            self.requests.take(1, now)
+            self.tokens.take(waiter.tokens, now)
+            self._remove(waiter)
+            queue_wait = now - waiter.enqueued
+            self.admitted[waiter.priority] += 1
+            self._waits[waiter.priority].append(queue_wait)
+
+        sink = _queue_waits.get()
+        if sink is not None:
+            sink.append(queue_wait)
+        if queue_wait > 1:
+            logger.info(f"LLM request ({waiter.priority}) waited {queue_wait:.2f}s for admission")
+        return Ticket(waiter.priority, waiter.key[1], queue_wait)
+
+    def _remove(self, waiter):
+        # Caller holds the lock
+        was_head = self._queue[0] is waiter
+        self._queue.remove(waiter)
+        heapq.heapify(self._queue)
+        self._depth[waiter.priority] -= 1
+        if was_head and self._queue:
+            self._queue[0].wake()
+
+    def _abandon(self, waiter):
+        with self._lock:
+            if waiter in self._queue:
+                self._remove(waiter)
+
+    def acquire(self, priority=None, tokens=None, timeout=None, sequence=None) -> Ticket:
+        """
+        Block until the request may be sent.
+
+        Args:
+            priority (str): "interactive" or "batch" (defaults to request_priority)
+            tokens (int): Expected token usage (defaults to estimated_tokens)
+            timeout (float): Give up after this many seconds
+            sequence (int): Queue position from an earlier ticket, when retrying
+
+        Returns:
+            Ticket: Admission details including the queue wait
+
+        Raises:
+            SchedulerOverloaded: The priority class queue is full
+            SchedulerTimeout: Not admitted within timeout
+        """
+        woken = threading.Event()
+        waiter = self._enqueue(priority or request_priority.get(), tokens, sequence, woken.set)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                woken.clear()
+                wait = self._try_admit(waiter)
+                if isinstance(wait, Ticket):
+                    return wait
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SchedulerTimeout("Timed out waiting for LLM rate limit budget")
+                    wait = remaining if wait is None else min(wait, remaining)
+                woken.wait(wait)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    async def acquire_async(self, priority=None, tokens=None, timeout=None, sequence=None) -> Ticket:
+        """Async counterpart of acquire; waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+        waiter = self._enqueue(priority or request_priority.get(), tokens, sequence,
+                               lambda: loop.call_soon_threadsafe(woken.set))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                woken.clear()
+                wait = self._try_admit(waiter)
+                if isinstance(wait, Ticket):
+                    return wait
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SchedulerTimeout("Timed out waiting for LLM rate limit budget")
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    await asyncio.wait_for(woken.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def pause(self, seconds):
+        """Stop admitting anyone for `seconds` (after a provider 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            if self._queue:
+                self._queue[0].wake()
+        logger.warning(f"LLM rate limited by provider, pausing admissions for {seconds:.2f}s")
+
+    def observe(self, headers):
+        """Sync the token bucket with the provider's x-ratelimit-remaining-tokens header."""
+        remaining = headers.get("x-ratelimit-remaining-tokens")
+        if remaining is None:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        with self._lock:
+            self.tokens.limit(remaining, time.monotonic())
+
+    def stats(self) -> dict:
+        """Queue depth, admitted/shed counts and p50/p99 queue wait (ms) per priority."""
+        with self._lock:
+            report = {}
+            for name in PRIORITIES:
+                waits = sorted(self._waits[name])
+                report[name] = {
+                    "queued": self._depth[name],
+                    "admitted": self.admitted[name],
+                    "shed": self.shed[name],
+                    "p50_wait_ms": _percentile(waits, 50),
+                    "p99_wait_ms": _percentile(waits, 99),
+                }
+        return report
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[max(0, index)] * 1000, 1)
+
+
+@contextlib.contextmanager
+def request_context(priority="interactive"):
+    """
+    Run LLM requests under a priority class and collect their queue waits.
+
+    Yields:
+        list: Queue wait (seconds) of every request admitted inside the block
+    """
+    waits = []
+    priority_token = request_priority.set(priority)
+    waits_token = _queue_waits.set(waits)
+    try:
+        yield waits
+    finally:
+        _queue_waits.reset(waits_token)
+        request_priority.reset(priority_token)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """The process-wide scheduler shared by every LLM client."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimitScheduler()
+    return _scheduler
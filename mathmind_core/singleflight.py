@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+
+from mathmind_agent.answer_cache import canonicalize_question
+
+logger = logging.getLogger(__name__)
+
+# Coalescing configuration (overridable through the environment)
+SINGLEFLIGHT_ENABLED = os.getenv("MATHMIND_SINGLEFLIGHT", "1") != "0"
+# Shared by every worker process on the host; empty keeps coalescing in-process
+SINGLEFLIGHT_PATH = os.getenv("MATHMIND_SINGLEFLIGHT_PATH", ".mathmind_flights.sqlite3")
+# A leader that stops renewing its lease for this long is presumed dead
+SINGLEFLIGHT_LEASE_SECONDS = float(os.getenv("MATHMIND_SINGLEFLIGHT_LEASE", "30"))
+SINGLEFLIGHT_POLL_SECONDS = 0.25
+# Finished flights are kept briefly so slow followers can collect the result
+_FINISHED_RETENTION_SECONDS = 60
+
+
+class SingleFlightError(RuntimeError):
+    """Raised to followers when the run they were waiting on failed in another process or was cancelled."""
+
+
+def flight_key(kind: str, question: str, *scope) -> str:
+    """Key shared by requests that must produce the same result (same canonical question and scope)."""
+    tokens, _ = canonicalize_question(question)
+    raw = '\x1f'.join([kind, *map(str, scope), ' '.join(tokens)])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class _Flight:
+    """Events of one in-flight run, replayable to any number of subscribers on the same loop."""
+
+    def __init__(self):
+        self.events = []
+        self.done = False
+        self.error = None
+        self.followers = 0
+        self.subscribers = 0
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def publish(self, event):
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error=None):
+        self.error = error
+        self.done = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def replay(self):
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class FlightLeases:
+    """
+    SQLite lease table coordinating leaders and followers across processes.
+
+    One row per key: the leader holds it while "running" and renews the
+    lease; on completion it stores the JSON result (or error) for followers
+    polling the row.
+    """
+
+    def __init__(self, path=SINGLEFLIGHT_PATH, lease_seconds=SINGLEFLIGHT_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS flights (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                expires_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._conn.commit()
+
+    def try_lead(self, key, owner) -> bool:
+        """Claim the key unless another live leader holds it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO flights (key, owner, status, result, expires_at, finished_at) "
+                "VALUES (?, ?, 'running', NULL, ?, NULL) "
+                "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, status = 'running', result = NULL, "
+                "expires_at = excluded.expires_at, finished_at = NULL "
+                "WHERE flights.status != 'running' OR flights.expires_at < ?",
+                (key, owner, now + self.lease_seconds, now))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def renew(self, key, owner):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE flights SET expires_at = ? WHERE key = ? AND owner = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, key, owner))
+            self._conn.commit()
+
+    def finish(self, key, owner, status, result):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE flights SET status = ?, result = ?, finished_at = ? WHERE key = ? AND owner = ?",
+                (status, result, now, key, owner))
+            self._conn.execute(
+                "DELETE FROM flights WHERE status != 'running' AND finished_at < ?",
+                (now - _FINISHED_RETENTION_SECONDS,))
+            self._conn.commit()
+
+    def release(self, key, owner):
+        """Give up a running lease unfinished, so a follower can take the key over."""
+        with self._lock:
+            self._conn.execute("DELETE FROM flights WHERE key = ? AND owner = ? AND status = 'running'",
+                               (key, owner))
+            self._conn.commit()
+
+    def poll(self, key):
+        """Return (status, result, expires_at) for a key, or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT status, result, expires_at FROM flights WHERE key = ?", (key,)).fetchone()
+
+    def close(self):
+        self._conn.close()
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent runs into one.
+
+    Within a process, the first caller for a key starts the run and every
+    concurrent caller with the same key subscribes to it, receiving the
+    same events live (or the same result). Across processes, the optional
+    lease table elects one leader per key; followers in other processes
+    wait for it and receive the finished events in one go.
+    """
+
+    def __init__(self, leases=None):
+        self.leases = leases
+        self.coalesced = 0
+        self._flights = weakref.WeakKeyDictionary()
+
+    def _local_flights(self):
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = self._flights[loop] = {}
+        return flights
+
+    async def stream(self, key, source_factory):
+        """
+        Yield the events of the run for `key`, starting it only if none is in flight.
+
+        Args:
+            key (str): Flight key from flight_key
+            source_factory (callable): Returns an async iterator of JSON-serializable events
+        """
+        flights = self._local_flights()
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = _Flight()
+            # The run belongs to no single caller: it stops only when its last subscriber leaves
+            flight.task = asyncio.ensure_future(self._run(key, flight, source_factory, flights))
+        else:
+            flight.followers += 1
+            self.coalesced += 1
+            logger.info(f"Coalesced request onto in-flight run ({flight.followers} follower(s))")
+
+        flight.subscribers += 1
+        try:
+            async for event in flight.replay():
+                yield event
+        finally:
+            flight.subscribers -= 1
+            if not flight.subscribers and not flight.done:
+                # Later requests for the key start afresh instead of joining a cancelled run
+                if flights.get(key) is flight:
+                    del flights[key]
+                flight.task.cancel()
+
+    async def call(self, key, coroutine_factory):
+        """Await the shared result of `coroutine_factory()` for `key`."""
+        async def single():
+            yield await coroutine_factory()
+
+        results = [result async for result in self.stream(key, single)]
+        return results[-1]
+
+    async def _run(self, key, flight, source_factory, flights):
+        error = None
+        try:
+            if self.leases is None:
+                async for event in source_factory():
+                    flight.publish(event)
+            else:
+                await self._run_coordinated(key, flight, source_factory)
+        except Exception as e:
+            error = e
+        except BaseException as e:
+            # Cancellation included: subscribers must never wait on a flight that will not finish
+            error = SingleFlightError("The shared run was cancelled") if isinstance(e, asyncio.CancelledError) else e
+            raise
+        finally:
+            flight.finish(error)
+            if flights.get(key) is flight:
+                del flights[key]
+
+    async def _run_coordinated(self, key, flight, source_factory):
+        owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        while not await asyncio.to_thread(self.leases.try_lead, key, owner):
+            row = await self._follow(key)
+            if row is not None:
+                status, result, _ = row
+                if status == 'failed':
+                    raise SingleFlightError(result)
+                self.coalesced += 1
+                for event in json.loads(result):
+                    flight.publish(event)
+                return
+            # The other leader vanished without finishing; try to take over
+
+        heartbeat = asyncio.ensure_future(self._renew(key, owner))
+        try:
+            async for event in source_factory():
+                flight.publish(event)
+        except asyncio.CancelledError:
+            # Not a failure of the run: hand the key to a waiting process instead
+            self.leases.release(key, owner)
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self.leases.finish, key, owner, 'failed', f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            heartbeat.cancel()
+        await asyncio.to_thread(self.leases.finish, key, owner, 'done', json.dumps(flight.events, default=str))
+
+    async def _follow(self, key):
+        """Wait for another process's run; returns its finished row, or None if its lease lapsed."""
+        while True:
+            await asyncio.sleep(SINGLEFLIGHT_POLL_SECONDS)
+            row = await asyncio.to_thread(self.leases.poll, key)
+            if row is None or (row[0] == 'running' and row[2] < time.time()):
+                return None
+            if row[0] != 'running':
+                return row
+
+    async def _renew(self, key, owner):
+        while True:
+            await asyncio.sleep(self.leases.lease_seconds / 3)
+            await asyncio.to_thread(self.leases.renew, key, owner)
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Return the process-wide SingleFlight, or None if coalescing is disabled."""
+    global _single_flight
+    if not SINGLEFLIGHT_ENABLED:
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            leases = FlightLeases() if SINGLEFLIGHT_PATH else None
+            _single_flight = SingleFlight(leases)
+        return _single_flight
@@ -0,0 +1,229 @@
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from mathmind_agent.tool_results import ToolResult
+
+logger = logging.getLogger(__name__)
+
+# Memoization of tool calls (overridable through the environment)
+TOOL_MEMO_ENABLED = os.getenv("MATHMIND_TOOL_MEMO", "1") != "0"
+TOOL_MEMO_SIZE = int(os.getenv("MATHMIND_TOOL_MEMO_SIZE", "2048"))
+# SQLite file shared by worker processes; empty keeps results in this process only
+TOOL_MEMO_PATH = os.getenv("MATHMIND_TOOL_MEMO_PATH", "")
+TOOL_MEMO_DISK_MAX_ENTRIES = int(os.getenv("MATHMIND_TOOL_MEMO_DISK_MAX_ENTRIES", "50000"))
+# Longer inputs (pasted columns) are not memoized: the key alone would outweigh the result
+TOOL_MEMO_MAX_INPUT = int(os.getenv("MATHMIND_TOOL_MEMO_MAX_INPUT", "2000"))
+
+# Seconds a result stays valid; 0 never memoizes the tool
+DEFAULT_TOOL_MEMO_TTL = float(os.getenv("MATHMIND_TOOL_MEMO_TTL", str(24 * 3600)))
+TOOL_MEMO_TTLS = {
+    'evaluate_expression_batch': 0,   # reads and writes files, so not a function of its input
+}
+
+# Failures that say nothing about the input (overload, a crashed worker) and may not recur
+_TRANSIENT_ERRORS = {'system', 'timeout'}
+
+
+def tool_memo_ttl(tool_name: str) -> float:
+    """How long results of the given tool are reused."""
+    return TOOL_MEMO_TTLS.get(tool_name, DEFAULT_TOOL_MEMO_TTL)
+
+
+def normalize_input(tool_input: str) -> str:
+    """Whitespace-insensitive form of a tool input, used as its memo key."""
+    return ' '.join(tool_input.split())
+
+
+def _dump(output) -> str:
+    if isinstance(output, ToolResult):
+        return json.dumps({**output.to_dict(), 'markdown': output.markdown}, ensure_ascii=False, default=str)
+    return json.dumps({'text': str(output)}, ensure_ascii=False)
+
+
+def _load(payload: str):
+    fields = json.loads(payload)
+    if 'text' in fields:
+        return fields['text']
+    markdown = fields.pop('markdown')
+    return ToolResult(**fields, render=lambda: markdown)
+
+
+class ToolMemo:
+    """
+    Two-tier (tool, normalized input) -> output memo for the math tools.
+
+    The first tier is an in-process LRU of the outputs themselves; the
+    optional second is a SQLite table shared by every process pointed at the
+    same file, holding outputs as JSON plus their rendered markdown. Entries
+    are scoped by tools_version, so changing what the tools return never
+    serves stale results from disk.
+    """
+
+    def __init__(self, tools_version="", size=TOOL_MEMO_SIZE, path=TOOL_MEMO_PATH,
+                 disk_max_entries=TOOL_MEMO_DISK_MAX_ENTRIES):
+        self.tools_version = tools_version
+        self.size = size
+        self.disk_max_entries = disk_max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tool_results (
+                    key TEXT PRIMARY KEY,
+                    output TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tool_results_lru ON tool_results (last_access)")
+            self._conn.commit()
+
+    def _key(self, tool_name: str, tool_input: str) -> str:
+        return '\x1f'.join([self.tools_version, tool_name, normalize_input(tool_input)])
+
+    def get(self, tool_name: str, tool_input: str):
+        """
+        Look up a memoized output.
+
+        Returns:
+            tuple: (True, output) on a hit, (False, None) on a miss
+        """
+        key = self._key(tool_name, tool_input)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT output, expires_at FROM tool_results WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    self._conn.execute("UPDATE tool_results SET last_access = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    output = _load(row[0])
+                    self._remember(key, row[1], output)
+                    self.disk_hits += 1
+                    return True, output
+
+            self.misses += 1
+        return False, None
+
+    def _remember(self, key, expires_at, output):
+        self._entries[key] = (expires_at, output)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def put(self, tool_name: str, tool_input: str, output):
+        """Store an output unless the tool is not memoized or the failure is transient."""
+        ttl = tool_memo_ttl(tool_name)
+        if ttl <= 0 or (isinstance(output, ToolResult) and output.error in _TRANSIENT_ERRORS):
+            return
+
+        key = self._key(tool_name, tool_input)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now + ttl, output)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, output, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, _dump(output), now + ttl, now))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM tool_results").fetchone()
+            if count > self.disk_max_entries:
+                self._conn.execute(
+                    "DELETE FROM tool_results WHERE key IN "
+                    "(SELECT key FROM tool_results ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.disk_max_entries,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry from both tiers and return how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            removed = len(expired)
+            if self._conn is not None:
+                cursor = self._conn.execute("DELETE FROM tool_results WHERE expires_at <= ?", (now,))
+                self._conn.commit()
+                removed += cursor.rowcount
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_results")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current in-process size."""
+        with self._lock:
+            return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                    'size': len(self._entries)}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def memoize(memo: ToolMemo, tool_name: str, func):
+    """
+    Wrap a tool function so calls with an already seen input reuse its output.
+
+    Only single-string calls of at most TOOL_MEMO_MAX_INPUT characters are
+    memoized; anything else goes straight to func.
+    """
+    if tool_memo_ttl(tool_name) <= 0:
+        return func
+
+    @functools.wraps(func)
+    def memoized(*args, **kwargs):
+        values = list(args) + list(kwargs.values())
+        if len(values) != 1 or not isinstance(values[0], str) or len(values[0]) > TOOL_MEMO_MAX_INPUT:
+            return func(*args, **kwargs)
+
+        hit, output = memo.get(tool_name, values[0])
+        if hit:
+            logger.debug(f"Memoized result for {tool_name}({values[0]!r})")
+            return output
+        output = func(*args, **kwargs)
+        memo.put(tool_name, values[0], output)
+        return output
+
+    return memoized
+
+
+_memos = {}
+_memos_lock = threading.Lock()
+
+
+def get_tool_memo(tools_version: str = ""):
+    """Return the process-wide tool memo for a tools version, or None if disabled."""
+    if not TOOL_MEMO_ENABLED:
+        return None
+    with _memos_lock:
+        memo = _memos.get(tools_version)
+        if memo is None:
+            memo = _memos[tools_version] = ToolMemo(tools_version)
+        return memo
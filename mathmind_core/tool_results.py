@@ -0,0 +1,196 @@
+import json
+import os
+import re
+
+# Return a definitive single-tool answer to the user without another LLM call
+RETURN_DIRECT_ENABLED = os.getenv("MATHMIND_RETURN_DIRECT", "1") != "0"
+
+# Tools whose successful output is already a complete answer, and the local
+# template it is shown with ({output}: the tool text, {value}: its headline number)
+DIRECT_ANSWER_TEMPLATES = {
+    'calculate_expression': "{output}\n\n**Final answer: {value}**",
+    'solve_discount_problem': "{output}",
+    'solve_geometry_word_problem': "{output}",
+    'add_numbers': "{output}",
+    'subtract_numbers': "{output}",
+    'multiply_numbers': "{output}",
+    'divide_numbers': "{output}",
+    'power_numbers': "{output}",
+    'square_root': "{output}",
+}
+
+# Outputs that are results, but not ones to hand over unexplained
+_TENTATIVE_MARKERS = ("approximation", "Single number provided")
+
+# Bold markers and emoji, dropped from the error message the model sees
+_MARKUP_PATTERN = re.compile(r'\*\*|[\u2600-\u27bf\U0001F300-\U0001FAFF]\ufe0f?')
+
+_NUMBER = r'-?\d[\d,]*(?:\.\d+)?(?:[eE][+-]?\d+)?'
+_BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*')
+_NUMBER_PATTERN = re.compile(_NUMBER)
+_EQUALS_NUMBER_PATTERN = re.compile(r'=\s*\$?(' + _NUMBER + r')(?![\d.,eE]|\s*[²³^×*/+\-])')
+
+# Integers with more digits go into ToolResult.value as the nearest float: the
+# exact digits would cost the model more tokens than they are worth
+EXACT_INTEGER_DIGITS = 30
+
+
+def numeric_value(result):
+    """
+    Full-precision form of a computed number for ToolResult.value.
+
+    Whole floats become ints (up to 2**53, where floats stop being exact),
+    other floats and small ints are kept as they are; longer ints become
+    the nearest float, or None beyond float range.
+    """
+    if isinstance(result, float):
+        return int(result) if result.is_integer() and abs(result) <= 2 ** 53 else result
+    if isinstance(result, int) and abs(result) >= 10 ** EXACT_INTEGER_DIGITS:
+        try:
+            return float(result)
+        except OverflowError:
+            return None
+    return result
+
+
+def format_value(value) -> str:
+    """Display form of a ToolResult value: integers as they are, floats to 10 significant digits."""
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else f"{value:.10g}"
+    return str(value)
+
+
+class ToolResult:
+    """
+    Outcome of one tool call.
+
+    str() is the terse JSON the model sees in its scratchpad (value, unit,
+    steps, error code); .markdown is the decorated text shown to people,
+    rendered only when something displays it. value is the computed number
+    at full precision (numeric_value); rounding for display happens only in
+    steps and the markdown.
+    """
+
+    __slots__ = ('value', 'unit', 'steps', 'error', 'message', 'approximate', '_render', '_markdown')
+
+    def __init__(self, value=None, unit=None, steps=(), error=None, message=None, approximate=False, render=None):
+        self.value = value
+        self.unit = unit
+        self.steps = list(steps)
+        self.error = error
+        self.message = message
+        self.approximate = approximate
+        self._render = render
+        self._markdown = None
+
+    @classmethod
+    def failure(cls, error: str, text: str):
+        """Error result with a machine-readable code; text is shown to people as is."""
+        message = _MARKUP_PATTERN.sub('', text).strip()
+        return cls(error=error, message=message, render=lambda: text)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def markdown(self) -> str:
+        if self._markdown is None:
+            self._markdown = self._render() if self._render is not None else str(self)
+        return self._markdown
+
+    def with_heading(self, heading: str):
+        """Same result, with heading as the first line of its markdown."""
+        return ToolResult(self.value, self.unit, self.steps, self.error, self.message, self.approximate,
+                          lambda: f"{heading}\n{self.markdown}")
+
+    def to_dict(self) -> dict:
+        fields = {'value': self.value, 'unit': self.unit, 'steps': self.steps, 'error': self.error,
+                  'message': self.message, 'approximate': self.approximate}
+        # "is not False" keeps a value of 0, which equals False
+        return {key: value for key, value in fields.items() if value is not None and value is not False and value != []}
+
+    def __str__(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'), default=str)
+
+    def __repr__(self):
+        return f"ToolResult({self.to_dict()!r})"
+
+
+def display_text(output) -> str:
+    """Text to show people for a tool output (markdown for a ToolResult)."""
+    if isinstance(output, ToolResult):
+        return output.markdown
+    return str(getattr(output, "content", output))
+
+
+def result_value(output):
+    """
+    Pull the headline number out of a tool's output.
+
+    A ToolResult gives its value at full precision. For text, the last bold number wins
+    ("= **10**", "**Final Answer: $1,234.50**"); otherwise the last
+    "= number" on the first line that has one.
+
+    Returns:
+        str or None: The number without thousands separators, or None
+    """
+    if isinstance(output, ToolResult):
+        # Several values (e.g. a list of square roots) have no single headline number
+        if output.value is None or isinstance(output.value, (list, tuple)):
+            return None
+        return str(output.value).replace(',', '')
+
+    for segment in reversed(_BOLD_PATTERN.findall(output)):
+        numbers = _NUMBER_PATTERN.findall(segment)
+        if numbers:
+            return numbers[-1].replace(',', '')
+
+    for line in output.splitlines():
+        numbers = _EQUALS_NUMBER_PATTERN.findall(line)
+        if numbers:
+            return numbers[-1].replace(',', '')
+    return None
+
+
+def is_error(output) -> bool:
+    """True when a tool output reports an error rather than a result."""
+    if isinstance(output, ToolResult):
+        return not output.ok
+    first_line = next((line for line in output.splitlines() if line.strip()), "")
+    return "Error" in first_line
+
+
+def direct_answer(tool_name: str, output):
+    """
+    The user-facing answer for a tool output that needs no LLM restatement.
+
+    Args:
+        tool_name (str): Tool that produced the output
+        output: Its observation (ToolResult or text)
+
+    Returns:
+        str or None: The output rendered with the tool's template, or None when
+        the tool is not a direct-answer tool or this result is an error,
+        an approximation or has no headline number
+    """
+    template = DIRECT_ANSWER_TEMPLATES.get(tool_name)
+    if not RETURN_DIRECT_ENABLED or template is None:
+        return None
+    if isinstance(output, ToolResult):
+        # A result without steps is an echo (e.g. a single number), not a calculation
+        if not output.ok or output.approximate or not output.steps:
+            return None
+        if output.value is None or isinstance(output.value, (list, tuple)):
+            return None
+        value, output = format_value(output.value), output.markdown
+    elif isinstance(output, str):
+        if is_error(output) or any(marker in output for marker in _TENTATIVE_MARKERS):
+            return None
+        value = result_value(output)
+    else:
+        return None
+
+    if value is None:
+        return None
+    return template.format(output=output.strip(), value=value)
@@ -0,0 +1,107 @@
+import os
+import re
+
+from mathmind_agent.keywords import keyword_scores
+
+# Offer the model only the tools a question needs (0 sends every tool every time)
+TOOL_SELECTION_ENABLED = os.getenv("MATHMIND_TOOL_SELECTION", "1") != "0"
+
+# Always offered: the calculator routes plain arithmetic to the specialized tools itself
+CORE_TOOLS = ('calculate_expression',)
+
+# Tool -> keyword_scores categories that make it relevant to a question
+_TOOL_CATEGORIES = {
+    'solve_discount_problem': ('discount', 'tax', 'tip', 'purchase'),
+    'solve_geometry_word_problem': ('circle', 'rectangle', 'square', 'triangle', 'area', 'perimeter'),
+    'solve_multi_step_problem': ('salary', 'raise', 'bonus', 'travel', 'recipe', 'increase', 'decrease', 'sequence'),
+}
+
+# Tool -> patterns that are not problem-type words (ranges, files, prices)
+_TOOL_KEYWORDS = {
+    'evaluate_expression_batch': (
+        r'for (?:each|every|all)', r'table of', r'range', r'linspace', r'from -?\d+(?:\.\d+)? to',
+        r'values? of', r'csv', r'\.npy', r'\.npz', r'file', r'column', r'\d+\.\.\d+',
+    ),
+    'solve_discount_problem': (r'% off', r'percent off', r'\$'),
+}
+
+# Plain arithmetic tools: any of them answers an arithmetic question in one call
+_ARITHMETIC_TOOLS = frozenset({
+    'calculate_expression', 'add_numbers', 'subtract_numbers', 'multiply_numbers', 'divide_numbers',
+    'power_numbers', 'square_root',
+})
+
+# Solvers that take a whole chained problem ("20% off, then 8% tax") in one call
+_CHAIN_SOLVERS = ('solve_discount_problem', 'solve_multi_step_problem')
+_TOOL_PATTERNS = {
+    name: re.compile(r'(?<![a-z])(?:' + '|'.join(keywords) + r')(?![a-z])')
+    for name, keywords in _TOOL_KEYWORDS.items()
+}
+
+# Operators between operands, math functions or arithmetic words: the calculator can handle it
+_ARITHMETIC_HINT = re.compile(
+    r'[\d)]\s*[-+*/^×÷]\s*[\w(.]|[\w)]\s*[-+*/^×÷]\s*[\d(.]|√|\b(?:sqrt|sin|cos|tan|log|ln|exp|pi|square root|cube root|plus|minus|times|'
+    r'divided by|multiplied by|squared|cubed|to the power)\b'
+)
+
+
+def select_tool_names(question: str):
+    """
+    Pick the tools worth offering the model for one question.
+
+    Keyword matches per tool (the word-problem solvers by the keyword_scores
+    categories they also classify with): cheap enough to run before every
+    agent call, and conservative, since a question that matches nothing gets
+    every tool.
+
+    Args:
+        question (str): User question
+
+    Returns:
+        tuple or None: Tool names to offer (always including CORE_TOOLS), or
+        None to offer every tool
+    """
+    if not TOOL_SELECTION_ENABLED:
+        return None
+
+    text = question.lower()
+    matched = _matched_tools(text, keyword_scores(question))
+    if not matched and not _ARITHMETIC_HINT.search(text):
+        return None
+    return CORE_TOOLS + tuple(name for name in matched if name not in CORE_TOOLS)
+
+
+def direct_answer_tools(question: str) -> frozenset:
+    """
+    Tools whose one result, from the first turn, answers the question outright.
+
+    Keyword evidence that the question is a single calculation: exactly one
+    word-problem solver matches it, or none does and it reads as plain
+    arithmetic. A question in several parts ("then ...", a second "?") gets
+    none, since a lone first call may only cover its first part.
+
+    Args:
+        question (str): User question
+
+    Returns:
+        frozenset: Tool names (empty when the question may need several calls)
+    """
+    text = question.lower()
+    scores = keyword_scores(question)
+    matched = _matched_tools(text, scores)
+    sequenced = 'sequence' in scores or text.count('?') > 1
+
+    if len(matched) > 1:
+        return frozenset()
+    if matched:
+        return frozenset(matched) if not sequenced or matched[0] in _CHAIN_SOLVERS else frozenset()
+    if sequenced or not _ARITHMETIC_HINT.search(text):
+        return frozenset()
+    return _ARITHMETIC_TOOLS
+
+
+def _matched_tools(text: str, scores):
+    matched = [name for name, pattern in _TOOL_PATTERNS.items() if pattern.search(text)]
+    matched += [name for name, categories in _TOOL_CATEGORIES.items()
+                if name not in matched and any(category in scores for category in categories)]
+    return matched
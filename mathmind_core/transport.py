@@ -0,0 +1,375 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+
+from mathmind_agent.scheduler import SchedulerOverloaded, SchedulerTimeout, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Transport configuration (overridable through the environment)
+LLM_BASE_URL = os.getenv("MATHMIND_LLM_BASE_URL", "https://api.groq.com")
+HTTP_MAX_CONNECTIONS = int(os.getenv("MATHMIND_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("MATHMIND_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MATHMIND_HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("MATHMIND_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_ATTEMPT_TIMEOUT = float(os.getenv("MATHMIND_HTTP_ATTEMPT_TIMEOUT", "30"))
+HTTP_DEADLINE = float(os.getenv("MATHMIND_HTTP_DEADLINE", "60"))
+HTTP_MAX_RETRIES = int(os.getenv("MATHMIND_HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("MATHMIND_HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("MATHMIND_HTTP_BACKOFF_MAX", "4"))
+HTTP_WARMUP_CONNECTIONS = int(os.getenv("MATHMIND_HTTP_WARMUP_CONNECTIONS", "2"))
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP2_ENABLED = HTTP2_AVAILABLE and os.getenv("MATHMIND_HTTP2", "1") != "0"
+
+# Responses worth retrying; everything else is returned to the caller as-is
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+_RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout,
+                     httpx.WriteTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+
+
+# Request extension that skips admission control (used by connection warm-up)
+UNMETERED = "mathmind_unmetered"
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised when retries would run past the overall request deadline."""
+
+
+def _retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date), if present."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class _RetryPolicy:
+    """Retry decisions shared by the sync and async transports."""
+
+    def __init__(self, max_retries, backoff_base, backoff_max, deadline):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+
+    def delay(self, attempt, response, started):
+        """
+        Seconds to wait before the next attempt, or None to stop retrying.
+
+        Uses full-jitter exponential backoff, but honours Retry-After when
+        the server sends one. Never schedules a retry past the deadline.
+        """
+        if attempt >= self.max_retries:
+            return None
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            wait = retry_after
+        else:
+            wait = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if time.monotonic() - started + wait >= self.deadline:
+            return None
+        return wait
+
+    def remaining(self, started):
+        return self.deadline - (time.monotonic() - started)
+
+    def attempt_timeout(self, request, started):
+        """Shrink the per-attempt timeout so the attempt cannot outlive the deadline."""
+        remaining = self.remaining(started)
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded", request=request)
+        timeouts = dict(request.extensions.get("timeout", {}))
+        for key in ("connect", "read", "write", "pool"):
+            current = timeouts.get(key)
+            timeouts[key] = remaining if current is None else min(current, remaining)
+        request.extensions["timeout"] = timeouts
+
+
+def _shed_response(request, error):
+    """Synthetic 503 returned when the scheduler sheds a request, so SDKs surface it as a server error."""
+    return httpx.Response(503, headers={"x-mathmind-shed": "1"},
+                          json={"error": {"message": str(error), "type": "overloaded"}}, request=request)
+
+
+def _settle(scheduler, response, wait, queue_wait):
+    """Feed the response back to the scheduler and report the queue wait on it."""
+    response.extensions["queue_wait"] = queue_wait
+    if scheduler is None:
+        return
+    scheduler.observe(response.headers)
+    if response.status_code == 429 and wait is not None:
+        scheduler.pause(wait)
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    httpx transport adding admission control, jittered retries and an overall deadline to a pooled transport.
+
+    Every attempt (including retries, which keep their place in line) is
+    admitted by the rate limit scheduler before it is sent.
+    """
+
+    def __init__(self, transport, policy, scheduler=None):
+        self._transport = transport
+        self._policy = policy
+        self._scheduler = scheduler
+
+    def handle_request(self, request):
+        started = time.monotonic()
+        attempt = 0
+        sequence = None
+        queue_wait = 0.0
+        while True:
+            if self._scheduler is not None and not request.extensions.get(UNMETERED):
+                try:
+                    ticket = self._scheduler.acquire(timeout=max(0.0, self._policy.remaining(started)),
+                                                     sequence=sequence)
+                except SchedulerOverloaded as e:
+                    return _shed_response(request, e)
+                except SchedulerTimeout as e:
+                    raise DeadlineExceeded(str(e), request=request) from e
+                sequence = ticket.sequence
+                queue_wait += ticket.queue_wait
+
+            self._policy.attempt_timeout(request, started)
+            try:
+                response = self._transport.handle_request(request)
+            except _RETRY_EXCEPTIONS:
+                wait = self._policy.delay(attempt, None, started)
+                if wait is None:
+                    raise
+            else:
+                wait = None
+                if response.status_code in RETRY_STATUS_CODES:
+                    wait = self._policy.delay(attempt, response, started)
+                _settle(self._scheduler, response, wait, queue_wait)
+                if wait is None:
+                    return response
+                response.close()
+
+            attempt += 1
+            logger.warning(f"Retrying {request.method} {request.url.path} in {wait:.2f}s (attempt {attempt + 1})")
+            time.sleep(wait)
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RetryTransport."""
+
+    def __init__(self, transport, policy, scheduler=None):
+        self._transport = transport
+        self._policy = policy
+        self._scheduler = scheduler
+
+    async def handle_async_request(self, request):
+        started = time.monotonic()
+        attempt = 0
+        sequence = None
+        queue_wait = 0.0
+        while True:
+            if self._scheduler is not None and not request.extensions.get(UNMETERED):
+                try:
+                    ticket = await self._scheduler.acquire_async(timeout=max(0.0, self._policy.remaining(started)),
+                                                                 sequence=sequence)
+                except SchedulerOverloaded as e:
+                    return _shed_response(request, e)
+                except SchedulerTimeout as e:
+                    raise DeadlineExceeded(str(e), request=request) from e
+                sequence = ticket.sequence
+                queue_wait += ticket.queue_wait
+
+            self._policy.attempt_timeout(request, started)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except _RETRY_EXCEPTIONS:
+                wait = self._policy.delay(attempt, None, started)
+                if wait is None:
+                    raise
+            else:
+                wait = None
+                if response.status_code in RETRY_STATUS_CODES:
+                    wait = self._policy.delay(attempt, response, started)
+                _settle(self._scheduler, response, wait, queue_wait)
+                if wait is None:
+                    return response
+                await response.aclose()
+
+            attempt += 1
+            logger.warning(f"Retrying {request.method} {request.url.path} in {wait:.2f}s (attempt {attempt + 1})")
+            await asyncio.sleep(wait)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _limits():
+    return httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+
+
+def _timeout():
+    return httpx.Timeout(HTTP_ATTEMPT_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def _policy():
+    return _RetryPolicy(HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_DEADLINE)
+
+
+def create_http_client(base_url=None, scheduler=None) -> httpx.Client:
+    """Build a pooled, retrying sync client (use get_http_client for the shared one)."""
+    transport = httpx.HTTPTransport(http2=HTTP2_ENABLED, limits=_limits())
+    return httpx.Client(base_url=base_url or LLM_BASE_URL, http2=HTTP2_ENABLED, timeout=_timeout(),
+                        transport=RetryTransport(transport, _policy(), scheduler))
+
+
+def create_async_http_client(base_url=None, scheduler=None) -> httpx.AsyncClient:
+    """Build a pooled, retrying async client (use get_async_http_client for the shared one)."""
+    transport = httpx.AsyncHTTPTransport(http2=HTTP2_ENABLED, limits=_limits())
+    return httpx.AsyncClient(base_url=base_url or LLM_BASE_URL, http2=HTTP2_ENABLED, timeout=_timeout(),
+                             transport=AsyncRetryTransport(transport, _policy(), scheduler))
+
+
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """The process-wide sync client shared by every session."""
+    global _sync_client
+    if _sync_client is None:
+        with _clients_lock:
+            if _sync_client is None:
+                _sync_client = create_http_client(scheduler=get_scheduler())
+    return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    The shared async client for the running event loop.
+
+    Async connection pools are bound to the loop that opened them, so there
+    is one client per loop; long-lived loops keep their connections warm.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = create_async_http_client(scheduler=get_scheduler())
+    return client
+
+
+class AsyncClientProxy(httpx.AsyncClient):
+    """
+    AsyncClient that sends every request through get_async_http_client().
+
+    SDKs take a single async client at construction time, but the pool it
+    owns is tied to one event loop; the proxy resolves the right client for
+    whichever loop is running the request.
+    """
+
+    def __init__(self, base_url=None):
+        super().__init__(base_url=base_url or LLM_BASE_URL, timeout=_timeout())
+
+    async def send(self, request, **kwargs):
+        return await get_async_http_client().send(request, **kwargs)
+
+    async def aclose(self):
+        # The shared clients outlive any one SDK instance
+        pass
+
+
+def warm_up(connections=HTTP_WARMUP_CONNECTIONS, path="/", client=None):
+    """
+    Open keep-alive connections (DNS, TCP and TLS) to the LLM backend ahead of the first request.
+
+    Args:
+        connections (int): Connections to open side by side
+        path (str): Path requested with HEAD
+        client (httpx.Client): Client whose pool is warmed (default: get_http_client())
+
+    Returns:
+        int: Number of connections that completed a round trip
+    """
+    client = client or get_http_client()
+
+    def ping():
+        try:
+            client.head(path, timeout=HTTP_CONNECT_TIMEOUT * 2, extensions={UNMETERED: True}).close()
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"LLM transport warm-up failed: {e}")
+            return False
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ping())) for _ in range(max(1, connections))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    warmed = sum(results)
+    logger.info(f"Warmed {warmed} connection(s) to {LLM_BASE_URL}")
+    return warmed
+
+
+async def awarm_up(connections=HTTP_WARMUP_CONNECTIONS, path="/", client=None):
+    """
+    Async counterpart of warm_up, for the running event loop's pool.
+
+    Args:
+        connections (int): Connections to open concurrently
+        path (str): Path requested with HEAD
+        client (httpx.AsyncClient): Client whose pool is warmed (default: get_async_http_client())
+
+    Returns:
+        int: Number of connections that completed a round trip
+    """
+    client = client or get_async_http_client()
+
+    async def ping():
+        try:
+            response = await client.head(path, timeout=HTTP_CONNECT_TIMEOUT * 2, extensions={UNMETERED: True})
+            await response.aclose()
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"LLM transport warm-up failed: {e}")
+            return False
+
+    warmed = sum(await asyncio.gather(*(ping() for _ in range(max(1, connections)))))
+    logger.info(f"Warmed {warmed} async connection(s) to {LLM_BASE_URL}")
+    return warmed
+
+
+def warm_up_in_background(connections=HTTP_WARMUP_CONNECTIONS, loop=None):
+    """
+    Run warm_up on a daemon thread so startup is not delayed.
+
+    Async pools belong to the loop that opened them, so pass the loop that
+    will serve async requests to have awarm_up open connections there too.
+    """
+    thread = threading.Thread(target=warm_up, args=(connections,), daemon=True)
+    thread.start()
+    if loop is not None:
+        asyncio.run_coroutine_threadsafe(awarm_up(connections), loop)
+    return thread
@@ -0,0 +1,228 @@
+import contextvars
+import functools
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from mathmind_agent.expression_engine import ALLOWED_FUNCTIONS, ALLOWED_CONSTANTS
+from mathmind_agent.tool_results import ToolResult, format_value
+
+logger = logging.getLogger(__name__)
+
+# Named values kept per session (least recently used evicted first)
+WORKSPACE_SIZE = int(os.getenv("MATHMIND_WORKSPACE_SIZE", "32"))
+# Sessions whose workspaces are kept in this process, and how long an idle one survives
+WORKSPACE_SESSIONS = int(os.getenv("MATHMIND_WORKSPACE_SESSIONS", "1024"))
+WORKSPACE_IDLE_SECONDS = float(os.getenv("MATHMIND_WORKSPACE_IDLE", "3600"))
+
+# Workspace of the session (or, without one, the agent run) in progress in this context
+current_workspace = contextvars.ContextVar("mathmind_workspace", default=None)
+
+# "subtotal = 120*0.85" (but not "a == b")
+_ASSIGNMENT_PATTERN = re.compile(r'\s*([a-zA-Z][a-zA-Z0-9_]*)\s*=(?!=)\s*(\S.*)', re.DOTALL)
+# "r = 7.5" anywhere in a question
+_ASSIGNMENT_SEARCH_PATTERN = re.compile(r'(?<![\w.])[a-zA-Z][a-zA-Z0-9_]*\s*=(?!=)')
+# A bare name: not part of a longer word or number ("7cm"), not a function call ("r(")
+_NAME_PATTERN = re.compile(r'(?<![\w.$])[a-zA-Z][a-zA-Z0-9_]*(?![\w(])')
+
+_RESERVED_NAMES = frozenset(ALLOWED_FUNCTIONS) | frozenset(ALLOWED_CONSTANTS)
+
+
+def parse_assignment(text: str):
+    """
+    Split "name = expression" into its parts.
+
+    Returns:
+        tuple or None: (lowercased name, expression), or None when text is not an assignment
+    """
+    match = _ASSIGNMENT_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+    return match.group(1).lower(), match.group(2).strip()
+
+
+def _literal(value) -> str:
+    """Text substituted for a name: exact, and parenthesized when negative so "x^2" stays right."""
+    if isinstance(value, int):
+        text = str(value)
+    else:
+        text = str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+    return f"({text})" if value < 0 else text
+
+
+class Workspace:
+    """
+    Bounded name -> number store shared by the tool calls of one session.
+
+    calculate_expression stores values ("subtotal = 120*0.85") and the
+    expression tools read them back ("subtotal*1.08"), so a value computed
+    once never has to be copied into a later call by the model. Reads count
+    as use; past `size` names the least recently used one is dropped.
+    """
+
+    def __init__(self, size: int = WORKSPACE_SIZE):
+        self.size = size
+        self.last_used = time.monotonic()
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set(self, name: str, value):
+        """
+        Store a value under name.
+
+        Returns:
+            str or None: The name evicted to make room, if any
+        """
+        with self._lock:
+            self._values[name] = value
+            self._values.move_to_end(name)
+            if len(self._values) > self.size:
+                evicted, _ = self._values.popitem(last=False)
+                return evicted
+        return None
+
+    def get(self, name: str):
+        with self._lock:
+            value = self._values.get(name)
+            if value is not None:
+                self._values.move_to_end(name)
+            return value
+
+    def resolve(self, text: str):
+        """
+        Replace the names stored here with their values.
+
+        Returns:
+            tuple: (text with literals in place of stored names, names substituted)
+        """
+        used = []
+
+        def substitute(match):
+            name = match.group(0).lower()
+            value = self.get(name)
+            if value is None:
+                return match.group(0)
+            used.append(name)
+            return _literal(value)
+
+        return _NAME_PATTERN.sub(substitute, text), used
+
+    def involves(self, text: str) -> bool:
+        """Whether text assigns a name or uses one stored here (so its answer depends on this workspace)."""
+        if _ASSIGNMENT_SEARCH_PATTERN.search(text):
+            return True
+        with self._lock:
+            return any(match.group(0).lower() in self._values for match in _NAME_PATTERN.finditer(text))
+
+    def items(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
+
+
+_workspaces = OrderedDict()
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace(session_id: str) -> Workspace:
+    """The workspace of a session, created on first use; idle and least recent sessions are dropped."""
+    now = time.monotonic()
+    with _workspaces_lock:
+        while _workspaces:
+            oldest = next(iter(_workspaces.values()))
+            if len(_workspaces) < WORKSPACE_SESSIONS and now - oldest.last_used < WORKSPACE_IDLE_SECONDS:
+                break
+            _workspaces.popitem(last=False)
+
+        workspace = _workspaces.pop(session_id, None) or Workspace()
+        workspace.last_used = now
+        _workspaces[session_id] = workspace
+        return workspace
+
+
+@contextmanager
+def workspace_context(session_id: str = None):
+    """
+    Give the tool calls made inside the block a workspace.
+
+    Args:
+        session_id (str): Session whose workspace persists across questions;
+            None gives the block a fresh workspace of its own
+
+    Yields:
+        Workspace: The workspace in use
+    """
+    workspace = Workspace() if session_id is None else get_workspace(session_id)
+    token = current_workspace.set(workspace)
+    try:
+        yield workspace
+    finally:
+        current_workspace.reset(token)
+
+
+def _assign(workspace, name: str, expression: str, func) -> ToolResult:
+    """Evaluate expression with func and, when it yields one real number, store it under name."""
+    if name in _RESERVED_NAMES:
+        return ToolResult.failure('reserved_name', f"Workspace Error: '{name}' is a built-in function or "
+                                                   "constant and cannot be assigned.")
+
+    output = func(expression)
+    if not isinstance(output, ToolResult) or not output.ok:
+        return output
+    # The unrounded number the kernel computed, so chained uses ("x*3") lose nothing
+    value = output.value
+    storable = isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    if output.approximate or not storable:
+        return ToolResult.failure('not_storable', f"Workspace Error: {name} must be a single real number "
+                                                  f"that fits a float; got {output.value}.")
+
+    if workspace is None:
+        logger.debug(f"No workspace in this context; {name} is not stored")
+    else:
+        evicted = workspace.set(name, value)
+        if evicted:
+            logger.info(f"Workspace full; dropped {evicted}")
+    return ToolResult(output.value, output.unit, [f"{name} = {step}" for step in output.steps],
+                      render=lambda: f"{name} = **{format_value(value)}**\n{output.markdown}")
+
+
+def use_workspace(tool_name: str, func, assignments: bool = False):
+    """
+    Wrap a tool function so its input may refer to values in the current workspace.
+
+    Stored names are replaced by their values before func runs, so memoized
+    results stay keyed by what was actually computed. With assignments,
+    "name = expression" evaluates the expression and stores the result.
+    """
+    @functools.wraps(func)
+    def with_workspace(*args, **kwargs):
+        values = list(args) + list(kwargs.values())
+        if len(values) != 1 or not isinstance(values[0], str):
+            return func(*args, **kwargs)
+
+        workspace = current_workspace.get()
+        text = values[0]
+        assignment = parse_assignment(text) if assignments else None
+        if assignment is not None:
+            text = assignment[1]
+        if workspace is not None and len(workspace):
+            text, used = workspace.resolve(text)
+            if used:
+                logger.info(f"{tool_name}: substituted {', '.join(used)} from the workspace")
+
+        if assignment is not None:
+            return _assign(workspace, assignment[0], text, func)
+        return func(text)
+
+    return with_workspace
@@ -0,0 +1,106 @@
+"""
+Check the import-time budget of the mathmind modules.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+without GROQ_API_KEY set. The budget covers the package's own import work:
+the self time of every package module loaded, which leaves out the standard
+library modules they pull in (asyncio alone costs 30-80 ms depending on the
+machine) and so stays comparable across machines. The total cumulative time
+is printed for reference. The script fails if a module exceeds its budget or
+pulls in a heavy dependency (LangChain, Groq, NumPy, Streamlit) that it
+should only load on first use.
+
+Usage:
+    python scripts/check_import_time.py [--package mathmind_agent] [--runs 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Budgets in milliseconds of package import work (best of N runs), about twice
+# what was recorded so that a loaded machine does not fail the check
+IMPORT_BUDGET_MS = {
+    'agent_executor': 25,
+    'prompts': 8,
+    'expression_engine': 5,
+    'cost_model': 6,
+    'sandbox': 4,
+    'fast_path': 16,
+    'answer_cache': 4,
+    'scheduler': 4,
+    'singleflight': 5,
+    'planner': 8,
+    'tool_results': 4,
+    'tool_selection': 12,
+    'budget': 3,
+    'tool_memo': 5,
+    'lexer': 9,
+    'keywords': 9,
+    'reduction': 7,
+    'workspace': 9,
+    'kernels': 50,           # compiles the keyword and lexer patterns
+}
+
+# Dependencies none of the modules above may import eagerly
+HEAVY_MODULES = ('langchain', 'langchain_core', 'langchain_groq', 'groq', 'numpy', 'streamlit')
+
+
+def measure(module: str, package: str):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: (package import time in ms, cumulative import time in ms, heavy modules loaded)
+    """
+    env = {key: value for key, value in os.environ.items() if key != 'GROQ_API_KEY'}
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                               capture_output=True, text=True, env=env, check=True)
+
+    own_us = 0
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2]
+        if name == package or name.startswith(f"{package}."):
+            own_us += int(parts[0].rpartition(':')[2])
+        if name == module:
+            cumulative_us = int(parts[1])
+
+    loaded = set(completed.stdout.strip().split(','))
+    heavy = sorted(name for name in HEAVY_MODULES if name in loaded)
+    return own_us / 1000, cumulative_us / 1000, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--package', default='mathmind_agent')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    failures = 0
+    for name, budget in IMPORT_BUDGET_MS.items():
+        module = f"{args.package}.{name}"
+        results = [measure(module, args.package) for _ in range(args.runs)]
+        best = min(own for own, _, _ in results)
+        total = min(cumulative for _, cumulative, _ in results)
+        heavy = results[0][2]
+
+        status = "ok"
+        if best > budget:
+            status = "OVER BUDGET"
+        if heavy:
+            status = f"IMPORTS {', '.join(heavy)}"
+        failures += status != "ok"
+
+        print(f"{module:<40} {best:8.1f} ms / {budget:>4} ms  (total {total:6.1f} ms)  {status}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
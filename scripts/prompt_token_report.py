@@ -0,0 +1,80 @@
+"""
+Report the prompt tokens the agent sends per LLM call under each tool configuration.
+
+For every sample question the first-turn prompt (system prompt, question and
+tool schemas) is rendered with full or compact tool descriptions, offering
+every tool or only the ones tool_selection picks, and counted with tiktoken's
+cl100k_base encoding (close to, not identical with, the Llama 3 tokenizer).
+The scratchpad is not included: it grows the same way in every configuration.
+
+Requires tiktoken, a development-only dependency left out of requirements.txt:
+    pip install tiktoken
+
+Usage:
+    python scripts/prompt_token_report.py [--package mathmind_agent] [questions ...]
+"""
+
+import argparse
+import importlib
+import json
+
+SAMPLE_QUESTIONS = [
+    "A circle has radius 7cm. What's the area?",
+    "I bought a $120 jacket with 15% discount, then paid 8% tax",
+    "A car travels 60 mph for 2 hours, then 40 mph for 1.5 hours. Total distance?",
+    "Evaluate 2*pi*r for r = 1..1000",
+    "What is sqrt(3^2 + 4^2) * 7?",
+]
+
+CONFIGURATIONS = [
+    ("full, all tools", False, False),
+    ("compact, all tools", True, False),
+    ("full, selected", False, True),
+    ("compact, selected", True, True),
+]
+
+
+def count_prompt_tokens(encoding, package, question: str, compact: bool, selected: bool) -> int:
+    """Tokens in the first-turn prompt for one question under one configuration."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    tools = importlib.import_module(f"{package}.tools")
+    prompts = importlib.import_module(f"{package}.prompts")
+    selection = importlib.import_module(f"{package}.tool_selection")
+
+    tool_names = selection.select_tool_names(question) if selected else None
+    math_tools = tools.get_enhanced_math_tools(tool_names, compact=compact)
+    messages = prompts.get_enhanced_prompt(tool_names).format_messages(input=question, agent_scratchpad=[])
+
+    text = "\n".join(str(message.content) for message in messages)
+    schemas = json.dumps([convert_to_openai_tool(math_tool) for math_tool in math_tools])
+    return len(encoding.encode(text)) + len(encoding.encode(schemas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--package', default='mathmind_agent')
+    parser.add_argument('questions', nargs='*', default=SAMPLE_QUESTIONS)
+    args = parser.parse_args()
+
+    try:
+        import tiktoken
+    except ImportError:
+        parser.error("tiktoken is not installed (development-only dependency): pip install tiktoken")
+    encoding = tiktoken.get_encoding('cl100k_base')
+
+    totals = [0] * len(CONFIGURATIONS)
+    print(f"{'question':<50} " + " ".join(f"{label:>20}" for label, _, _ in CONFIGURATIONS))
+    for question in args.questions:
+        counts = [count_prompt_tokens(encoding, args.package, question, compact, selected)
+                  for _, compact, selected in CONFIGURATIONS]
+        totals = [total + count for total, count in zip(totals, counts)]
+        print(f"{question[:50]:<50} " + " ".join(f"{count:>20}" for count in counts))
+
+    averages = [total / len(args.questions) for total in totals]
+    print(f"{'average':<50} " + " ".join(f"{average:>20.0f}" for average in averages))
+    print(f"{'vs. full, all tools':<50} " + " ".join(f"{average / averages[0]:>20.0%}" for average in averages))
+
+
+if __name__ == '__main__':
+    main()
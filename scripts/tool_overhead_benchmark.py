@@ -0,0 +1,62 @@
+"""
+Measure what LangChain's tool machinery costs per call, compared with calling a kernel directly.
+
+Each sample input is run through three paths: the plain kernel function,
+BaseTool.invoke (schema validation, callback manager and run events, as
+the agent and planner use it) and BaseTool.__call__ (how calculate_expression
+used to reach the specialized tools while routing). The difference between
+a tool path and the kernel is the overhead an internal call no longer pays.
+Tools are taken from tools.py directly, so memoization is not involved.
+
+Usage:
+    python scripts/tool_overhead_benchmark.py [--package mathmind_agent] [--calls 2000]
+"""
+
+import argparse
+import importlib
+import time
+import warnings
+
+SAMPLES = [
+    ("add_numbers", "2 + 3 + 5"),
+    ("divide_numbers", "100 / 5 / 2"),
+    ("square_root", "sqrt(9), sqrt(16)"),
+    ("solve_discount_problem", "$120 jacket, 15% discount, 8% tax"),
+]
+
+
+def per_call_us(func, argument, calls: int) -> float:
+    """Best of three timings of calls x func(argument), in microseconds per call."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(argument)
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--package', default='mathmind_agent')
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)  # the tools log every call
+    warnings.simplefilter('ignore')  # BaseTool.__call__ is deprecated
+    kernels = importlib.import_module(f"{args.package}.kernels")
+    tools = importlib.import_module(f"{args.package}.tools")
+
+    print(f"{'tool':<26} {'kernel us':>10} {'invoke us':>10} {'__call__ us':>12} {'overhead us':>12}")
+    for name, argument in SAMPLES:
+        kernel = getattr(kernels, f"{name}_kernel")
+        math_tool = getattr(tools, name)
+        direct = per_call_us(kernel, argument, args.calls)
+        invoked = per_call_us(math_tool.invoke, argument, args.calls)
+        called = per_call_us(math_tool, argument, args.calls)
+        print(f"{name:<26} {direct:>10.1f} {invoked:>10.1f} {called:>12.1f} {invoked - direct:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
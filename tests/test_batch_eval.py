@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mathmind_agent.batch_eval import evaluate_batch
+from mathmind_agent.expression_engine import ExpressionError
+
+
+@pytest.mark.parametrize("expression", ["9**9**9 + x", "10^10^8 + x", "x * factorial(10^6)", "2^2000"])
+def test_oversized_constant_parts_are_rejected_quickly(expression):
+    start = time.perf_counter()
+    with pytest.raises(ExpressionError):
+        evaluate_batch(expression, {'x': [1.0, 2.0]})
+    assert time.perf_counter() - start < 1
+
+
+def test_variables_keep_large_powers_in_floating_point():
+    result = evaluate_batch("x ^ 9^9 + 2^10", {'x': [1.0, 2.0]})
+    assert result[0] == 1025
+    assert np.isinf(result[1])
+
+
+def test_rows_are_evaluated_in_one_pass():
+    result = evaluate_batch("sqrt(a^2 + b^2)", {'a': [3, 5], 'b': 4})
+    assert result.tolist() == [5.0, pytest.approx(41 ** 0.5)]
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.agents import BaseSingleActionAgent
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.tools import Tool
+
+from mathmind_agent.concurrent_executor import ConcurrentAgentExecutor
+
+
+class ScriptedAgent(BaseSingleActionAgent):
+    """Agent that calls the square tool once, then (after an optional delay) answers."""
+
+    delay: float = 0.0
+
+    @property
+    def input_keys(self):
+        return ["input"]
+
+    def plan(self, intermediate_steps, callbacks=None, **kwargs):
+        if not intermediate_steps:
+            return AgentAction("square", kwargs["input"], "")
+        return AgentFinish({"output": f"The answer is {intermediate_steps[-1][1]}"}, "done")
+
+    async def aplan(self, intermediate_steps, callbacks=None, **kwargs):
+        if intermediate_steps:
+            await asyncio.sleep(self.delay)
+        return self.plan(intermediate_steps, callbacks, **kwargs)
+
+
+def _square(text):
+    try:
+        return str(float(text) ** 2)
+    except ValueError:
+        return "Input Error: Not a number."
+
+
+def executor(delay=0.0, **kwargs):
+    return ConcurrentAgentExecutor(agent=ScriptedAgent(delay=delay),
+                                   tools=[Tool(name="square", func=_square, description="Square a number")],
+                                   **kwargs)
+
+
+def test_finished_run_is_complete():
+    result = asyncio.run(executor().ainvoke({"input": "3"}))
+    assert result["output"] == "The answer is 9.0"
+    assert result["complete"]
+
+
+def test_failed_tool_call_is_not_complete():
+    result = asyncio.run(executor().ainvoke({"input": "three"}))
+    assert not result["complete"]
+
+
+def test_async_time_limit_ends_with_the_last_result():
+    result = asyncio.run(executor(delay=5, max_execution_time=0.2).ainvoke({"input": "3"}))
+    assert "Stopped early (time limit)" in result["output"]
+    assert result["output"].startswith("9.0")
+    assert not result["complete"]
+
+
+def test_iteration_limit_is_not_complete():
+    result = executor(max_iterations=1).invoke({"input": "3"})
+    assert "Stopped early (iteration limit)" in result["output"]
+    assert not result["complete"]
@@ -0,0 +1,39 @@
+import pytest
+
+from mathmind_agent.cost_model import can_approximate, estimate_cost, estimate_power, within_budget, FLOAT_MAX_DIGITS
+from mathmind_agent.expression_engine import compile_expression
+from mathmind_agent.kernels import calculate_expression_kernel, power_numbers_kernel
+
+
+def estimate(expression):
+    return estimate_cost(compile_expression(expression))
+
+
+def test_zero_to_the_zero_is_one():
+    assert within_budget(estimate_power(0.0, 0.0), FLOAT_MAX_DIGITS)
+    assert within_budget(estimate("0^0"))
+    assert calculate_expression_kernel("0^0").value == 1
+    assert power_numbers_kernel("0, 0").value == 1
+
+
+def test_zero_to_a_negative_power_still_fails():
+    assert power_numbers_kernel("0, -1").error == 'domain'
+    assert not calculate_expression_kernel("0^-1").ok
+
+
+@pytest.mark.parametrize("expression", ["factorial(99999)", "9^9^9"])
+def test_oversized_results_are_approximated(expression):
+    assert not within_budget(estimate(expression))
+    assert can_approximate(estimate(expression))
+    result = calculate_expression_kernel(expression)
+    assert result.ok and result.approximate
+
+
+def test_unbounded_results_are_rejected():
+    assert not within_budget(estimate("(-2)^(10^20)"))
+    assert not calculate_expression_kernel("(-2)^(10^20)").ok
+
+
+def test_cancelling_terms_are_evaluated_exactly():
+    assert within_budget(estimate("2^10000 - 2^10000"))
+    assert calculate_expression_kernel("2^10000 - 2^10000").value == 0
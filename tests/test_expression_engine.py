@@ -0,0 +1,26 @@
+import pytest
+
+from mathmind_agent.expression_engine import compile_expression, ExpressionError
+from mathmind_agent.kernels import calculate_expression_kernel
+
+
+@pytest.mark.parametrize("expression", ["10 # 3", "2 = 2", "x; 1", "[1]", "'1'"])
+def test_characters_outside_the_grammar_are_rejected(expression):
+    with pytest.raises(ExpressionError):
+        compile_expression(expression)
+
+
+@pytest.mark.parametrize("expression", ["sqrt(1, 2)", "sqrt()", "factorial(3, 4)"])
+def test_functions_take_one_argument(expression):
+    with pytest.raises(ExpressionError):
+        compile_expression(expression)
+
+
+def test_rejections_are_reported_as_expression_errors():
+    assert calculate_expression_kernel("10 # 3").error == 'unsupported'
+    assert calculate_expression_kernel("sqrt(1, 2)").error == 'unsupported'
+
+
+def test_notation_is_rewritten():
+    assert compile_expression("√(16) + 2^3 × 3! ÷ 2")() == 28
+    assert compile_expression("2*pi*r")(r=1) == pytest.approx(6.283185307)
@@ -0,0 +1,27 @@
+from mathmind_agent.kernels import solve_multi_step_problem_kernel
+from mathmind_agent.keywords import best_category, keyword_scores
+
+
+def test_overlapping_keywords_credit_every_category():
+    scores = keyword_scores("Pay increases by 10% from $40,000")
+    assert scores['salary'] == scores['purchase'] == 1
+    assert keyword_scores("She pays $20")['purchase'] == 1
+    assert 'salary' not in keyword_scores("She pays $20")
+
+
+def test_longest_keyword_wins_and_words_stay_whole():
+    scores = keyword_scores("Add 8% sales tax")
+    assert scores['tax'] == 1 and 'discount' not in scores
+    assert keyword_scores("repay the offer") == {}
+
+
+def test_best_category_prefers_earlier_on_ties():
+    scores = keyword_scores("A square inside a circle")
+    assert best_category(scores, ('circle', 'square')) == 'circle'
+    assert best_category(scores, ('triangle',)) is None
+
+
+def test_pay_rise_reaches_the_salary_branch():
+    result = solve_multi_step_problem_kernel("Pay increases by 10% from $40,000")
+    assert result.ok
+    assert result.steps[0].startswith("Initial salary")
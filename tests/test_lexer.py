@@ -0,0 +1,30 @@
+from mathmind_agent.kernels import calculate_expression_kernel
+from mathmind_agent.lexer import expression_source, tokenize
+
+
+def test_unmatched_characters_become_unknown_tokens():
+    kinds = [(token.kind, token.text) for token in tokenize("5! # 3").tokens]
+    assert kinds == [('number', '5'), ('unknown', '!'), ('unknown', '#'), ('number', '3')]
+
+
+def test_group_separators_and_signs():
+    assert tokenize("1,000,000 + 1'000").numbers == (1e6, 1e3)
+    assert tokenize("10-3").numbers == (10, 3)
+    assert tokenize("-3 + 1").numbers == (-3, 1)
+
+
+def test_expression_source_spells_numbers_plainly():
+    assert expression_source("sqrt(1,000)+1") == "sqrt(1000)+1"
+    assert expression_source("-1,000 * 2") == "-1000 * 2"
+    assert expression_source("2 * (3 + 4)") == "2 * (3 + 4)"
+
+
+def test_factorials_are_not_routed_as_operator_chains():
+    assert calculate_expression_kernel("5!+3!").value == 126
+    assert calculate_expression_kernel("4!/2!").value == 12
+    assert calculate_expression_kernel("5! * 3!").value == 720
+
+
+def test_separated_numbers_reach_the_expression_engine():
+    assert calculate_expression_kernel("1,000 * 1.08 + 5").value == 1085
+    assert calculate_expression_kernel("sqrt(1,000)+1").ok
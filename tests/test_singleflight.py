@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from mathmind_agent.singleflight import flight_key, FlightLeases, SingleFlight, SingleFlightError
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=10))
+
+
+def test_flight_key_matches_canonical_questions():
+    assert flight_key("invoke", "What is 2 + 2?", "agent") == flight_key("invoke", "what is 2+2", "agent")
+    assert flight_key("invoke", "What is 2 + 2?", "agent") != flight_key("invoke", "What is 2 + 2?", "plan")
+
+
+def test_concurrent_calls_share_one_run():
+    single_flight = SingleFlight()
+    runs = []
+
+    async def answer():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"output": "4"}
+
+    async def main():
+        return await asyncio.gather(*(single_flight.call("key", answer) for _ in range(3)))
+
+    assert run(main()) == [{"output": "4"}] * 3
+    assert len(runs) == 1
+    assert single_flight.coalesced == 2
+
+
+def test_failure_reaches_every_subscriber():
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("no answer")
+
+    async def main():
+        return await asyncio.gather(*(single_flight.call("key", fail) for _ in range(2)), return_exceptions=True)
+
+    assert [type(result) for result in run(main())] == [ValueError, ValueError]
+
+
+def test_cancelled_run_finishes_its_followers():
+    single_flight = SingleFlight()
+
+    async def main():
+        follower = asyncio.ensure_future(single_flight.call("key", lambda: asyncio.sleep(60)))
+        leader = asyncio.ensure_future(single_flight.call("key", lambda: asyncio.sleep(60)))
+        await asyncio.sleep(0.05)
+        single_flight._local_flights()["key"].task.cancel()
+        return await asyncio.gather(follower, leader, return_exceptions=True)
+
+    assert [type(result) for result in run(main())] == [SingleFlightError, SingleFlightError]
+
+
+def test_last_subscriber_leaving_cancels_the_run():
+    single_flight = SingleFlight()
+
+    async def main():
+        stopped = asyncio.Event()
+
+        async def events():
+            try:
+                yield "first"
+                await asyncio.sleep(60)
+            finally:
+                stopped.set()
+
+        async for event in single_flight.stream("key", events):
+            assert event == "first"
+            break
+        await asyncio.wait_for(stopped.wait(), timeout=1)
+        return single_flight._local_flights()
+
+    assert run(main()) == {}
+
+
+def test_follower_process_receives_the_leaders_events(tmp_path, monkeypatch):
+    monkeypatch.setattr("mathmind_agent.singleflight.SINGLEFLIGHT_POLL_SECONDS", 0.01)
+    path = str(tmp_path / "flights.sqlite3")
+    leader, follower = SingleFlight(FlightLeases(path)), SingleFlight(FlightLeases(path))
+
+    async def events():
+        await asyncio.sleep(0.1)
+        yield {"type": "final", "text": "4"}
+
+    async def collect(single_flight):
+        return [event async for event in single_flight.stream("key", events)]
+
+    async def main():
+        first = asyncio.ensure_future(collect(leader))
+        await asyncio.sleep(0.02)
+        return await asyncio.gather(first, collect(follower))
+
+    assert run(main()) == [[{"type": "final", "text": "4"}]] * 2
+    assert follower.coalesced == 1
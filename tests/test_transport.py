@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from mathmind_agent import transport
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        # Slow enough that concurrent warm-up pings need a connection each
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local keep-alive HTTP server standing in for the LLM backend; counts accepted connections."""
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.2):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.delay = delay
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_warm_up_opens_reusable_connections(server):
+    client = transport.create_http_client(base_url=server.url)
+    assert transport.warm_up(2, client=client) == 2
+    assert server.connections == 2
+
+    client.head("/", extensions={transport.UNMETERED: True}).close()
+    assert server.connections == 2
+    client.close()
+
+
+def test_awarm_up_warms_the_serving_loop(server, loop, monkeypatch):
+    monkeypatch.setattr(transport, "LLM_BASE_URL", server.url)
+
+    def on_loop(coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout=10)
+
+    async def request():
+        response = await transport.get_async_http_client().head("/", extensions={transport.UNMETERED: True})
+        await response.aclose()
+
+    assert on_loop(transport.awarm_up(2)) == 2
+    assert server.connections == 2
+
+    # A later request on the same loop finds the warmed pool
+    on_loop(request())
+    assert server.connections == 2
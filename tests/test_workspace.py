@@ -0,0 +1,26 @@
+from mathmind_agent.kernels import calculate_expression_kernel
+from mathmind_agent.workspace import use_workspace, workspace_context
+
+calculate_expression = use_workspace('calculate_expression', calculate_expression_kernel, assignments=True)
+
+
+def test_chained_reuse_keeps_full_precision():
+    with workspace_context():
+        assert calculate_expression("x = 1/3").ok
+        assert calculate_expression("x*3").value == 1
+
+        assert calculate_expression("big = 2^70").ok
+        assert calculate_expression("big - 2^70").value == 0
+
+
+def test_negative_value_is_substituted_parenthesized():
+    with workspace_context():
+        calculate_expression("s = 2 - 7")
+        assert calculate_expression("s^2").value == 25
+
+
+def test_reassignment_replaces_value():
+    with workspace_context() as workspace:
+        calculate_expression("total = 120*0.85")
+        calculate_expression("total = total*2")
+        assert workspace.get("total") == 204